@@ -0,0 +1,410 @@
+"""Formato binario compacto de los artefactos del análisis MyJS.
+
+Alternativa a `lexed.txt`, `symbols.txt` y `parse.txt` para las herramientas
+que consumen el resultado: un único fichero con cabecera versionada y
+secciones de registros de tamaño fijo, que `BinaryArtifacts` lee proyectando
+el fichero en memoria (sin copiarlo ni parsear texto).
+
+Estructura (little-endian, cada sección alineada a 8 bytes):
+    cabecera     MAGIC, versión, flags (bit 0: sintaxis correcta, bit 1: sin
+                 errores) y el directorio de secciones (offset, nº de elementos)
+    strings      tabla de cadenas: offsets uint32[n + 1] y los bytes UTF-8
+                 (tipos de token, lexemas, cadenas, tipos y mensajes)
+    tokens       TOKEN: tipo, clase del valor, línea, offset en el fuente y valor
+                 (entero, id.pos o cadena; los reales, como cadena con su repr)
+    symbols      SYMBOL: posición, lexema, tipo y desplazamiento (-1 = sin él)
+    tables       TABLE: nombre (NONE = tabla global), primer símbolo y nº de símbolos
+    productions  uint16 por producción aplicada (el contenido de parse.txt)
+    diagnostics  DIAGNOSTIC: clase, línea y mensaje
+
+El mismo formato guarda las entradas de `ResultCache`, la caché en disco del
+resultado completo del análisis que usan lex.py y batch.py.
+
+Uso:
+    python lex.py programa.txt --binary resultado.myjsb
+    python artifacts.py info resultado.myjsb
+    python artifacts.py to-text resultado.myjsb [-o directorio]
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import caches
+import lex
+import sinks
+
+MAGIC = b'MYJSBIN\0'
+FORMAT_VERSION = 1
+SECTIONS = ('strings', 'tokens', 'symbols', 'tables', 'productions', 'diagnostics')
+
+HEADER = struct.Struct('<8sHHI')
+SECTION = struct.Struct('<QQ')   # offset, nº de elementos
+TOKEN = struct.Struct('<HBxIIi')
+SYMBOL = struct.Struct('<IIIi')
+TABLE = struct.Struct('<III')
+DIAGNOSTIC = struct.Struct('<III')
+HEADER_SIZE = HEADER.size + SECTION.size * len(SECTIONS)
+
+NONE = 0xFFFFFFFF   # referencia a cadena ausente
+
+# Clase del valor de un token
+VALUE_NONE, VALUE_EMPTY, VALUE_INT, VALUE_FLOAT, VALUE_STRING = range(5)
+
+FLAG_OK = 1
+FLAG_SUCCESS = 2
+NO_DISPLACEMENT = -1
+
+
+class StringTable:
+    """Cadenas internadas del fichero: cada cadena distinta se guarda una vez."""
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, text):
+        if text is None:
+            return NONE
+        i = self.index.get(text)
+        if i is None:
+            i = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return i
+
+    def encode(self):
+        data = [s.encode('utf-8') for s in self.strings]
+        offsets = array('I', [0])
+        for blob in data:
+            offsets.append(offsets[-1] + len(blob))
+        return _le(offsets) + b''.join(data)
+
+
+def _le(values):
+    """Bytes little-endian de un `array`."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _token_record(strings, tok_type, value, lineno, lexpos):
+    type_ref = strings.add(tok_type)
+    if value is None:       # EOF
+        return TOKEN.pack(type_ref, VALUE_NONE, lineno, lexpos, 0)
+    if isinstance(value, float):
+        return TOKEN.pack(type_ref, VALUE_FLOAT, lineno, lexpos, strings.add(repr(value)))
+    if value == '':         # palabras reservadas
+        return TOKEN.pack(type_ref, VALUE_EMPTY, lineno, lexpos, 0)
+    if isinstance(value, str):  # cadenas y símbolos
+        return TOKEN.pack(type_ref, VALUE_STRING, lineno, lexpos, strings.add(value))
+    return TOKEN.pack(type_ref, VALUE_INT, lineno, lexpos, value)  # enteros e id.pos
+
+
+def encode(result):
+    """Serializa un `lex.AnalysisResult` en el formato binario (bytes)."""
+    strings = StringTable()
+    # Los tipos de token van primero: su índice cabe en los 16 bits de TOKEN.
+    for tok_type in lex.tokens + ['EOF']:
+        strings.add(tok_type)
+    tokens = b''.join(_token_record(strings, *tok) for tok in result.tokens)
+
+    symbols = []
+    tables = []
+    for name, scope in [(None, result.global_scope)] + list(result.function_tables):
+        tables.append(TABLE.pack(strings.add(name), len(symbols), len(scope)))
+        for lexeme, sym in sorted(scope.items(), key=lambda item: item[1]['position']):
+            displacement = sym.get('displacement')
+            symbols.append(SYMBOL.pack(
+                sym['position'], strings.add(lexeme), strings.add(sym.get('type')),
+                NO_DISPLACEMENT if displacement is None else displacement))
+
+    productions = array('H', result.production_sequence)
+    diagnostics = [DIAGNOSTIC.pack(strings.add(d.kind), d.line, strings.add(d.message))
+                   for d in result.diagnostics]
+
+    sections = [
+        (strings.encode(), len(strings.strings)),
+        (tokens, len(result.tokens)),
+        (b''.join(symbols), len(symbols)),
+        (b''.join(tables), len(tables)),
+        (_le(productions), len(productions)),
+        (b''.join(diagnostics), len(diagnostics)),
+    ]
+    flags = (FLAG_OK if result.ok else 0) | (FLAG_SUCCESS if result.success else 0)
+    header = [HEADER.pack(MAGIC, FORMAT_VERSION, flags, 0)]
+    body = []
+    offset = HEADER_SIZE
+    for data, count in sections:
+        padding = -offset % 8
+        body.append(b'\0' * padding)
+        offset += padding
+        header.append(SECTION.pack(offset, count))
+        body.append(data)
+        offset += len(data)
+    return b''.join(header + body)
+
+
+def write_binary(result, path):
+    """Escribe el resultado en `path` en formato binario."""
+    with open(path, 'wb') as f:
+        f.write(encode(result))
+
+
+class BinaryArtifacts:
+    """Lector de un fichero binario de artefactos, proyectado en memoria.
+
+    Las secciones se leen directamente del mapa (`buffer`): `productions` es una
+    vista uint16 sin copia, `token(i)` y `tokens()` desempaquetan registros bajo
+    demanda y `string_bytes(i)` devuelve la cadena como vista. Las vistas dejan
+    de ser válidas al cerrar el lector.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._map)
+        if len(self.buffer) < HEADER_SIZE:
+            self.close()
+            raise ValueError(f"'{path}' no es un fichero de artefactos MyJS")
+        magic, version, self.flags, _ = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' no es un fichero de artefactos MyJS")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Versión de formato no soportada: {version}")
+        self.sections = {name: SECTION.unpack_from(self.buffer, HEADER.size + i * SECTION.size)
+                         for i, name in enumerate(SECTIONS)}
+
+        offset, count = self.sections['strings']
+        self._string_offsets = self._uint_array(offset, count + 1, 'I')
+        self._string_data = offset + 4 * (count + 1)
+
+    def close(self):
+        self.buffer.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # quedan vistas exportadas: el mapa se cierra cuando se liberen
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _uint_array(self, offset, count, typecode):
+        size = array(typecode).itemsize * count
+        view = self.buffer[offset:offset + size]
+        if sys.byteorder == 'little':
+            return view.cast(typecode)
+        values = array(typecode, view.tobytes())  # máquina big-endian: copia
+        values.byteswap()
+        return values
+
+    @property
+    def ok(self):
+        return bool(self.flags & FLAG_OK)
+
+    @property
+    def success(self):
+        return bool(self.flags & FLAG_SUCCESS)
+
+    def count(self, section):
+        return self.sections[section][1]
+
+    # Cadenas
+
+    def string_bytes(self, i):
+        """Bytes UTF-8 de la cadena `i` (vista del mapa, sin copia)."""
+        start = self._string_data + self._string_offsets[i]
+        return self.buffer[start:self._string_data + self._string_offsets[i + 1]]
+
+    def string(self, i):
+        return None if i == NONE else str(self.string_bytes(i), 'utf-8')
+
+    # Tokens
+
+    def _decode_token(self, record):
+        type_ref, kind, lineno, lexpos, value = record
+        if kind == VALUE_NONE:
+            value = None
+        elif kind == VALUE_EMPTY:
+            value = ''
+        elif kind == VALUE_FLOAT:
+            value = float(self.string(value))
+        elif kind == VALUE_STRING:
+            value = self.string(value)
+        return (self.string(type_ref), value, lineno, lexpos)
+
+    def token(self, i):
+        """Token `i` como (tipo, valor, línea, offset), igual que `AnalysisResult.tokens`."""
+        offset, count = self.sections['tokens']
+        if not 0 <= i < count:
+            raise IndexError(i)
+        return self._decode_token(TOKEN.unpack_from(self.buffer, offset + i * TOKEN.size))
+
+    def tokens(self):
+        """Itera los tokens en orden."""
+        offset, count = self.sections['tokens']
+        view = self.buffer[offset:offset + count * TOKEN.size]
+        for record in TOKEN.iter_unpack(view):
+            yield self._decode_token(record)
+
+    # Derivación
+
+    @property
+    def productions(self):
+        """Secuencia de producciones (vista uint16 del mapa)."""
+        return self._uint_array(*self.sections['productions'], 'H')
+
+    # Tablas de símbolos
+
+    def symbol_tables(self):
+        """(global_scope, function_tables) con la forma de `AnalysisResult`."""
+        sym_offset, _ = self.sections['symbols']
+        offset, count = self.sections['tables']
+        tables = []
+        for name_ref, first, n in TABLE.iter_unpack(
+                self.buffer[offset:offset + count * TABLE.size]):
+            scope = {}
+            start = sym_offset + first * SYMBOL.size
+            for position, lexeme_ref, type_ref, displacement in SYMBOL.iter_unpack(
+                    self.buffer[start:start + n * SYMBOL.size]):
+                lexeme = self.string(lexeme_ref)
+                scope[lexeme] = {
+                    'type': None if type_ref == NONE else lex.type_from_string(self.string(type_ref)),
+                    'value': lexeme,
+                    'position': position,
+                    'displacement': None if displacement == NO_DISPLACEMENT else displacement,
+                    'lexeme': lexeme,
+                }
+            tables.append((self.string(name_ref), scope))
+        return tables[0][1], tables[1:]
+
+    # Diagnósticos
+
+    def diagnostics(self):
+        offset, count = self.sections['diagnostics']
+        return [lex.Diagnostic(self.string(kind), line, self.string(message))
+                for kind, line, message in DIAGNOSTIC.iter_unpack(
+                    self.buffer[offset:offset + count * DIAGNOSTIC.size])]
+
+    def to_result(self):
+        """Reconstruye el `lex.AnalysisResult` (para convertir a los formatos de texto)."""
+        diagnostics = self.diagnostics()
+        syntax_error = next((d for d in diagnostics if d.kind in ('syntax', 'internal')), None)
+        syntax_errors = [d for d in diagnostics if d.kind == 'syntax']
+        global_scope, function_tables = self.symbol_tables()
+        return lex.AnalysisResult(
+            ok=self.ok,
+            tokens=list(self.tokens()),
+            lex_errors=[(d.line, d.message) for d in diagnostics if d.kind == 'lex'],
+            sem_errors=[(d.line, d.message) for d in diagnostics if d.kind == 'semantic'],
+            syntax_error=syntax_error,
+            syntax_errors=syntax_errors,
+            production_sequence=list(self.productions),
+            global_scope=global_scope,
+            function_tables=function_tables,
+        )
+
+
+def to_text(path, out_dir='.'):
+    """Convierte un fichero binario a `lexed.txt`, `symbols.txt` y `parse.txt`.
+
+    `parse.txt` solo se genera si el análisis no tuvo errores, como en lex.py.
+    Devuelve los ficheros escritos.
+    """
+    with BinaryArtifacts(path) as artifacts:
+        result = artifacts.to_result()
+    texts = {'lexed': result.lexed_lines(), 'symbols': result.symbols_text()}
+    if result.success:
+        texts['parse'] = result.parse_text()
+    written = []
+    for artifact, text in texts.items():
+        name, encoding = sinks.ARTIFACTS[artifact]
+        sink = sinks.FileSink(os.path.join(out_dir, name), encoding)
+        sinks.write_artifact(sink, text)
+        written.append(sink.path)
+    return written
+
+
+# Tamaño máximo de la caché de resultados en disco (bytes) antes de desalojar entradas.
+RESULT_CACHE_MAX_BYTES = 512 << 20
+
+
+class ResultCache(caches.DiskCache):
+    """Caché en disco del resultado completo del análisis (ficheros `.myjsb`).
+
+    Cada entrada es un fichero binario de artefactos (`encode`) seguido del
+    SHA-256 de la clave y del contenido: el formato no tiene sumas de control
+    propias, y una entrada dañada (o de otra clave) podría leerse sin error con
+    otra derivación o con otras tablas. La clave es el hash del fuente, de
+    Gramatica.txt con la versión del analizador (`lex.grammar_cache_key`) y de
+    las opciones que cambian el resultado. Con un acierto, `get` devuelve el
+    `lex.AnalysisResult` sin tokenizar ni analizar: a partir de él se escriben
+    los mismos ficheros, mensajes y código de salida.
+    """
+    suffix = '.myjsb'
+
+    def __init__(self, directory=None, max_bytes=RESULT_CACHE_MAX_BYTES):
+        super().__init__(directory or os.path.join(lex.get_cache_dir(), 'results'), max_bytes)
+        self._grammar_keys = {}
+
+    def key(self, source, grammar_path, **options):
+        """Clave de analizar `source` con la gramática `grammar_path` y `options`."""
+        grammar_key = self._grammar_keys.get(grammar_path)
+        if grammar_key is None:
+            grammar_key = self._grammar_keys[grammar_path] = lex.grammar_cache_key(grammar_path)
+        h = hashlib.sha256()
+        h.update(f"{FORMAT_VERSION}\0{grammar_key}\0{sorted(options.items())!r}\0".encode('utf-8'))
+        h.update(source.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def _dump(self, key, result):
+        data = encode(result)
+        return data + hashlib.sha256(bytes.fromhex(key) + data).digest()
+
+    def _load(self, key, path):
+        # El lector de artefactos ignora lo que va tras las secciones (el SHA-256).
+        with open(path, 'rb') as f:
+            data = f.read()
+        if hashlib.sha256(bytes.fromhex(key) + data[:-32]).digest() != data[-32:]:
+            return None
+        with BinaryArtifacts(path) as artifacts:
+            return artifacts.to_result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Artefactos MyJS en formato binario')
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help='Resumen del fichero binario')
+    info.add_argument('file')
+    convert = commands.add_parser('to-text', help='Convertir a lexed.txt, symbols.txt y parse.txt')
+    convert.add_argument('file')
+    convert.add_argument('-o', '--out-dir', default='.', help='Directorio de salida')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'to-text':
+            os.makedirs(args.out_dir, exist_ok=True)
+            for path in to_text(args.file, args.out_dir):
+                print(path)
+            return
+        with BinaryArtifacts(args.file) as artifacts:
+            print(f"Formato {FORMAT_VERSION}, sintaxis {'correcta' if artifacts.ok else 'con errores'}, "
+                  f"{'sin errores' if artifacts.success else 'con errores'}")
+            for name in SECTIONS:
+                print(f"  {name:<12} {artifacts.count(name):>10}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
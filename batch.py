@@ -0,0 +1,314 @@
+"""Análisis por lotes de programas MyJS con un pool de procesos.
+
+Recoge los fuentes indicados (ficheros, directorios, patrones glob y/o un
+manifiesto con una ruta por línea), compila la gramática una sola vez y reparte
+los ficheros entre `-j` procesos. Cada proceso mantiene una sesión `Analyzer`
+caliente (lexer y gramática ya construidos) y la reutiliza para todos sus
+ficheros. Los tokens de cada fuente se guardan en la caché de tokens en disco
+(`caches.TokenCache`) y su resultado completo en la de resultados
+(`artifacts.ResultCache`), compartidas entre procesos y ejecuciones: de un
+fichero que no ha cambiado desde el lote anterior se reescriben sus artefactos
+sin volver a tokenizarlo ni analizarlo.
+
+Por cada fuente se crea un directorio de salida propio (su ruta relativa sin
+extensión, ver `output_dirs`) con `lexed.txt`, `symbols.txt` y, si el análisis
+es correcto, `parse.txt` (igual que lex.py).
+Al final se escribe `summary.json` con el resultado, los diagnósticos y los
+tiempos de cada fichero, más los totales del lote.
+
+Uso:
+    python batch.py programas/ 'otros/**/*.txt' [--manifest lista.txt] [-o salida] [-j 8]
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import artifacts
+import caches
+import lex
+
+DEFAULT_PATTERN = '*.txt'
+
+# Estado de cada proceso del pool: gramática compartida, sesión reutilizable y
+# caché de resultados (None con --no-cache).
+_compiled = None
+_analyzer = None
+_results = None
+_grammar_path = None
+
+
+def collect_inputs(paths, manifest=None, pattern=DEFAULT_PATTERN):
+    """Lista ordenada y sin duplicados de los fuentes a analizar.
+
+    Args:
+        paths: Ficheros, directorios (se recorren recursivamente buscando
+            `pattern`) o patrones glob (admiten `**`).
+        manifest: Fichero con una ruta o patrón por línea ('#' = comentario).
+        pattern: Patrón de nombre para los ficheros de los directorios.
+    """
+    entries = list(paths)
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    entries.append(line if os.path.isabs(line) else os.path.join(base, line))
+
+    files = []
+    seen = set()
+    for entry in entries:
+        if os.path.isdir(entry):
+            found = sorted(glob.glob(os.path.join(entry, '**', pattern), recursive=True))
+        elif glob.has_magic(entry):
+            found = sorted(glob.glob(entry, recursive=True))
+        else:
+            found = [entry]
+        for path in found:
+            if os.path.isdir(path):
+                continue
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def output_dirs(files, out_root):
+    """Directorio de salida de cada fuente: su ruta relativa (sin extensión) bajo `out_root`.
+
+    Si dos fuentes solo se distinguen por la extensión (`prog.txt` y `prog.myjs`)
+    la conservan en el nombre del directorio, y si aun así coinciden se numeran
+    (`prog-2`), para que ningún fuente sobrescriba los artefactos de otro.
+    """
+    absolute = [os.path.abspath(path) for path in files]
+    if not absolute:
+        return []
+    base = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    relative = [os.path.relpath(path, base) for path in absolute]
+    stems = [os.path.splitext(rel)[0] for rel in relative]
+    counts = {}
+    for stem in stems:
+        key = os.path.normcase(stem)
+        counts[key] = counts.get(key, 0) + 1
+    names = [rel if counts[os.path.normcase(stem)] > 1 else stem
+             for rel, stem in zip(relative, stems)]
+    dirs = []
+    used = set()
+    for name in names:
+        candidate, n = name, 1
+        while os.path.normcase(candidate) in used:
+            n += 1
+            candidate = f"{name}-{n}"
+        used.add(os.path.normcase(candidate))
+        dirs.append(os.path.join(out_root, candidate))
+    return dirs
+
+
+def _init_worker(engine, grammar_path, use_cache):
+    """Inicializador del pool: una sesión por proceso.
+
+    Con `fork` la gramática compilada por el proceso principal se hereda; con
+    `spawn` (Windows) se carga de la caché en disco que este ya dejó escrita.
+    """
+    global _compiled, _analyzer, _results, _grammar_path
+    if _compiled is None:
+        _compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+    _analyzer = lex.Analyzer(_compiled, parser=engine,
+                             token_cache=caches.TokenCache() if use_cache else None)
+    _results = artifacts.ResultCache() if use_cache else None
+    _grammar_path = grammar_path
+
+
+def analyze_file(task):
+    """Analiza un fuente y escribe sus artefactos; devuelve su entrada del resumen."""
+    path, out_dir = task
+    entry = {'file': path, 'output': out_dir, 'success': False}
+    start = time.perf_counter()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        entry['error'] = f"Error al leer el archivo: {e}"
+        return entry
+    t_read = time.perf_counter()
+
+    result = None
+    if _results is not None:
+        key = _results.key(content, _grammar_path, parser=_analyzer.engine,
+                           lexer=_analyzer.lexer_engine, recover=False, tokens=True,
+                           max_errors=None)
+        result = _results.get(key)
+        entry['cached'] = result is not None
+    if result is None:
+        # Un fallo interno en un fichero no debe detener el lote.
+        try:
+            result = _analyzer.analyze(content)
+            if _results is not None:
+                _results.put(key, result)
+        except Exception as e:
+            entry['error'] = f"Error interno al analizar: {type(e).__name__}: {e}"
+            return entry
+    t_analyze = time.perf_counter()
+
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, 'lexed.txt'), 'w', encoding='utf-8') as f:
+            f.write(result.lexed_text())
+        with open(os.path.join(out_dir, 'symbols.txt'), 'w', encoding='utf-8') as f:
+            f.write(result.symbols_text())
+        parse_path = os.path.join(out_dir, 'parse.txt')
+        if result.success:
+            with open(parse_path, 'w') as f:
+                f.write(result.parse_text())
+        elif os.path.exists(parse_path):
+            # Artefacto obsoleto de una ejecución anterior.
+            os.remove(parse_path)
+    except OSError as e:
+        entry['error'] = f"Error al escribir archivos de salida: {e}"
+        return entry
+    t_write = time.perf_counter()
+
+    entry.update({
+        'success': result.success,
+        'tokens': len(result.tokens),
+        'diagnostics': [{'kind': d.kind, 'line': d.line, 'message': d.message}
+                        for d in result.diagnostics],
+        'timings': {
+            'read': round(t_read - start, 6),
+            'analyze': round(t_analyze - t_read, 6),
+            'write': round(t_write - t_analyze, 6),
+        },
+    })
+    return entry
+
+
+def run_batch(files, out_root, jobs=None, engine='tabla', use_cache=True, grammar_path=None,
+              on_result=None):
+    """Analiza `files` con `jobs` procesos (por defecto, uno por núcleo).
+
+    Devuelve el resumen del lote (dict serializable a JSON). `on_result` se
+    llama con cada entrada según van terminando los ficheros.
+    """
+    global _compiled
+    grammar_path = grammar_path or lex.get_resource_path('Gramatica.txt')
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    # La gramática se compila una vez aquí (y queda en la caché de disco).
+    _compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+    tasks = list(zip(files, output_dirs(files, out_root)))
+    init_args = (engine, grammar_path, use_cache)
+
+    results = []
+    if jobs == 1 or len(tasks) <= 1:
+        _init_worker(*init_args)
+        for task in tasks:
+            results.append(analyze_file(task))
+            if on_result:
+                on_result(results[-1])
+    else:
+        # Lotes de varios ficheros por mensaje (menos IPC) pero suficientes para
+        # repartir bien la carga entre procesos.
+        chunksize = max(1, len(tasks) // (jobs * 8))
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=init_args) as pool:
+            for entry in pool.imap_unordered(analyze_file, tasks, chunksize):
+                results.append(entry)
+                if on_result:
+                    on_result(entry)
+
+    order = {path: i for i, path in enumerate(files)}
+    results.sort(key=lambda e: order[e['file']])
+    failed = [e['file'] for e in results if not e['success']]
+    hits = sum(1 for e in results if e.get('cached'))
+    misses = sum(1 for e in results if e.get('cached') is False)
+    if use_cache:
+        # Los procesos del pool no guardan estadísticas: se guardan las del lote.
+        stats = artifacts.ResultCache()
+        stats.hits, stats.misses = hits, misses
+        stats.save_stats()
+    wall = time.perf_counter() - start
+    analyze_total = sum(e.get('timings', {}).get('analyze', 0.0) for e in results)
+    return {
+        'analyzer_version': lex.ANALYZER_VERSION,
+        'parser': engine,
+        'jobs': jobs,
+        'files': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': failed,
+        'cache': {'hits': hits, 'misses': misses},
+        'timings': {
+            'wall': round(wall, 6),
+            'analyze_total': round(analyze_total, 6),
+            'files_per_second': round(len(results) / wall, 2) if wall > 0 else None,
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Análisis por lotes de programas MyJS con un pool de procesos'
+    )
+    parser.add_argument('inputs', nargs='*', help='Ficheros, directorios o patrones glob')
+    parser.add_argument('--manifest', help='Fichero con una ruta o patrón por línea')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN,
+                        help=f'Patrón de los ficheros de los directorios (por defecto, {DEFAULT_PATTERN})')
+    parser.add_argument('-o', '--output', default='batch_out',
+                        help='Directorio raíz de los artefactos (por defecto, batch_out)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Nº de procesos (por defecto, uno por núcleo)')
+    parser.add_argument('--parser', choices=['tabla', 'generado'], default='tabla',
+                        help='Motor sintáctico (ver lex.py --parser)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='No usar las cachés en disco (tabla LL(1), tokens y resultados)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='No mostrar los ficheros con errores según terminan')
+    args = parser.parse_args()
+
+    try:
+        files = collect_inputs(args.inputs, args.manifest, args.pattern)
+    except OSError as e:
+        print(f"Error al leer el manifiesto: {e}")
+        sys.exit(1)
+    if not files:
+        print("Error: No se encontró ningún archivo fuente MyJS")
+        sys.exit(1)
+
+    C = lex.Colors
+
+    def report(entry):
+        if args.quiet or entry['success']:
+            return
+        reason = entry.get('error') or f"{len(entry['diagnostics'])} error(es)"
+        print(f"{C.RED}{C.BOLD}FALLO:{C.RESET}{C.RED} {entry['file']} ({reason}){C.RESET}")
+
+    summary = run_batch(files, args.output, args.jobs, args.parser, not args.no_cache,
+                        on_result=report)
+
+    os.makedirs(args.output, exist_ok=True)
+    summary_path = os.path.join(args.output, 'summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    timings = summary['timings']
+    color = C.GREEN if not summary['failed'] else C.YELLOW
+    print(f"{color}{C.BOLD}{summary['succeeded']}/{summary['files']} ficheros sin errores "
+          f"en {timings['wall']:.2f} s ({timings['files_per_second']} ficheros/s, "
+          f"{summary['jobs']} procesos).{C.RESET}")
+    if not args.no_cache:
+        print(f"{color}Caché de resultados: {summary['cache']['hits']} aciertos, "
+              f"{summary['cache']['misses']} fallos.{C.RESET}")
+    print(f"{color}Resumen: {summary_path}{C.RESET}")
+    if summary['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Los procesos del pool en un ejecutable congelado (PyInstaller, spawn).
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark del modo por lotes: escalado de batch.py con el nº de procesos.
+
+Genera un corpus sintético de programas MyJS en un directorio temporal y lo
+analiza con `batch.run_batch` para cada nº de procesos, mostrando el tiempo de
+pared, los ficheros por segundo y la aceleración respecto a un proceso. Como
+cada fichero es independiente, el escalado debe ser casi lineal hasta el nº
+de núcleos de la máquina.
+
+Uso:
+    python benchmarks/bench_batch.py [--files 400] [--statements 300] [--jobs 1 2 4]
+"""
+import argparse
+import os
+import tempfile
+
+from common import generate_mixed_program
+
+import batch
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--statements", type=int, default=300,
+                        help="sentencias por programa")
+    parser.add_argument("--jobs", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cpus} & set(range(1, cpus + 1))))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src")
+        os.makedirs(src)
+        for i in range(args.files):
+            with open(os.path.join(src, f"p{i:05d}.txt"), "w", encoding="utf-8") as f:
+                f.write(generate_mixed_program(args.statements, seed=i))
+        files = batch.collect_inputs([src])
+
+        print(f"{args.files} ficheros x {args.statements} sentencias, {cpus} núcleos")
+        print(f"{'procesos':>8} {'pared (s)':>10} {'ficheros/s':>11} {'aceleración':>12}")
+        base = None
+        for jobs in args.jobs:
+            summary = batch.run_batch(files, os.path.join(tmp, f"out{jobs}"), jobs)
+            if summary["failed"]:
+                raise SystemExit("El corpus generado no es válido")
+            wall = summary["timings"]["wall"]
+            base = base or wall
+            print(f"{jobs:>8} {wall:>10.3f} {args.files / wall:>11.1f} {base / wall:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
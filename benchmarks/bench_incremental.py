@@ -0,0 +1,77 @@
+"""Benchmark del reanálisis incremental (incremental.py) frente al análisis completo.
+
+Para cada tamaño analiza un programa, le aplica una serie de ediciones típicas
+(cambiar una sentencia al final, en medio y al principio, añadir una global al
+principio y cambiar la firma de una función) y mide cada reanálisis con
+`IncrementalAnalyzer` y con un `Analyzer` completo. Comprueba que ambos
+resultados son idénticos (artefactos y diagnósticos) y muestra cuántas
+unidades de nivel superior se reaprovecharon.
+
+Uso:
+    python benchmarks/bench_incremental.py [--sizes 2000 8000]
+"""
+import argparse
+import time
+
+from common import generate_mixed_program, lex, load_grammar
+
+import incremental
+
+
+def edits(code):
+    """Ediciones sucesivas: (descripción, nuevo texto)."""
+    lines = code.split("\n")
+    n = len(lines)
+
+    def replace(index, text):
+        lines[index] = text
+        return "\n".join(lines)
+
+    # Líneas de sentencias (tras las funciones), para no romper ninguna función.
+    first_statement = next(i for i in range(n) if lines[i].startswith(("let", "write", "if")))
+    yield "sentencia al final", replace(n - 2, "write 'editada al final';")
+    yield "sentencia en medio", replace((first_statement + n) // 2, "write 'editada en medio';")
+    yield "sentencia al principio", replace(first_statement, "write 'editada al principio';")
+    lines.insert(0, "let int nueva = 1;")
+    yield "global nueva al principio", "\n".join(lines)
+    yield "firma de f0", "\n".join(lines).replace("function int f0(", "function float f0(", 1)
+
+
+def outcome(result):
+    return (result.ok, result.lexed_text(), result.symbols_text(), result.parse_text(),
+            [d.render() for d in result.diagnostics])
+
+
+def timed(analyzer, code):
+    start = time.perf_counter()
+    result = analyzer.analyze(code)
+    return time.perf_counter() - start, outcome(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000],
+                        help="sentencias por programa")
+    args = parser.parse_args()
+
+    compiled = load_grammar()
+    full = lex.Analyzer(compiled)
+    print(f"{'sentencias':>10} {'edición':<26} {'completo (s)':>12} {'incremental (s)':>15} "
+          f"{'aceleración':>11} {'reaprovechadas':>15}")
+    for size in args.sizes:
+        code = generate_mixed_program(size, seed=size)
+        session = incremental.IncrementalAnalyzer(compiled)
+        t_first, _ = timed(session, code)
+        print(f"{size:>10} {'(primer análisis)':<26} {'':>12} {t_first:>15.3f}")
+        for name, edited in edits(code):
+            t_full, expected = timed(full, edited)
+            t_inc, got = timed(session, edited)
+            if got != expected:
+                raise SystemExit(f"Resultados distintos tras la edición '{name}'")
+            stats = session.stats
+            print(f"{size:>10} {name:<26} {t_full:>12.3f} {t_inc:>15.3f} "
+                  f"{t_full / t_inc:>10.1f}x {stats['reused']:>7}/{stats['units']:<7}")
+
+
+if __name__ == "__main__":
+    main()
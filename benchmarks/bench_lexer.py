@@ -0,0 +1,86 @@
+"""Benchmark del lexer: `Scanner` (expresión regular maestra) frente a PLY.
+
+Para cada tamaño tokeniza el mismo programa con los dos motores léxicos (sin
+parser), comprueba que producen los mismos tokens y errores y muestra el
+tiempo, los tokens por segundo y la aceleración del `Scanner`. Con `--jobs`
+mide también el lexer paralelo (`lex.lex_parallel`, con el fuente repartido
+entre todos los procesos) y comprueba que da los mismos tokens y errores.
+
+Uso:
+    python benchmarks/bench_lexer.py [--sizes 2000 20000] [--repeat 3] [--jobs 2 4]
+"""
+import argparse
+import time
+
+from common import generate_mixed_program, lex, lex_only, load_grammar
+
+
+def tokens_of(analyzer, code):
+    analyzer.reset()
+    analyzer.init_lexer_for_parser(code)
+    while analyzer.current_token.type != 'EOF':
+        analyzer.advance_token()
+    return analyzer.tokens, analyzer.lex_errors
+
+
+def parallel_tokens_of(analyzer, code, jobs):
+    lexer = analyzer.lexer
+    analyzer.lexer = lex.lex_parallel(code, jobs, min_chunk=1)
+    analyzer.lexer.analyzer = analyzer
+    try:
+        return tokens_of(analyzer, code)
+    finally:
+        analyzer.lexer = lexer
+
+
+def best_time(analyzer, code, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n = lex_only(analyzer, code)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, n
+
+
+def best_parallel_time(code, jobs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n = len(lex.lex_parallel(code, jobs, min_chunk=1).buffer)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000],
+                        help="sentencias por programa")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[],
+                        help="procesos del lexer paralelo a medir")
+    args = parser.parse_args()
+
+    compiled = load_grammar()
+    engines = {name: lex.Analyzer(compiled, lexer=name) for name in ("ply", "regex")}
+    print(f"{'sentencias':>10} {'motor':>6} {'tiempo (s)':>11} {'tokens/s':>12} {'aceleración':>12}")
+    for size in args.sizes:
+        code = generate_mixed_program(size, seed=size)
+        if tokens_of(engines["ply"], code) != tokens_of(engines["regex"], code):
+            raise SystemExit("Los motores léxicos producen tokens distintos")
+        base = None
+        for name, analyzer in engines.items():
+            elapsed, n = best_time(analyzer, code, args.repeat)
+            base = base or elapsed
+            print(f"{size:>10} {name:>6} {elapsed:>11.3f} {n / elapsed:>12.0f} {base / elapsed:>11.2f}x")
+        regex = engines["regex"]
+        for jobs in args.jobs:
+            if parallel_tokens_of(regex, code, jobs) != tokens_of(regex, code):
+                raise SystemExit(f"El lexer paralelo ({jobs} procesos) produce tokens distintos")
+            elapsed, n = best_parallel_time(code, jobs, args.repeat)
+            print(f"{size:>10} {f'×{jobs}':>6} {elapsed:>11.3f} {n / elapsed:>12.0f} {base / elapsed:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark de la comprobación de funciones en paralelo (`incremental.ParallelAnalyzer`).
+
+Para cada tamaño genera un programa con muchas funciones y poco código global,
+lo analiza con un `Analyzer` secuencial y con `ParallelAnalyzer` para cada
+número de procesos, comprueba que los resultados son idénticos (artefactos y
+diagnósticos) y muestra cuántas unidades se reaprovecharon de los procesos y
+cuántas se volvieron a analizar en el proceso principal.
+
+Uso:
+    python benchmarks/bench_parallel_semantics.py [--sizes 20000] [--jobs 2 4] [--functions 400]
+"""
+import argparse
+import time
+
+from common import generate_program, lex, load_grammar
+
+import incremental
+
+
+def outcome(result):
+    return (result.ok, result.lexed_text(), result.symbols_text(), result.parse_text(),
+            [d.render() for d in result.diagnostics])
+
+
+def timed(analyzer, code):
+    start = time.perf_counter()
+    result = analyzer.analyze(code)
+    return time.perf_counter() - start, outcome(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000],
+                        help="sentencias por programa")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--functions", type=int, default=400)
+    args = parser.parse_args()
+
+    compiled = load_grammar()
+    print(f"{'sentencias':>10} {'procesos':>8} {'tiempo (s)':>10} {'aceleración':>11} "
+          f"{'reaprovechadas':>15} {'reanalizadas':>12}")
+    for size in args.sizes:
+        code = generate_program(size, functions=args.functions, seed=size)
+        t_seq, expected = timed(lex.Analyzer(compiled), code)
+        print(f"{size:>10} {'-':>8} {t_seq:>10.3f}")
+        for jobs in args.jobs:
+            analyzer = incremental.ParallelAnalyzer(compiled, jobs=jobs)
+            t_par, got = timed(analyzer, code)
+            if got != expected:
+                raise SystemExit(f"Resultados distintos con {jobs} procesos")
+            stats = analyzer.stats
+            print(f"{size:>10} {jobs:>8} {t_par:>10.3f} {t_seq / t_par:>10.1f}x "
+                  f"{stats['reused']:>7}/{stats['units']:<7} {stats['rechecked']:>12}")
+
+
+if __name__ == "__main__":
+    main()
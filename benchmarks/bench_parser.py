@@ -0,0 +1,78 @@
+"""Benchmark del parser: intérprete de la tabla LL(1) frente al parser generado.
+
+Para cada tamaño analiza el mismo programa con `Analyzer.parse` y con el parser
+especializado de parsergen.py, comprueba que los resultados son idénticos
+(production_sequence, errores y tablas de símbolos) y muestra el tiempo total y
+el tiempo atribuible al parser (total menos el coste del lexer en solitario).
+
+El parser generado se genera y compila una vez por proceso (`parsergen.compile_parser`);
+ese coste se mide aparte y la última columna lo suma al primer análisis, que es
+lo que paga `python lex.py --parser generado` con un solo fichero.
+
+Uso:
+    python benchmarks/bench_parser.py [--sizes 200 1000 4000 16000] [--repeat 3]
+"""
+import argparse
+import time
+
+from common import generate_mixed_program, lex, lex_only, load_grammar
+
+import parsergen
+
+
+def time_lex_only(analyzer, code):
+    start = time.perf_counter()
+    lex_only(analyzer, code)
+    return time.perf_counter() - start
+
+
+def run(analyzer, code):
+    start = time.perf_counter()
+    result = analyzer.analyze(code)
+    elapsed = time.perf_counter() - start
+    outcome = (result.ok, result.production_sequence, result.lex_errors,
+               result.sem_errors, result.symbols_text())
+    return elapsed, outcome
+
+
+def time_generation(compiled):
+    """Segundos para generar y compilar el parser especializado de `compiled`."""
+    start = time.perf_counter()
+    source = parsergen.generate_parser_source(compiled.grammar, compiled.expansion_table,
+                                              lex.TOKEN_TO_GRAMMAR)
+    compile(source, f'<{parsergen.GENERATED_MODULE_NAME}>', 'exec')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 4000, 16000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    compiled = load_grammar()
+    interpreter = lex.Analyzer(compiled, parser="tabla", keep_tokens=False)
+    generated = lex.Analyzer(compiled, parser="generado", keep_tokens=False)
+
+    t_generation = min(time_generation(compiled) for _ in range(args.repeat))
+    print(f"Generación del parser: {t_generation:.4f} s (una vez por proceso)")
+    print(f"{'sentencias':>10} {'tokens':>8} {'lexer (s)':>10} {'tabla (s)':>10} "
+          f"{'generado (s)':>12} {'speedup parser':>15} {'con generación':>15}")
+    for n in args.sizes:
+        code = generate_mixed_program(n)
+        tokens = lex_only(interpreter, code)
+        t_lex = min(time_lex_only(interpreter, code) for _ in range(args.repeat))
+        interp = [run(interpreter, code) for _ in range(args.repeat)]
+        gen = [run(generated, code) for _ in range(args.repeat)]
+        if interp[0][1] != gen[0][1]:
+            raise SystemExit(f"Resultados distintos entre motores para n={n}")
+        t_interp = min(t for t, _ in interp)
+        t_gen = min(t for t, _ in gen)
+        speedup = (t_interp - t_lex) / max(t_gen - t_lex, 1e-9)
+        first = (t_interp - t_lex) / max(t_gen + t_generation - t_lex, 1e-9)
+        print(f"{n:>10} {tokens:>8} {t_lex:>10.4f} {t_interp:>10.4f} "
+              f"{t_gen:>12.4f} {speedup:>14.1f}x {first:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Suite de benchmarks por fases con línea base y detección de regresiones.
+
+Genera programas MyJS sintéticos válidos (`common.ProgramGenerator`) según unos
+casos predefinidos y mide por separado cada fase del analizador:
+
+    grammar    construir la gramática compilada (FIRST/FOLLOW, tabla LL(1))
+    lexing     tokenizar el fuente (lexer en solitario)
+    parsing    parser LL(1) sin acciones semánticas (descontado el lexer)
+    semantic   acciones semánticas (análisis completo menos el anterior)
+    output     escribir lexed.txt, symbols.txt y parse.txt
+
+Cada fase se repite y se queda el mejor tiempo. `run -o` guarda los resultados
+en JSON (la línea base); `compare` (o `run --baseline`) marca las fases que
+empeoran más de un umbral relativo y termina con código 1 si hay alguna. Las
+diferencias de menos de `--min-delta` (1 ms por defecto) son ruido y no
+cuentan, sea cual sea la duración de la fase: una fase de 1 ms que pasa a
+10 ms sí es una regresión.
+
+`benchmarks/baseline.json` es la línea base de referencia del repositorio
+(la máquina y la versión de Python van en el fichero). Los tiempos solo son
+comparables en la misma máquina: en CI, la línea base se crea en el mismo
+trabajo midiendo primero el commit de destino y después el de la rama:
+
+    git checkout <destino> && python benchmarks/bench_phases.py run -o /tmp/base.json
+    git checkout <rama> && python benchmarks/bench_phases.py run --baseline /tmp/base.json
+
+Para actualizar `baseline.json` tras un cambio de rendimiento intencionado,
+se vuelve a generar con `run -o benchmarks/baseline.json` y se incluye en el
+mismo commit.
+
+Uso:
+    python benchmarks/bench_phases.py run [--cases pequeño mediano] [--repeat 5] [-o base.json]
+    python benchmarks/bench_phases.py run --baseline benchmarks/baseline.json [--threshold 0.15]
+    python benchmarks/bench_phases.py compare base.json nuevo.json [--threshold 0.15] [--min-delta 0.001]
+    python benchmarks/bench_phases.py corpus DIR [--cases ...]
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from common import generate_program, lex, lex_only, load_grammar
+
+import sinks  # noqa: E402
+
+RESULTS_FORMAT = 1
+PHASES = ("grammar", "lexing", "parsing", "semantic", "output")
+
+# Parámetros de `ProgramGenerator` de cada caso.
+CASES = {
+    "pequeño": dict(statements=1000, functions=10, identifiers=30),
+    "mediano": dict(statements=10000, functions=50, identifiers=200),
+    "grande": dict(statements=50000, functions=200, identifiers=1000),
+    "profundo": dict(statements=3000, functions=10, depth=12, nesting=6),
+    "llamadas": dict(statements=3000, functions=40, arity=8, depth=5),
+}
+DEFAULT_CASES = ("pequeño", "mediano", "profundo", "llamadas")
+
+# Diferencias (en segundos) por debajo de las cuales un empeoramiento es ruido.
+MIN_DELTA = 0.001
+
+
+def without_actions(compiled):
+    """Copia de la gramática compilada cuyas acciones semánticas no hacen nada."""
+    bare = copy.copy(compiled)
+    bare.action_by_code = [lambda session: None] * len(compiled.action_by_code)
+    return bare
+
+
+def best(fns, repeat):
+    """Mejor tiempo de cada función en `repeat` rondas, sin el recolector de basura.
+
+    Las funciones se ejecutan intercaladas (una vez cada una por ronda): las
+    fases que se calculan restando tiempos sufren el mismo ruido de la máquina.
+    """
+    times = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                fn()
+                times[i] = min(times[i], time.perf_counter() - start)
+            finally:
+                gc.enable()
+    return times
+
+
+def write_outputs(result, out_dir):
+    outputs = {artifact: sinks.make_sink(artifact, os.path.join(out_dir, name))
+               for artifact, (name, _) in sinks.ARTIFACTS.items()}
+    sinks.write_artifact(outputs['lexed'], result.lexed_lines())
+    sinks.write_artifact(outputs['symbols'], result.symbols_text())
+    sinks.write_artifact(outputs['parse'], result.parse_text())
+
+
+def measure(name, params, repeat, compiled):
+    """Tiempos de cada fase (segundos) para el caso `name`."""
+    code = generate_program(**params)
+    full = lex.Analyzer(compiled)
+    bare = lex.Analyzer(without_actions(compiled))
+    result = full.analyze(code)
+    if not result.success:
+        raise SystemExit(f"El programa generado para '{name}' tiene errores: {result.diagnostics[:3]}")
+
+    grammar_path = lex.get_resource_path('Gramatica.txt')
+    t_lex, t_bare, t_full = best([lambda: lex_only(full, code), lambda: bare.analyze(code),
+                                  lambda: full.analyze(code)], repeat)
+    with tempfile.TemporaryDirectory() as out_dir:
+        t_grammar, t_out = best([lambda: lex.CompiledGrammar.from_file(grammar_path),
+                                 lambda: write_outputs(result, out_dir)], repeat)
+    phases = {
+        "grammar": t_grammar,
+        "lexing": t_lex,
+        "parsing": max(t_bare - t_lex, 0.0),
+        "semantic": max(t_full - t_bare, 0.0),
+        "output": t_out,
+    }
+    return {"params": params, "lines": code.count("\n"), "tokens": len(result.tokens),
+            "phases": phases}
+
+
+def run_cases(names, repeat):
+    compiled = load_grammar()
+    return {
+        "format": RESULTS_FORMAT,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": {name: measure(name, CASES[name], repeat, compiled) for name in names},
+    }
+
+
+def print_results(results):
+    print(f"{'caso':>10} {'líneas':>8} {'tokens':>9} " + " ".join(f"{p:>9}" for p in PHASES))
+    for name, case in results["cases"].items():
+        print(f"{name:>10} {case['lines']:>8} {case['tokens']:>9} "
+              + " ".join(f"{case['phases'][p]:>9.4f}" for p in PHASES))
+
+
+def compare(base, new, threshold, min_delta=MIN_DELTA):
+    """Imprime la comparación fase a fase; devuelve el nº de regresiones."""
+    regressions = 0
+    print(f"{'caso':>10} {'fase':>9} {'base (s)':>10} {'nuevo (s)':>10} {'cambio':>8}")
+    for name, case in new["cases"].items():
+        old = base["cases"].get(name)
+        if old is None:
+            continue
+        if old["params"] != case["params"]:
+            print(f"{name:>10}: parámetros distintos, no se compara")
+            continue
+        for phase in PHASES:
+            before, after = old["phases"][phase], case["phases"][phase]
+            change = (after - before) / before if before else 0.0
+            regressed = change > threshold and after - before > min_delta
+            regressions += regressed
+            mark = "  REGRESIÓN" if regressed else ""
+            print(f"{name:>10} {phase:>9} {before:>10.4f} {after:>10.4f} {change:>+7.1%}{mark}")
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("format") != RESULTS_FORMAT:
+        raise SystemExit(f"{path}: formato de resultados no soportado")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="medir y opcionalmente guardar/comparar")
+    run.add_argument("--cases", nargs="+", choices=CASES, default=DEFAULT_CASES)
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("-o", "--output", metavar="JSON", help="guardar los resultados")
+    run.add_argument("--baseline", metavar="JSON", help="comparar con una línea base")
+    run.add_argument("--threshold", type=float, default=0.15,
+                     help="empeoramiento relativo que cuenta como regresión")
+    run.add_argument("--min-delta", type=float, default=MIN_DELTA, metavar="SEGUNDOS",
+                     help="empeoramiento absoluto mínimo para contar (por defecto, 1 ms)")
+
+    cmp = commands.add_parser("compare", help="comparar dos ficheros de resultados")
+    cmp.add_argument("base")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=0.15)
+    cmp.add_argument("--min-delta", type=float, default=MIN_DELTA, metavar="SEGUNDOS")
+
+    corpus = commands.add_parser("corpus", help="escribir los programas de cada caso")
+    corpus.add_argument("dir")
+    corpus.add_argument("--cases", nargs="+", choices=CASES, default=tuple(CASES))
+    args = parser.parse_args()
+
+    if args.command == "corpus":
+        os.makedirs(args.dir, exist_ok=True)
+        for name in args.cases:
+            path = os.path.join(args.dir, f"{name}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generate_program(**CASES[name]))
+            print(path)
+        return
+
+    if args.command == "compare":
+        base, new = load_results(args.base), load_results(args.new)
+    else:
+        new = run_cases(args.cases, args.repeat)
+        print_results(new)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(new, f, indent=2, ensure_ascii=False)
+        if not args.baseline:
+            return
+        base = load_results(args.baseline)
+        print()
+    if compare(base, new, args.threshold, args.min_delta):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark de la Tabla de Símbolos: escalado del análisis con el nº de identificadores.
+
+Genera programas MyJS con N identificadores distintos (declaraciones globales y
+funciones con variables locales) y mide el tiempo de léxico+sintáctico+semántico.
+Con el índice `SymbolTable.index` el coste por identificador debe mantenerse constante
+(escalado lineal); con `--legacy` se usa la búsqueda lineal original para comparar.
+
+Con `--nesting` mide en cambio la resolución por nombre con scopes anidados a
+la profundidad dada (MyJS solo anida dos, así que se usa `SymbolTable`
+directamente): con las cadenas de ligaduras (`SymbolTable.bindings`) el coste
+por búsqueda no depende de la profundidad; con `--legacy`, que recorre los
+scopes de dentro a fuera, crece con ella.
+
+Uso:
+    python benchmarks/bench_symbol_table.py [--sizes 1000 2000 4000] [--legacy]
+    python benchmarks/bench_symbol_table.py --nesting 1 8 64 256 [--width 100] [--legacy]
+"""
+import argparse
+import time
+
+from common import lex, load_grammar
+
+
+def generate_program(n_ids):
+    """Programa válido con `n_ids` identificadores: 3/4 globales y 1/4 locales."""
+    lines = []
+    n_globals = n_ids * 3 // 4
+    for i in range(n_globals):
+        lines.append(f"let int g{i} = {i % 300};")
+    n_funcs = max(1, (n_ids - n_globals) // 50)
+    for f in range(n_funcs):
+        lines.append(f"function int f{f}(int a, int b) {{")
+        for j in range(50):
+            lines.append(f"    let int l{j} = a + g{(f * 50 + j) % n_globals};")
+        lines.append("    return a + b;")
+        lines.append("}")
+    for i in range(n_globals):
+        lines.append(f"g{i} = g{i} + g{(i * 7) % n_globals};")
+    return "\n".join(lines) + "\n"
+
+
+def legacy_get_symbol(self, value):
+    """Búsqueda lineal original (recorre todos los scopes y registros)."""
+    for scope in reversed(self.scopes):
+        for tok in scope.values():
+            if tok['position'] == value:
+                return tok
+    return None
+
+
+ORIGINAL_ADD_SYMBOL = lex.SymbolTable.add_symbol
+
+
+def legacy_add_symbol(self, name, type=None, value=None):
+    """Resolución original: un dict por scope, del más interno al global."""
+    for scope in reversed(self.scopes):
+        if name in scope:
+            return scope[name]['position']
+    return ORIGINAL_ADD_SYMBOL(self, name, type, value)
+
+
+def legacy_get_symbol_by_name(self, name):
+    for scope in reversed(self.scopes):
+        if name in scope:
+            return scope[name]
+    return None
+
+
+def scope_workload(depth, width, lookups):
+    """`depth` scopes de `width` nombres (la mitad tapan a los de fuera), búsquedas
+    de nombres del scope más externo y salida de todos los scopes."""
+    table = lex.SymbolTable()
+    for d in range(depth):
+        table.enter_scope()
+        for w in range(width):
+            table.add_symbol_to_current_scope(f"v{w}" if w % 2 else f"d{d}_{w}")
+    names = [f"d0_{w}" for w in range(0, width, 2)] + [f"v{w}" for w in range(1, width, 2)]
+    start = time.perf_counter()
+    for i in range(lookups):
+        table.add_symbol(names[i % len(names)])
+        table.get_symbol_by_name(names[(i * 7) % len(names)])
+    elapsed = time.perf_counter() - start
+    for _ in range(depth):
+        table.exit_scope()
+    return elapsed
+
+
+def run_once(analyzer, code):
+    start = time.perf_counter()
+    result = analyzer.analyze(code)
+    elapsed = time.perf_counter() - start
+    if not result.success:
+        raise RuntimeError("El programa generado no es válido")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy", action="store_true",
+                        help="usar la búsqueda lineal original de get_symbol y la "
+                             "resolución por nombre scope a scope")
+    parser.add_argument("--nesting", type=int, nargs="+",
+                        help="profundidades de anidamiento de scopes a medir")
+    parser.add_argument("--width", type=int, default=100, help="nombres por scope (--nesting)")
+    parser.add_argument("--lookups", type=int, default=200000, help="búsquedas (--nesting)")
+    args = parser.parse_args()
+
+    if args.legacy:
+        lex.SymbolTable.get_symbol = legacy_get_symbol
+        lex.SymbolTable.add_symbol = legacy_add_symbol
+        lex.SymbolTable.get_symbol_by_name = legacy_get_symbol_by_name
+
+    if args.nesting:
+        print(f"{'scopes':>8} {'tiempo (s)':>12} {'us/búsqueda':>12}")
+        for depth in args.nesting:
+            best = min(scope_workload(depth, args.width, args.lookups) for _ in range(args.repeat))
+            print(f"{depth:>8} {best:>12.4f} {best / (2 * args.lookups) * 1e6:>12.3f}")
+        return
+
+    analyzer = lex.Analyzer(load_grammar(), keep_tokens=False)
+
+    print(f"{'ids':>8} {'tiempo (s)':>12} {'us/id':>10}")
+    for n in args.sizes:
+        code = generate_program(n)
+        best = min(run_once(analyzer, code) for _ in range(args.repeat))
+        print(f"{n:>8} {best:>12.4f} {best / n * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
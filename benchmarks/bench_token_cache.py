@@ -0,0 +1,63 @@
+"""Benchmark de la caché de tokens en disco (`caches.TokenCache`).
+
+Para cada tamaño tokeniza un programa sintético con el lexer y lo compara con
+la caché: un fallo (tokenizar y guardar la entrada) y un acierto (leerla, sin
+llamar a `lexer.token()`). Muestra también el tamaño de la entrada en disco.
+
+Uso:
+    python benchmarks/bench_token_cache.py [--sizes 3000 30000] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import generate_program, lex, lex_only, load_grammar
+
+import caches  # noqa: E402
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3000, 30000],
+                        help="sentencias por programa")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = lex.Analyzer(load_grammar())
+    print(f"{'sentencias':>10} {'tokens':>9} {'lexer (s)':>10} {'fallo (s)':>10} "
+          f"{'acierto (s)':>12} {'aceleración':>12} {'bytes/token':>12}")
+    for size in args.sizes:
+        code = generate_program(size, functions=100, identifiers=500, seed=size)
+        with tempfile.TemporaryDirectory() as directory:
+            analyzer.token_cache = cache = caches.TokenCache(directory)
+            path = os.path.join(directory, f"{cache.key(code)}.tok")
+            t_lex = best_time(lambda: lex_only(analyzer, code), args.repeat)
+
+            def miss():
+                if os.path.exists(path):
+                    os.remove(path)
+                analyzer.prelex(code)
+            t_miss = best_time(miss, args.repeat)
+            t_hit = best_time(lambda: analyzer.prelex(code), args.repeat)
+            if list(analyzer.prelex(code).buffer) != list(lex.lex_parallel(code, 1).buffer):
+                raise SystemExit("La caché no reproduce los tokens")
+            n = len(analyzer.prelex(code).buffer)
+            size_bytes = os.path.getsize(path)
+        print(f"{size:>10} {n:>9} {t_lex:>10.3f} {t_miss:>10.3f} {t_hit:>12.3f} "
+              f"{t_lex / t_hit:>11.1f}x {size_bytes / n:>12.2f}")
+    analyzer.token_cache = None
+
+
+if __name__ == "__main__":
+    main()
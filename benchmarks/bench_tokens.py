@@ -0,0 +1,84 @@
+"""Benchmark del almacenamiento de tokens: lista de tuplas frente a `TokenBuffer`.
+
+Tokeniza un programa sintético una vez y guarda sus tokens de las dos formas
+(`Analyzer.tokens` antes era una lista de tuplas; ahora es un `TokenBuffer`
+por columnas), mostrando los bytes asignados (tracemalloc), los bytes por
+token y el tiempo de llenado y de recorrido (lo que hace `lexed.txt`).
+
+Uso:
+    python benchmarks/bench_tokens.py [--statements 60000] [--repeat 3]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from common import generate_program, lex, load_grammar
+
+
+def collect(analyzer, code):
+    """Tokens de `code` como los guarda el parser (incluido el EOF)."""
+    analyzer.reset()
+    analyzer.lexer.lineno = 1
+    analyzer.lexer.input(code)
+    out = []
+    while True:
+        tok = analyzer.get_next_token()
+        out.append((tok.type, tok.value, tok.lineno, getattr(tok, 'lexpos', len(code))))
+        if tok is lex.EOF_TOKEN:
+            return out
+
+
+def fill_list(tokens):
+    store = []
+    for tok_type, value, lineno, lexpos in tokens:
+        store.append((tok_type, value, lineno, lexpos))
+    return store
+
+
+def fill_buffer(tokens):
+    store = lex.TokenBuffer()
+    add = store.add
+    for tok_type, value, lineno, lexpos in tokens:
+        add(tok_type, value, lineno, lexpos)
+    return store
+
+
+def measure(fill, tokens, repeat):
+    gc.collect()
+    tracemalloc.start()
+    store = fill(tokens)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    t_fill = t_iter = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        store = fill(tokens)
+        t_fill = min(t_fill, time.perf_counter() - start)
+        start = time.perf_counter()
+        for tok_type, value, _, _ in store:
+            lex.format_token(tok_type, value)
+        t_iter = min(t_iter, time.perf_counter() - start)
+    return allocated, t_fill, t_iter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--statements", type=int, default=60000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = lex.Analyzer(load_grammar())
+    tokens = collect(analyzer, generate_program(args.statements, functions=100, identifiers=500))
+    if list(fill_buffer(tokens)) != fill_list(tokens):
+        raise SystemExit("TokenBuffer no reproduce los tokens")
+    print(f"{len(tokens)} tokens")
+    print(f"{'almacén':>12} {'MiB':>8} {'bytes/token':>12} {'llenado (s)':>12} {'recorrido (s)':>14}")
+    for name, fill in (("tuplas", fill_list), ("TokenBuffer", fill_buffer)):
+        allocated, t_fill, t_iter = measure(fill, tokens, args.repeat)
+        print(f"{name:>12} {allocated / 2**20:>8.1f} {allocated / len(tokens):>12.1f} "
+              f"{t_fill:>12.3f} {t_iter:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Utilidades compartidas por los benchmarks (gramática compilada y programas)."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lex  # noqa: E402
+
+
+def load_grammar():
+    """Gramática compilada (sin caché, para medir siempre lo mismo)."""
+    return lex.load_compiled_grammar(lex.get_resource_path('Gramatica.txt'), use_cache=False)
+
+
+def generate_mixed_program(n_statements, seed=0):
+    """Programa MyJS válido con funciones, llamadas, if/else y expresiones."""
+    rnd = random.Random(seed)
+    lines = []
+    n_funcs = max(1, n_statements // 40)
+    for f in range(n_funcs):
+        lines.append(f"function int f{f}(int a, float b, boolean c) {{")
+        lines.append("    let int r = a + 1;")
+        lines.append("    if (c && a < 10) {")
+        lines.append("        r += a + (a + 2);")
+        lines.append("    } else {")
+        lines.append("        write 'rama else';")
+        lines.append("    }")
+        lines.append("    return r;")
+        lines.append("}")
+    for i in range(n_statements):
+        kind = rnd.randrange(5)
+        if kind == 0:
+            lines.append(f"let int x{i} = {rnd.randrange(300)} + ({rnd.randrange(300)} + {rnd.randrange(300)});")
+        elif kind == 1:
+            f = rnd.randrange(n_funcs)
+            lines.append(f"let int y{i} = f{f}({rnd.randrange(100)}, 2.5, true && {rnd.randrange(9)} < 3);")
+        elif kind == 2:
+            lines.append(f"if ({rnd.randrange(9)} < {rnd.randrange(9)}) write 'linea {i}';")
+        elif kind == 3:
+            lines.append(f"let float z{i} = {rnd.randrange(90)}.5;")
+        else:
+            lines.append(f"write {rnd.randrange(300)} + {rnd.randrange(300)};")
+    return "\n".join(lines) + "\n"
+
+
+class ProgramGenerator:
+    """Genera programas MyJS válidos (sin errores) de tamaño y forma controlables.
+
+    Args:
+        statements: Sentencias del programa (contando las anidadas en `if`).
+        functions: Funciones `int` declaradas al principio.
+        identifiers: Variables globales `int` que usan las expresiones.
+        depth: Profundidad de las expresiones (nº de operadores anidados).
+        nesting: Anidamiento máximo de `if`/`else`.
+        arity: Parámetros de cada función (y argumentos de cada llamada).
+        seed: Semilla: el mismo conjunto de parámetros da siempre el mismo programa.
+    """
+
+    def __init__(self, statements=1000, functions=10, identifiers=50, depth=3,
+                 nesting=2, arity=3, seed=0):
+        self.statements = statements
+        self.functions = functions
+        self.identifiers = max(1, identifiers)
+        self.depth = depth
+        self.nesting = nesting
+        self.arity = arity
+        self.rnd = random.Random(seed)
+        self.lines = []
+        self.locals = 0
+        self.callable = 0   # Funciones ya declaradas (solo se llama a esas)
+
+    def leaf(self, names):
+        if self.rnd.random() < 0.3:
+            return str(self.rnd.randrange(1000))
+        return self.rnd.choice(names)
+
+    def int_expr(self, depth, names):
+        if depth <= 0:
+            return self.leaf(names)
+        kind = self.rnd.randrange(3)
+        if kind == 0 and self.callable:
+            args = [self.int_expr(depth - 1, names)] + [self.leaf(names) for _ in range(self.arity - 1)]
+            return f"f{self.rnd.randrange(self.callable)}({', '.join(args[:self.arity])})"
+        if kind == 1:
+            return f"({self.int_expr(depth - 1, names)}) + {self.leaf(names)}"
+        return f"{self.leaf(names)} + {self.int_expr(depth - 1, names)}"
+
+    def bool_expr(self, depth, names):
+        expr = f"{self.int_expr(depth // 2, names)} < {self.leaf(names)}"
+        if self.rnd.random() < 0.5:
+            expr += f" && {self.leaf(names)} < {self.leaf(names)}"
+        return expr
+
+    def block(self, budget, names, indent, level):
+        """Genera `budget` sentencias; devuelve los nombres visibles al terminar."""
+        pad = "    " * indent
+        while budget > 0:
+            kind = self.rnd.randrange(6)
+            if kind == 0 and level < self.nesting and budget > 2:
+                inner = self.rnd.randrange(1, min(budget, 8))
+                self.lines.append(f"{pad}if ({self.bool_expr(self.depth, names)}) {{")
+                self.block(inner // 2 + 1, names, indent + 1, level + 1)
+                if self.rnd.random() < 0.6:
+                    self.lines.append(f"{pad}}} else {{")
+                    self.block(inner - inner // 2, names, indent + 1, level + 1)
+                self.lines.append(f"{pad}}}")
+                budget -= inner + 1
+                continue
+            if kind == 1 and level == 0:
+                # Solo se declara en el bloque de la función o del programa: las
+                # declaraciones dentro de un if no son visibles fuera.
+                name = f"v{self.locals}"
+                self.locals += 1
+                self.lines.append(f"{pad}let int {name} = {self.int_expr(self.depth, names)};")
+                names = names + [name]
+            elif kind == 2:
+                self.lines.append(f"{pad}{self.rnd.choice(names)} += {self.int_expr(self.depth, names)};")
+            elif kind == 3:
+                self.lines.append(f"{pad}write {self.int_expr(self.depth, names)};")
+            else:
+                self.lines.append(f"{pad}{self.rnd.choice(names)} = {self.int_expr(self.depth, names)};")
+            budget -= 1
+        return names
+
+    def generate(self):
+        """Texto del programa."""
+        globals_ = [f"g{i}" for i in range(self.identifiers)]
+        for name in globals_:
+            self.lines.append(f"let int {name} = {self.rnd.randrange(1000)};")
+        per_function = self.statements // (2 * self.functions) if self.functions else 0
+        for f in range(self.functions):
+            params = [f"p{i}" for i in range(self.arity)]
+            signature = ", ".join(f"int {p}" for p in params) or "void"
+            self.lines.append(f"function int f{f}({signature}) {{")
+            names = self.block(per_function, globals_ + params, 1, 0)
+            self.lines.append(f"    return {self.int_expr(self.depth, names)};")
+            self.lines.append("}")
+            self.callable += 1
+        self.block(self.statements - per_function * self.functions, globals_, 0, 0)
+        return "\n".join(self.lines) + "\n"
+
+
+def generate_program(statements=1000, seed=0, **shape):
+    """Programa MyJS válido generado con `ProgramGenerator` (ver sus parámetros)."""
+    return ProgramGenerator(statements, seed=seed, **shape).generate()
+
+
+def lex_only(analyzer, code):
+    """Tokeniza `code` con el lexer de la sesión (sin parser); devuelve el nº de tokens."""
+    analyzer.reset()
+    analyzer.lexer.lineno = 1
+    analyzer.lexer.input(code)
+    n = 0
+    while analyzer.lexer.token() is not None:
+        n += 1
+    return n
@@ -0,0 +1,299 @@
+"""Cachés persistentes del análisis: almacén en disco (`DiskCache`) y tokens (`TokenCache`).
+
+Los mismos fuentes se analizan una y otra vez (varios trabajos de CI, repeticiones
+tras cambios en otros ficheros): se guardan en disco los tokens de cada fuente
+(`TokenCache`) y el resultado completo del análisis (`artifacts.ResultCache`),
+direccionados por contenido. Las dos cachés comparten el almacén `DiskCache`.
+La caché de la gramática compilada es aparte (`lex.load_compiled_grammar`).
+
+Uso:
+    analyzer = lex.Analyzer(token_cache=caches.TokenCache())
+    python lex.py --cache-info
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from array import array
+
+from lex import ANALYZER_VERSION, PrelexedLexer, TokenBuffer, get_cache_dir, reserved
+from scanner import master_regex
+
+
+class DiskCache:
+    """Almacén en disco de entradas por clave, acotado y con desalojo LRU.
+
+    Cada entrada es un fichero `<clave><suffix>` en `directory`. El uso reciente
+    es la fecha de modificación: cada acierto la actualiza y, al guardar, si el
+    almacén pasa de `max_bytes` se borran las entradas más antiguas. Las
+    subclases convierten los valores con `_dump` (a bytes) y `_load` (del fichero).
+
+    Varios procesos pueden compartir el directorio sin cerrojos: las entradas se
+    escriben en un temporal y se publican con `os.replace` (un lector ve la
+    entrada completa o ninguna), una entrada ilegible o que otro proceso acaba
+    de desalojar cuenta como fallo y borrar una entrada que ya no existe no es
+    un error. `hits` y `misses` cuentan los aciertos y fallos de la instancia;
+    `save_stats` los acumula en el fichero `stats` del directorio (ver `info`).
+    """
+    suffix = '.bin'
+    # Con más bytes, `save_stats` compacta el fichero `stats` en una sola línea.
+    STATS_COMPACT_BYTES = 1 << 16
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._saved = (0, 0)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _dump(self, key, value):
+        raise NotImplementedError
+
+    def _load(self, key, path):
+        raise NotImplementedError
+
+    def get(self, key):
+        """Valor guardado con `key`, o None si no está o no se puede leer."""
+        path = self._path(key)
+        try:
+            value = self._load(key, path)
+        except Exception:
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Guarda `value` con `key` y desaloja entradas si hace falta."""
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(self._dump(key, value))
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            # Sin permisos de escritura o disco lleno: la caché es opcional.
+            return
+        self.evict()
+
+    def _entries(self):
+        """(mtime, tamaño, ruta) de cada entrada del almacén."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.suffix):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def evict(self):
+        """Borra las entradas usadas hace más tiempo hasta quedar en `max_bytes`."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # ya desalojada por otro proceso (o en uso, en Windows)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """Invalida el almacén: borra todas las entradas y las estadísticas.
+
+        Devuelve el nº de entradas borradas.
+        """
+        removed = 0
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        try:
+            os.remove(os.path.join(self.directory, 'stats'))
+        except OSError:
+            pass
+        return removed
+
+    def save_stats(self):
+        """Añade al fichero `stats` los aciertos y fallos desde el último guardado.
+
+        Cada guardado es una línea escrita de una vez en modo append, así que
+        varios procesos pueden guardar a la vez. Al compactar el fichero (cuando
+        pasa de `STATS_COMPACT_BYTES`) se pueden perder las líneas que otro
+        proceso añada en ese instante: las estadísticas son orientativas.
+        """
+        hits, misses = self.hits - self._saved[0], self.misses - self._saved[1]
+        if not hits and not misses:
+            return
+        self._saved = (self.hits, self.misses)
+        path = os.path.join(self.directory, 'stats')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(f"{hits} {misses}\n")
+            if os.path.getsize(path) > self.STATS_COMPACT_BYTES:
+                hits, misses = self._read_stats()
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(f"{hits} {misses}\n")
+                os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _read_stats(self):
+        hits = misses = 0
+        try:
+            with open(os.path.join(self.directory, 'stats'), encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and all(p.isdigit() for p in parts):
+                        hits += int(parts[0])
+                        misses += int(parts[1])
+        except OSError:
+            pass
+        return hits, misses
+
+    def info(self):
+        """Estado del almacén: entradas, bytes, límite y aciertos/fallos acumulados."""
+        entries = self._entries()
+        hits, misses = self._read_stats()
+        return {
+            'directory': self.directory,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+        }
+
+
+# Caché de tokens: la clave es el hash del fuente, del motor léxico y de la
+# versión del lexer (`lexer_fingerprint`).
+TOKEN_CACHE_FORMAT = 2
+TOKEN_CACHE_MAGIC = b'MYJSTOK\0'
+# Tamaño máximo de la caché de tokens en disco (bytes) antes de desalojar entradas.
+TOKEN_CACHE_MAX_BYTES = 256 << 20
+
+
+def lexer_fingerprint(engine='regex'):
+    """Versión del lexer: la expresión maestra, las palabras reservadas y el motor.
+
+    Un cambio en las reglas `t_*` que no altere su regex (rangos, errores) tiene
+    que ir acompañado de un cambio de ANALYZER_VERSION, como en la gramática.
+    """
+    h = hashlib.sha256()
+    for part in (ANALYZER_VERSION, str(TOKEN_CACHE_FORMAT), engine,
+                 master_regex().pattern, repr(sorted(reserved.items()))):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.digest()
+
+
+class TokenCache(DiskCache):
+    """Caché en disco de los tokens de cada fuente (`DiskCache` de ficheros `.tok`).
+
+    Cada entrada guarda los tokens por columnas (como en `TokenBuffer`) y los
+    errores léxicos de `lex_parallel`, comprimidos; con un acierto el análisis
+    no llama a `lexer.token()` (ver `Analyzer.prelex`). El formato es solo de
+    datos (JSON y arrays de enteros, nunca pickle): el directorio se comparte
+    entre procesos y ejecuciones, y una entrada manipulada solo puede dar un
+    fallo de la caché, no ejecutar código.
+
+    Formato (tras la cabecera `TOKEN_CACHE_MAGIC` + clave): zlib de una línea
+    JSON {"n", "table", "errors", "end"} seguida de los arrays de tipos, líneas,
+    offsets y, por token, el índice de su valor en `table` (cada valor distinto
+    se guarda una sola vez).
+    """
+    suffix = '.tok'
+
+    def __init__(self, directory=None, max_bytes=TOKEN_CACHE_MAX_BYTES):
+        super().__init__(directory or os.path.join(get_cache_dir(), 'tokens'), max_bytes)
+        self._fingerprints = {}
+
+    def key(self, source, engine='regex'):
+        """Clave de `source` tokenizado con el motor léxico `engine`."""
+        fingerprint = self._fingerprints.get(engine)
+        if fingerprint is None:
+            fingerprint = self._fingerprints[engine] = lexer_fingerprint(engine)
+        h = hashlib.sha256(fingerprint)
+        h.update(source.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def _dump(self, key, lexer):
+        buffer = lexer.buffer
+        # Cada valor distinto una sola vez (por tipo: 1 y 1.0 son valores distintos).
+        table = []
+        positions = {}
+        index = array('I')
+        for v in buffer.values:
+            i = positions.get((v.__class__, v))
+            if i is None:
+                i = positions[v.__class__, v] = len(table)
+                table.append(v)
+            index.append(i)
+        header = json.dumps({'n': len(index), 'table': table, 'errors': lexer.errors,
+                             'end': [lexer.end_lineno, lexer.end_lexpos]},
+                            ensure_ascii=False, separators=(',', ':'))
+        payload = b''.join((header.encode('utf-8'), b'\n', buffer.types.tobytes(),
+                            buffer.lines.tobytes(), buffer.offsets.tobytes(), index.tobytes()))
+        return TOKEN_CACHE_MAGIC + bytes.fromhex(key) + zlib.compress(payload, 1)
+
+    def _load(self, key, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        header = len(TOKEN_CACHE_MAGIC)
+        if data[:header] != TOKEN_CACHE_MAGIC or data[header:header + 32] != bytes.fromhex(key):
+            return None
+        payload = zlib.decompress(data[header + 32:])
+        end = payload.index(b'\n')
+        meta = json.loads(payload[:end])
+        n, table = meta['n'], meta['table']
+        if n.__class__ is not int or any(v.__class__ not in (str, int, float) for v in table):
+            return None
+        errors = [(i, line, msg) for i, line, msg in meta['errors']]
+        if any(i.__class__ is not int or line.__class__ is not int or msg.__class__ is not str
+               for i, line, msg in errors):
+            return None
+        end_lineno, end_lexpos = meta['end']
+        if end_lineno.__class__ is not int or end_lexpos.__class__ is not int:
+            return None
+
+        buffer = TokenBuffer()
+        index = array('I')
+        pos = end + 1
+        for column in (buffer.types, buffer.lines, buffer.offsets, index):
+            size = n * column.itemsize
+            column.frombytes(payload[pos:pos + size])
+            pos += size
+        if pos != len(payload) or len(index) != n or (n and max(index) >= len(table)):
+            return None
+        buffer.values.extend([table[i] for i in index])
+        return PrelexedLexer(buffer, errors, end_lineno, end_lexpos)
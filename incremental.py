@@ -0,0 +1,636 @@
+"""Reanálisis incremental de MyJS por unidades de nivel superior.
+
+Un programa es una secuencia de unidades `LC` (sentencia) y `LF` (función):
+`S -> LC S | LF S | eof`. Entre dos unidades la pila del parser es siempre
+`[eof, S]` y solo queda vivo el scope global, así que el estado que una unidad
+recibe de las anteriores es pequeño y se puede comparar: el texto que lee, el
+token de lookahead, los símbolos globales que consulta (p. ej. la firma que
+registró `action_fun_def` de una función a la que llama) y el tope de
+`sem_stack` que consume.
+
+`IncrementalAnalyzer` guarda de cada unidad del análisis anterior esas
+dependencias y sus efectos (tokens, producciones, errores, símbolos globales
+creados o modificados, tablas de función). En el siguiente `analyze()`, en cada
+frontera entre unidades, si la unidad que empieza ahí tiene el mismo texto y
+sus dependencias no han cambiado, se reaplican sus efectos sin volver a
+ejecutar el léxico, el sintáctico ni las acciones semánticas; si no, se
+analiza normalmente. Los efectos se guardan en forma relativa (posiciones en
+la TS respecto al contador al entrar, líneas respecto a la línea de entrada,
+offsets respecto al inicio de la unidad y desplazamientos tomados de `despG`
+respecto a `despG` al entrar), de modo que una unidad intacta se reaprovecha
+aunque una edición anterior desplace sus líneas, las posiciones de sus
+símbolos o la memoria de sus variables globales. El resultado es idéntico
+byte a byte al de un análisis completo.
+
+Uso:
+    session = IncrementalAnalyzer()
+    result = session.analyze(source)         # análisis completo
+    result = session.analyze(edited_source)  # solo las unidades afectadas
+    print(session.stats)                     # {'units': ..., 'reused': ...}
+
+    # Cuerpos de las funciones comprobados en 4 procesos (ver `ParallelAnalyzer`)
+    result = ParallelAnalyzer(jobs=4).analyze(source)
+"""
+import os
+import re
+from dataclasses import dataclass
+
+import lex
+
+# Campos de un registro de la TS que pueden leer las unidades (todos menos 'position').
+SYMBOL_FIELDS = ('type', 'value', 'displacement', 'lexeme')
+# Elementos de sem_stack bajo su altura de entrada que una unidad puede consumir
+# y seguir siendo reaprovechable (las unidades del EdT no consumen ninguno).
+STACK_DEPTH = 4
+
+
+class GlobalDisp(int):
+    """Valor de `despG` leído por una acción: marca los desplazamientos globales."""
+    __slots__ = ()
+
+
+class TrackingSymbolTable(lex.SymbolTable):
+    """Tabla de símbolos que anota qué símbolos globales consulta cada unidad.
+
+    `reads` (nombre -> copia del registro global al consultarlo por primera
+    vez, o None si no existía) se reinicia al empezar cada unidad. Toda
+    búsqueda que llega al scope global pasa por aquí: por nombre (`add_symbol*`,
+    `get_symbol_by_name`) o por posición (`get_symbol`). Las acciones solo
+    miran si un desplazamiento es None, así que los desplazamientos que asigna
+    la unidad se anotan aparte en `writes` (id del registro -> (registro,
+    tomado de `despG`)).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reads = None
+        self.writes = None
+
+    def _read_global(self, name):
+        reads = self.reads
+        if reads is not None and name not in reads:
+            sym = self.scopes[0].get(name)
+            reads[name] = None if sym is None else dict(sym)
+
+    def _resolves_global(self, name):
+        """True si una búsqueda de `name` por nombre llega al scope global."""
+        chain = self.bindings.get(name)
+        return chain is None or chain[-1] is self.scopes[0].get(name)
+
+    def add_symbol(self, name, type=None, value=None):
+        if self._resolves_global(name):
+            self._read_global(name)
+        return super().add_symbol(name, type, value)
+
+    def add_symbol_to_current_scope(self, name, type=None, value=None):
+        if len(self.scopes) == 1:
+            self._read_global(name)
+        return super().add_symbol_to_current_scope(name, type, value)
+
+    def get_symbol(self, value):
+        sym = self.index.get(value)
+        if sym is not None and self.reads is not None:
+            name = sym['lexeme']
+            if self.scopes[0].get(name) is sym:
+                self._read_global(name)
+        return sym
+
+    def set_symbol_displacement(self, pos, disp):
+        sym = self.get_symbol(pos)
+        if sym:
+            from_despG = disp.__class__ is GlobalDisp
+            sym['displacement'] = int(disp) if from_despG else disp
+            if self.writes is not None:
+                self.writes[id(sym)] = (sym, from_despG)
+
+    def get_symbol_by_name(self, name):
+        if self._resolves_global(name):
+            self._read_global(name)
+        return super().get_symbol_by_name(name)
+
+
+class TrackedStack(list):
+    """`sem_stack` que recuerda la altura mínima alcanzada (`low`) al desapilar."""
+
+    __slots__ = ('low',)
+
+    def pop(self, *args):
+        value = list.pop(self, *args)
+        if len(self) < self.low:
+            self.low = len(self)
+        return value
+
+
+@dataclass
+class Unit:
+    """Dependencias y efectos de una unidad de nivel superior, en forma relativa.
+
+    Las posiciones de la TS se codifican como un nombre (símbolo global del que
+    depende la unidad) o como un entero relativo al contador de la TS al entrar;
+    las líneas, relativas a la línea del lexer al entrar (None = línea 0, EOF);
+    los offsets, relativos al inicio de la unidad; los desplazamientos tomados
+    de `despG`, como ('despG', desplazamiento - despG al entrar).
+    """
+    length: int              # caracteres consumidos por el lexer
+    text_length: int         # caracteres de los que depende el léxico
+    line_span: int
+    # Entrada
+    prev_line: object        # línea relativa del token previo (None si no hay)
+    lookahead: tuple         # (tipo, valor codificado, línea rel., offset rel.)
+    lookahead_dead: bool     # el id del lookahead no está en la TS (peculiaridad del léxico)
+    deps: dict               # nombre -> copia del registro global (o None si no existía)
+    popped: tuple            # elementos de sem_stack bajo la altura de entrada que consume
+    flags: tuple             # (global_initialized, in_function) al entrar
+    counter: int             # contador de la TS al entrar (solo se usa con `position_text`)
+    position_text: bool      # algún mensaje contiene "ID_<pos>": solo se reutiliza sin desplazar
+    # Efectos
+    tokens: list
+    productions: list
+    lex_errors: list
+    sem_errors: list
+    created: list            # [(nombre, campos, posición codificada)] globales nuevos
+    modified: list           # [(nombre, {campo: valor})] globales modificados
+    function_tables: list    # [(nombre, [(nombre, campos, posición codificada)])]
+    counter_delta: int
+    despG_delta: int
+    pushed: tuple
+    exit_state: tuple        # (last_id_pos, current_func_id, despL, in_function,
+                             #  temp_type, global_initialized)
+
+
+def _common_affixes(old, new):
+    """Longitud del prefijo y del sufijo comunes (sin solaparse)."""
+    limit = min(len(old), len(new))
+    lo, hi = 0, limit
+    while lo < hi:  # búsqueda binaria: las comparaciones de cadenas van en C
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    lo, hi = 0, limit - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix, lo
+
+
+def _displacement(value, despG):
+    return despG + value[1] if value.__class__ is tuple else value
+
+
+def _symbol(fields, position, despG):
+    """Registro de la TS con el mismo orden de claves que `SymbolTable.add_symbol`."""
+    return {'type': fields['type'], 'value': fields['value'], 'position': position,
+            'displacement': _displacement(fields['displacement'], despG),
+            'lexeme': fields['lexeme']}
+
+
+class IncrementalAnalyzer(lex.Analyzer):
+    """Sesión `Analyzer` que reaprovecha las unidades no afectadas del análisis anterior.
+
+    Solo con el motor 'tabla' (las fronteras entre unidades se detectan en
+    `Analyzer.parse`). `stats` indica cuántas unidades se reaprovecharon en el
+    último `analyze()`.
+    """
+
+    def __init__(self, compiled=None, lexer='regex'):
+        super().__init__(compiled, parser='tabla', keep_tokens=True, lexer=lexer)
+        self.source = None
+        self.units = {}       # offset de inicio -> Unit del último análisis
+        self.stats = {'units': 0, 'reused': 0}
+
+    # Lo que las acciones leen de `despG` va marcado (ver `set_symbol_displacement`).
+    @property
+    def despG(self):
+        return GlobalDisp(self._despG)
+
+    @despG.setter
+    def despG(self, value):
+        self._despG = value
+
+    def reset(self):
+        super().reset()
+        self.symtab = TrackingSymbolTable()
+        self._position_text = False
+        self._entry = None
+
+    def get_symbol_name(self, pos):
+        if self.symtab.get_symbol(pos) is None:
+            self._position_text = True
+        return super().get_symbol_name(pos)
+
+    def analyze(self, source):
+        old_source, old_units = self.source, self.units
+        if old_source is None:
+            old_source, old_units = '', {}
+        self._old = (old_source, old_units, len(source) - len(old_source),
+                     *_common_affixes(old_source, source))
+        self._new_source = source
+        self.units = {}
+        self.stats = {'units': 0, 'reused': 0}
+        try:
+            result = super().analyze(source)
+        finally:
+            # La última unidad (S -> eof o la del error sintáctico) no se guarda.
+            self._entry = None
+            self.symtab.reads = self.symtab.writes = None
+            self._old = None
+        self.source = source
+        return result
+
+    # --- Fronteras entre unidades ---
+
+    def on_unit_boundary(self):
+        """Llamado por `parse()` al expandir S con la pila `[eof, S]`."""
+        if self._entry is not None:
+            self._record_unit()
+        while True:
+            match = self._match_unit()
+            if match is None:
+                break
+            self._replay_unit(*match)
+        self._open_unit()
+
+    def _open_unit(self):
+        symtab = self.symtab
+        tok = self.current_token
+        if not isinstance(self.sem_stack, TrackedStack):
+            self.sem_stack = TrackedStack(self.sem_stack)
+        self.sem_stack.low = len(self.sem_stack)
+        self._position_text = False
+        symtab.reads = {}
+        symtab.writes = {}
+        lookahead_dead = False
+        if tok.type == 'ID':
+            sym = symtab.index.get(tok.value)
+            if sym is None:
+                lookahead_dead = True
+            else:
+                symtab._read_global(sym['lexeme'])
+        self._entry = (self.lexer.lexpos, self.lexer.lineno, symtab.counter, self._despG,
+                       len(self.tokens), len(self.production_sequence), len(self.lex_errors),
+                       len(self.sem_errors), len(self.function_tables), len(self.sem_stack), lookahead_dead,
+                       (self.global_initialized, self.in_function),
+                       self.prev_token.lineno if self.prev_token is not None else None)
+        # Tope de sem_stack al entrar: lo que la unidad desapile por debajo de
+        # su altura de entrada es una dependencia más.
+        self._stack_top = tuple(self.sem_stack[-STACK_DEPTH:])
+        # Una unidad solo se puede reaprovechar si entra sin ids pendientes.
+        self._clean_entry = not (self.id_stack or self.decl_id_stack or self.ls_id_stack)
+
+    def _record_unit(self):
+        (start, line, counter, despG, n_tokens, n_productions, n_lex, n_sem, n_tables, height, lookahead_dead, flags, prev_line) = self._entry
+        self._entry = None
+        symtab = self.symtab
+        reads, symtab.reads = symtab.reads, None
+        writes, symtab.writes = symtab.writes, None
+        stack = self.sem_stack
+        low, stack.low = stack.low, len(stack)
+        if not self._clean_entry or self.id_stack or self.decl_id_stack or self.ls_id_stack \
+                or len(symtab.scopes) != 1 or height - low > len(self._stack_top):
+            return
+
+        by_position = {snap['position']: name for name, snap in reads.items() if snap}
+
+        def encode(pos):
+            name = by_position.get(pos)
+            return name if name is not None else pos - counter
+
+        def rel_line(lineno):
+            return lineno - line if lineno > 0 else None
+
+        def encode_displacement(sym):
+            written = writes.get(id(sym))
+            if written is not None and written[1]:
+                return ('despG', sym['displacement'] - despG)
+            return sym['displacement']
+
+        def encode_symbol(name, sym):
+            fields = {f: sym[f] for f in SYMBOL_FIELDS}
+            fields['displacement'] = encode_displacement(sym)
+            return name, fields, encode(sym['position'])
+
+        source = self._new_source
+        tok = self.current_token
+        if tok.type == 'EOF':
+            # También depende de que el texto acabe ahí: el fin de texto cuenta
+            # como un carácter más (nunca está en el prefijo común ni se compara).
+            text_end = len(source) + 1
+        else:
+            # Ningún token abarca un salto de línea: el lexer no ha mirado más allá.
+            newline = source.find('\n', tok.lexpos)
+            text_end = len(source) if newline < 0 else newline + 1
+
+        first = self.tokens[n_tokens - 1]
+        global_scope = symtab.scopes[0]
+        modified = []
+        for name, snap in reads.items():
+            if snap is not None:
+                sym = global_scope[name]
+                changes = {f: sym[f] for f in ('type', 'value') if sym[f] != snap[f]}
+                if id(sym) in writes:
+                    changes['displacement'] = encode_displacement(sym)
+                if changes:
+                    modified.append((name, changes))
+        # Globales creados: consultados como inexistentes y presentes ahora (en
+        # orden de creación, que es el de inserción en el scope global).
+        created = sorted((name for name, snap in reads.items()
+                          if snap is None and name in global_scope),
+                         key=lambda name: global_scope[name]['position'])
+
+        self.units[start] = Unit(
+            length=self.lexer.lexpos - start,
+            text_length=text_end - start,
+            line_span=self.lexer.lineno - line,
+            prev_line=rel_line(prev_line) if prev_line is not None else None,
+            lookahead=(first[0], encode(first[1]) if first[0] == 'ID' else first[1],
+                       rel_line(first[2]), first[3] - start),
+            lookahead_dead=lookahead_dead,
+            deps=reads,
+            popped=self._stack_top[len(self._stack_top) - (height - low):] if low < height else (),
+            flags=flags,
+            counter=counter,
+            position_text=self._position_text,
+            tokens=[(t, encode(v) if t == 'ID' else v, rel_line(ln), pos - start)
+                    for t, v, ln, pos in self.tokens[n_tokens:]],
+            productions=self.production_sequence[n_productions:],
+            lex_errors=[(rel_line(ln), msg) for ln, msg in self.lex_errors[n_lex:]],
+            sem_errors=[(rel_line(ln), msg) for ln, msg in self.sem_errors[n_sem:]],
+            created=[encode_symbol(name, global_scope[name]) for name in created],
+            modified=modified,
+            function_tables=[(func_name, [encode_symbol(name, sym) for name, sym in scope.items()])
+                             for func_name, scope in self.function_tables[n_tables:]],
+            counter_delta=symtab.counter - counter,
+            despG_delta=self._despG - despG,
+            pushed=tuple(stack[low:]),
+            exit_state=(encode(self.last_id_pos) if isinstance(self.last_id_pos, int) else None,
+                        encode(self.current_func_id) if isinstance(self.current_func_id, int)
+                        else None,
+                        self.despL, self.in_function, self.temp_type, self.global_initialized),
+        )
+        self.stats['units'] += 1
+
+    def _match_unit(self):
+        """Unidad del análisis anterior reaprovechable en la frontera actual (o None)."""
+        old_units, delta = self._old[1:3]
+        tok = self.current_token
+        if not old_units or tok.type == 'EOF' or len(self.symtab.scopes) != 1 \
+                or self.id_stack or self.decl_id_stack or self.ls_id_stack:
+            return None
+        start = self.lexer.lexpos
+
+        # Misma unidad: mismo offset (antes de la edición) o desplazada `delta` (después).
+        unit = None
+        for old_start in {start, start - delta}:
+            candidate = old_units.get(old_start)
+            if candidate is not None and self._same_text(candidate, old_start, start):
+                unit = candidate
+                break
+        if unit is None or unit.flags != (self.global_initialized, self.in_function):
+            return None
+
+        line = self.lexer.lineno
+        symtab = self.symtab
+        counter = symtab.counter
+        prev = self.prev_token
+        if (prev.lineno - line if prev is not None else None) != unit.prev_line:
+            return None
+        tok_type, tok_value, tok_line, tok_pos = unit.lookahead
+        if tok.type != tok_type or tok.lineno - line != tok_line or tok.lexpos - start != tok_pos:
+            return None
+        if unit.popped:
+            stack = self.sem_stack
+            if tuple(stack[len(stack) - len(unit.popped):]) != unit.popped:
+                return None
+
+        # Símbolos globales de los que depende: mismos campos (la posición puede cambiar).
+        global_scope = symtab.scopes[0]
+        positions = {}
+        for name, snap in unit.deps.items():
+            sym = global_scope.get(name)
+            if snap is None:
+                if sym is not None:
+                    return None
+            elif sym is None or sym['type'] != snap['type'] or sym['value'] != snap['value'] \
+                    or (sym['displacement'] is None) != (snap['displacement'] is None):
+                return None
+            else:
+                positions[name] = sym['position']
+
+        if tok_type == 'ID':
+            if tok_value.__class__ is str:
+                if tok.value != positions[tok_value]:
+                    return None
+            elif tok.value - counter != tok_value or tok.value in symtab.index:
+                return None
+        elif tok.value != tok_value:
+            return None
+
+        if unit.position_text and (counter != unit.counter or any(
+                positions[name] != snap['position']
+                for name, snap in unit.deps.items() if snap is not None)):
+            return None
+        return unit, start, line, counter, positions
+
+    def _same_text(self, unit, old_start, start):
+        """True si el texto del que depende `unit` (en `old_start`) es el mismo en `start`."""
+        old_source, _, delta, prefix, suffix = self._old
+        source = self._new_source
+        end = start + unit.text_length
+        old_end = old_start + unit.text_length
+        return (old_start == start and end <= prefix) \
+            or (old_start + delta == start and old_start >= len(old_source) - suffix) \
+            or (end <= len(source) and source[start:end] == old_source[old_start:old_end])
+
+    def _replay_unit(self, unit, start, line, counter, positions):
+        """Aplica los efectos de `unit` como si se hubiera analizado en esta frontera."""
+        def decode(value):
+            return positions[value] if value.__class__ is str else value + counter
+
+        tokens = self.tokens
+        for tok_type, value, lineno, lexpos in unit.tokens:
+            tokens.append((tok_type, decode(value) if tok_type == 'ID' else value,
+                           lineno + line if lineno is not None else 0, lexpos + start))
+        self.production_sequence.extend(unit.productions)
+        self.lex_errors.extend((lineno + line if lineno is not None else 0, msg)
+                               for lineno, msg in unit.lex_errors)
+        self.sem_errors.extend((lineno + line if lineno is not None else 0, msg)
+                               for lineno, msg in unit.sem_errors)
+
+        symtab = self.symtab
+        global_scope = symtab.scopes[0]
+        despG = self._despG
+        for name, fields, position in unit.created:
+            # Solo se reaprovecha con el scope global como único scope vivo.
+            symtab.bind(name, _symbol(fields, decode(position), despG))
+        for name, changes in unit.modified:
+            sym = global_scope[name]
+            sym.update(changes)
+            if 'displacement' in changes:
+                sym['displacement'] = _displacement(changes['displacement'], despG)
+        for func_name, entries in unit.function_tables:
+            self.function_tables.append(
+                (func_name, {name: _symbol(fields, decode(position), despG)
+                             for name, fields, position in entries}))
+        symtab.counter = counter + unit.counter_delta
+        self._despG = despG + unit.despG_delta
+
+        stack = self.sem_stack
+        if unit.popped:
+            del stack[len(stack) - len(unit.popped):]
+        stack.extend(unit.pushed)
+        last_id_pos, current_func_id, self.despL, self.in_function, self.temp_type, \
+            self.global_initialized = unit.exit_state
+        if last_id_pos is not None:
+            self.last_id_pos = decode(last_id_pos)
+        if current_func_id is not None:
+            self.current_func_id = decode(current_func_id)
+
+        self.lexer.lexpos = start + unit.length
+        self.lexer.lineno = line + unit.line_span
+        self.prev_token = lex.Token(*tokens[-2])
+        self.current_token = lex.Token(*tokens[-1])
+        self.units[start] = unit
+        self.stats['units'] += 1
+        self.stats['reused'] += 1
+
+
+# Comprobación de funciones en paralelo (`ParallelAnalyzer`).
+
+# Gramática de los procesos del pool: la del proceso principal, heredada con `fork`.
+_compiled = None
+_NOT_NEWLINE = re.compile('[^\n]')
+
+
+def function_bodies(tokens):
+    """(offset de `function`, de su `{` y de su `}`) de cada función de nivel superior.
+
+    `tokens` es un `lex.TokenBuffer`. Solo se recorren las llaves y las palabras
+    `function` (con una expresión regular sobre los códigos de tipo).
+    """
+    codes = lex.TOKEN_TYPE_CODES
+    function, opbra, clbra = codes['FUNCTION'], codes['OPBRA'], codes['CLBRA']
+    offsets = tokens.offsets
+    spans = []
+    depth = 0
+    start = body = None
+    pattern = b'[' + re.escape(bytes((function, opbra, clbra))) + b']'
+    for m in re.finditer(pattern, tokens.types.tobytes()):
+        code, i = m.group()[0], m.start()
+        if code == function:
+            if depth == 0:
+                start, body = offsets[i], None
+        elif code == opbra:
+            if depth == 0 and start is not None and body is None:
+                body = offsets[i]
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0 and body is not None:
+                spans.append((start, body, offsets[i]))
+                start = body = None
+    return spans
+
+
+def blank(source, ranges):
+    """`source` con los caracteres de `ranges` cambiados por espacios.
+
+    Los saltos de línea se conservan, así que las líneas no cambian.
+    """
+    parts = []
+    pos = 0
+    for lo, hi in ranges:
+        parts.append(source[pos:lo])
+        parts.append(_NOT_NEWLINE.sub(' ', source[lo:hi]))
+        pos = hi
+    parts.append(source[pos:])
+    return ''.join(parts)
+
+
+def check_segment(source, lo, hi, blanked, lexer='regex'):
+    """Unidades de `source` que empiezan en [lo, hi), analizadas con `blanked` en blanco.
+
+    Se ejecuta en un proceso del pool. Solo devuelve las unidades cuyo texto no
+    toca ningún rango en blanco: su texto es el del fuente original.
+    """
+    session = IncrementalAnalyzer(_compiled or lex.default_compiled_grammar(), lexer=lexer)
+    session.analyze(blank(source, blanked))
+    return {start: unit for start, unit in session.units.items()
+            if lo <= start < hi and not any(a < start + unit.text_length and start < b
+                                            for a, b in blanked)}
+
+
+class ParallelAnalyzer(IncrementalAnalyzer):
+    """Análisis con los cuerpos de las funciones comprobados en `jobs` procesos.
+
+    Dos fases:
+
+    1. El fuente se reparte en `jobs` segmentos contiguos de funciones de nivel
+       superior (equilibrados por el tamaño de sus cuerpos). Cada proceso
+       analiza el fuente completo con los cuerpos de las funciones de los demás
+       segmentos en blanco: el código global y las firmas de todas las funciones
+       (lo que registra `action_fun_def`) son la pasada de declaraciones, y sus
+       propios cuerpos se comprueban con ese entorno global. Devuelve sus
+       unidades (`Unit`) con sus dependencias y efectos en forma relativa.
+    2. El proceso principal analiza el fuente como `IncrementalAnalyzer` con
+       esas unidades: en cada frontera, si las dependencias de la unidad
+       coinciden con el estado real (p. ej. no lee un global que otra función
+       declaró implícitamente en su cuerpo) se aplican sus efectos en orden;
+       si no, esa unidad se vuelve a analizar aquí.
+
+    Los diagnósticos quedan en el orden del fuente y las tablas de símbolos,
+    posiciones y desplazamientos son los del análisis secuencial. `stats`
+    indica además cuántas unidades se volvieron a analizar (`rechecked`).
+
+    No es más rápido que `lex.Analyzer`: cada proceso tokeniza y analiza el
+    fuente completo (los cuerpos en blanco se siguen recorriendo), y el proceso
+    principal lo vuelve a tokenizar y recorre todas las unidades, así que el
+    trabajo total es varias veces el del análisis secuencial y el reparto no
+    llega a compensarlo (ver benchmarks/bench_parallel_semantics.py). Para que
+    compensara, la pasada de declaraciones tendría que ser solo de firmas y
+    globales, y cada proceso recibir solo los cuerpos de sus funciones.
+    """
+
+    def __init__(self, compiled=None, lexer='regex', jobs=None):
+        super().__init__(compiled, lexer=lexer)
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def segments(self, source):
+        """[(inicio, fin)] de cada segmento y los cuerpos (`{`, `}`) de sus funciones."""
+        spans = function_bodies(lex.lex_parallel(source, self.jobs, self.lexer_engine).buffer)
+        parts = min(self.jobs, len(spans))
+        total = sum(close - body for _, body, close in spans)
+        cuts = [0]
+        done = 0
+        for start, body, close in spans:
+            if len(cuts) < parts and done >= total * len(cuts) / parts and start > cuts[-1]:
+                cuts.append(start)
+            done += close - body
+        cuts.append(len(source) + 1)
+        return list(zip(cuts, cuts[1:])), [(start, body + 1, close) for start, body, close in spans]
+
+    def analyze(self, source):
+        global _compiled
+        segments, bodies = self.segments(source)
+        units = {}
+        if len(segments) > 1:
+            tasks = [(source, lo, hi, [(a, b) for start, a, b in bodies if not lo <= start < hi],
+                      self.lexer_engine) for lo, hi in segments]
+            _compiled = self.compiled
+            import multiprocessing
+            with multiprocessing.Pool(len(tasks)) as pool:
+                for found in pool.starmap(check_segment, tasks):
+                    units.update(found)
+        # Las unidades vienen de un texto de la misma longitud y, en su rango, igual.
+        self.source, self.units = source, units
+        result = super().analyze(source)
+        self.stats['rechecked'] = self.stats['units'] - self.stats['reused']
+        return result
+
+    def _same_text(self, unit, old_start, start):
+        return old_start == start
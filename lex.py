@@ -1,8 +1,33 @@
 import ply.lex as lex
-import ply.yacc as yacc
 import argparse
+import codecs
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+from array import array
+from dataclasses import dataclass, field
+from typing import Optional
 import sys
 import os
+import tempfile
+
+from sinks import ARTIFACTS, default_sinks, make_sink, write_artifact
+
+# `python lex.py` ejecuta el CLI desde el módulo importable `lex` y no desde este
+# script (`__main__`): así incremental, artifacts o profiling, que hacen
+# `import lex`, comparten con él las mismas clases (Type, FunctionType,
+# Analyzer...) en vez de ver una segunda copia del módulo. Va antes de cualquier
+# definición para no ejecutar el módulo dos veces. `freeze_support` va antes de
+# todo: en el ejecutable de PyInstaller (myjs_analyzer.spec), los procesos de
+# --lex-jobs y --sem-jobs arrancan este mismo ejecutable (spawn en Windows) y sin
+# ella volverían a ejecutar el CLI en vez de su tarea.
+if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()
+    import lex as _lex_module
+    sys.exit(_lex_module.main())
 
 # Habilitar colores ANSI en Windows
 if os.name == 'nt':
@@ -17,6 +42,9 @@ def get_resource_path(filename):
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, filename)
 
+# Versión del analizador: forma parte de la clave de las cachés persistentes
+ANALYZER_VERSION = '1.2.0'
+
 # Códigos de color ANSI
 class Colors:
     RED = '\033[91m'
@@ -28,48 +56,8 @@ class Colors:
 
 ######    SECCIÓN DE ANALIZADOR LÉXICO    ######
 
-# Errores léxicos acumulados: se registran durante el scan y se reportan al final.
-lex_errors = []
-
-# Errores semánticos acumulados: se registran durante el análisis y se reportan al final.
-sem_errors = []
-
-def lex_error(lineno, msg):
-    """Registra un error léxico."""
-    lex_errors.append((lineno, msg))
-
-def has_lex_errors():
-    """Retorna True si hay errores léxicos."""
-    return len(lex_errors) > 0
-
-def print_lex_errors():
-    """Imprime todos los errores léxicos acumulados."""
-    for lineno, msg in lex_errors:
-        print(f"{Colors.RED}{Colors.BOLD}MyJS Lex Error:{Colors.RESET}{Colors.RED} En la línea {lineno} {msg}{Colors.RESET}")
-
-def clear_lex_errors():
-    """Limpia la lista de errores léxicos."""
-    global lex_errors
-    lex_errors = []
-
-# --- Funciones para errores semánticos ---
-def add_sem_error(lineno, msg):
-    """Registra un error semántico."""
-    sem_errors.append((lineno, msg))
-
-def has_sem_errors():
-    """Retorna True si hay errores semánticos."""
-    return len(sem_errors) > 0
-
-def print_sem_errors():
-    """Imprime todos los errores semánticos acumulados."""
-    for lineno, msg in sem_errors:
-        print(f"{Colors.RED}{Colors.BOLD}MyJS Semantic Error:{Colors.RESET}{Colors.RED} En la línea {lineno} {msg}{Colors.RESET}")
-
-def clear_sem_errors():
-    """Limpia la lista de errores semánticos."""
-    global sem_errors
-    sem_errors = []
+# Los errores léxicos se acumulan en la sesión (`Analyzer.lex_errors`) durante el
+# scan y se reportan al final. Las reglas acceden a la sesión vía `t.lexer.analyzer`.
 
 noattr = [
         "PLUSEQ",
@@ -135,12 +123,12 @@ def t_FLOATCONST(t):
     try:
         t.value = float(t.value)
     except ValueError:
-        lex_error(t.lineno, f"Valor de número real inválido: {t.value}")
+        t.lexer.analyzer.lex_error(t.lineno, f"Valor de número real inválido: {t.value}")
         t.lexer.skip(len(str(t.value)))
         return None
     
     if t.value > 117549436.0:
-        lex_error(t.lineno, f"Número real fuera de rango: {t.value}")
+        t.lexer.analyzer.lex_error(t.lineno, f"Número real fuera de rango: {t.value}")
         return None
     return t
 
@@ -149,12 +137,12 @@ def t_INTCONST(t):
     try:
         t.value = int(t.value)
     except ValueError:
-        lex_error(t.lineno, f"Valor de entero inválido: {t.value}")
+        t.lexer.analyzer.lex_error(t.lineno, f"Valor de entero inválido: {t.value}")
         t.lexer.skip(len(str(t.value)))
         return None
 
     if t.value > 32767:
-        lex_error(t.lineno, f"Entero fuera de rango (máx 32767): {t.value}")
+        t.lexer.analyzer.lex_error(t.lineno, f"Entero fuera de rango (máx 32767): {t.value}")
         return None
     return t
 
@@ -163,11 +151,11 @@ def t_STR(t):
     try:
         t.value = t.value[1:-1]  # Quitar comillas
     except ValueError:
-        lex_error(t.lineno, f"Cadena mal formada: {t.value}")
+        t.lexer.analyzer.lex_error(t.lineno, f"Cadena mal formada: {t.value}")
         return None
 
     if len(t.value) > 64:
-        lex_error(t.lineno, f"Cadena demasiado larga (máx 64 caracteres): '{t.value[:20]}...'")
+        t.lexer.analyzer.lex_error(t.lineno, f"Cadena demasiado larga (máx 64 caracteres): '{t.value[:20]}...'")
         return None
     return t
 
@@ -178,10 +166,9 @@ def t_ID(t):
         t.type = reserved[t.value]
         t.value = ''
     else:
+        # Token crudo con el lexema: la posición en la TS (id.pos) la asigna el
+        # parser al consumirlo (`Analyzer.get_next_token`), no el lexer.
         t.type = "ID"
-        name = t.value
-        # El parser trabaja con id.pos: guardamos el lexema en la TS y propagamos su posición.
-        t.value = add_symbol(name, t.type, name)
     return t
 
 def t_COMMENT(t):
@@ -194,114 +181,495 @@ def t_newline(t):
 
 def t_error(t):
     """Manejo de caracteres ilegales."""
-    lex_error(t.lineno, f"se ha encontrado un carácter ilegal: '{t.value[0]}'")
+    t.lexer.analyzer.lex_error(t.lineno, f"se ha encontrado un carácter ilegal: '{t.value[0]}'")
     t.lexer.skip(1)
 
 def t_eof(t):
     return None
 
-# Crear el lexer sin modo debug
-lexer = lex.lex(debug=False)
-
-######    FIN SECCIÓN DE ANALIZADOR LÉXICO    ######
-
-######    SECCIÓN DE TABLA DE SÍMBOLOS    ######
-tok_gcounter = -1
-
-# Tabla de símbolos por scopes. Cada scope es un dict: lexema -> atributos.
-# La posición (id.pos) es global e incremental, y se usa como "handle" entre fases.
-symbol_table = {}
-symbol_table_stack = [{}]
+# Lexer de PLY sin modo debug (motor 'ply'). Es el prototipo: cada sesión
+# (Analyzer) trabaja sobre su propio `ply_lexer.clone()`, que comparte las
+# expresiones compiladas.
+ply_lexer = lex.lex(debug=False)
+
+class Token:
+    """Token del `Scanner` (mismos atributos que el `LexToken` de PLY)."""
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+    def __init__(self, type, value, lineno, lexpos):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+class EOFToken:
+    """Fin de la entrada. Sin `lexpos`: se toma la posición final del lexer."""
+    __slots__ = ()
+    type = 'EOF'
+    value = None
+    lineno = 0
+
+# Centinela compartido: el lexer devuelve None al agotarse y el parser ve siempre este token.
+EOF_TOKEN = EOFToken()
+
+# Motores léxicos disponibles para `Analyzer(lexer=...)`.
+LEXERS = ('regex', 'ply')
+
+def new_lexer(engine):
+    """Lexer nuevo del motor `engine`: `scanner.Scanner` ('regex') o un clon del de PLY."""
+    if engine == 'regex':
+        import scanner  # scanner.py importa este módulo: se carga al usarlo
+        return scanner.Scanner()
+    return ply_lexer.clone()
+
+# Tamaño de los trozos leídos del fuente en modo streaming (caracteres).
+CHUNK_SIZE = 1 << 20
+
+def read_source_chunks(path, chunk_size=CHUNK_SIZE, use_mmap=False):
+    """Lee un fuente MyJS por trozos de texto, sin cargarlo entero en memoria.
+
+    El texto es el mismo que daría `open(path, encoding='utf-8').read()`
+    (saltos de línea universales incluidos). Con `use_mmap` el fichero se
+    proyecta en memoria y se decodifica por trozos (las páginas las gestiona
+    el sistema operativo); si no, se lee con `read(chunk_size)`.
+    """
+    if not use_mmap:
+        with open(path, 'r', encoding='utf-8') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    import mmap
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap no admite ficheros vacíos
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder('utf-8')(), translate=True)
+            for start in range(0, len(data), chunk_size):
+                chunk = decoder.decode(data[start:start + chunk_size])
+                if chunk:
+                    yield chunk
+            chunk = decoder.decode(b'', final=True)
+            if chunk:
+                yield chunk
+
+class StreamLexer:
+    """Adaptador que alimenta un lexer (`Scanner` o PLY) con el fuente por trozos.
+
+    El lexer interno solo ve una ventana de líneas completas: ningún token ni
+    comentario ocupa más de una línea, así que cortar tras un salto de línea no
+    cambia los tokens, errores ni números de línea. Cuando el lexer agota la
+    ventana se descarta y se carga la siguiente; `lexpos` (y el de los tokens)
+    es siempre el offset en el fuente completo.
+    """
 
-# Almacena las tablas de funciones antes de destruirlas al salir del scope
-# Formato: [(nombre_funcion, {copia del scope}), ...]
-function_tables = []
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.chunks = iter(())
+        self.base = 0      # offset de la ventana actual en el fuente
+        self.partial = ''  # línea incompleta pendiente de la siguiente ventana
+
+    @property
+    def lineno(self):
+        return self.lexer.lineno
+
+    @lineno.setter
+    def lineno(self, value):
+        self.lexer.lineno = value
+
+    @property
+    def lexpos(self):
+        return self.base + self.lexer.lexpos
+
+    def input(self, chunks):
+        """Empieza a tokenizar los trozos de texto `chunks` (iterable de str)."""
+        self.chunks = iter(chunks)
+        self.base = 0
+        self.partial = ''
+        self.lexer.input('')
+
+    def _refill(self):
+        """Carga la siguiente ventana; False si el fuente se ha terminado."""
+        lexer = self.lexer
+        # Un skip() puede dejar lexpos más allá de la ventana: el exceso se
+        # salta al principio de la siguiente, como en el fuente completo.
+        overflow = lexer.lexpos - lexer.lexlen
+        parts = [self.partial]
+        for chunk in self.chunks:
+            cut = chunk.rfind('\n') + 1
+            if cut:
+                parts.append(chunk[:cut])
+                self.partial = chunk[cut:]
+                break
+            parts.append(chunk)
+        else:
+            self.partial = ''
+        window = ''.join(parts)
+        if not window:
+            return False
+        self.base += lexer.lexlen
+        lexer.input(window)
+        lexer.lexpos = overflow
+        return True
+
+    def token(self):
+        while True:
+            tok = self.lexer.token()
+            if tok is not None:
+                tok.lexpos += self.base
+                return tok
+            if not self._refill():
+                return None
+
+def format_token(tok_type, value):
+    """Línea de `lexed.txt` para un token (formato de la práctica)."""
+    if tok_type in noattr:
+        return f'<{tok_type},>\n'
+    if tok_type == 'STR':
+        return f'<{tok_type},\"{value}\">\n'
+    return f'<{tok_type},{value}>\n'
+
+# Tipos de token (los del lexer y el EOF) y su código en `TokenBuffer`.
+TOKEN_TYPES = tokens + ['EOF']
+TOKEN_TYPE_CODES = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+class TokenBuffer:
+    """Tokens consumidos por el parser, guardados por columnas (struct-of-arrays).
+
+    Se comporta como una lista de tuplas (tipo, valor, línea, offset): admite
+    `len`, índices, slices (que devuelven listas de tuplas), iteración,
+    `append`/`extend` de tuplas, `del buffer[:]` y comparación con listas. Por
+    dentro el tipo es un código de 1 byte (`TOKEN_TYPE_CODES`) y la línea y el
+    offset van en arrays de enteros sin objetos por token; solo los valores son
+    una lista. `add` es la ruta rápida de `Analyzer.get_next_token`.
+    """
+    __slots__ = ('types', 'values', 'lines', 'offsets', 'add')
+
+    def __init__(self, items=()):
+        self.types = array('B')
+        self.values = []
+        self.lines = array('I')
+        self.offsets = array('Q')
+        self.extend(items)
+        types, values, lines, offsets = (self.types.append, self.values.append,
+                                         self.lines.append, self.offsets.append)
+        codes = TOKEN_TYPE_CODES
+
+        def add(tok_type, value, lineno, lexpos):
+            types(codes[tok_type])
+            values(value)
+            lines(lineno)
+            offsets(lexpos)
+        self.add = add
+
+    def append(self, token):
+        tok_type, value, lineno, lexpos = token
+        self.types.append(TOKEN_TYPE_CODES[tok_type])
+        self.values.append(value)
+        self.lines.append(lineno)
+        self.offsets.append(lexpos)
+
+    def extend(self, items):
+        for token in items:
+            self.append(token)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(map(TOKEN_TYPES.__getitem__, self.types[index]), self.values[index],
+                            self.lines[index], self.offsets[index]))
+        return (TOKEN_TYPES[self.types[index]], self.values[index],
+                self.lines[index], self.offsets[index])
+
+    def __delitem__(self, index):
+        del self.types[index], self.values[index], self.lines[index], self.offsets[index]
+
+    def __iter__(self):
+        return zip(map(TOKEN_TYPES.__getitem__, self.types), self.values, self.lines, self.offsets)
+
+    def __eq__(self, other):
+        if isinstance(other, TokenBuffer):
+            return (self.types == other.types and self.values == other.values
+                    and self.lines == other.lines and self.offsets == other.offsets)
+        if isinstance(other, list):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TokenBuffer({list(self)!r})"
+
+# Tamaño mínimo (caracteres) de cada trozo del lexer paralelo: con trozos más
+# pequeños arrancar procesos y copiar los tokens cuesta más que tokenizarlos.
+PARALLEL_MIN_CHUNK = 1 << 18
+
+def split_source(source, parts, min_chunk=PARALLEL_MIN_CHUNK):
+    """Offsets de inicio de hasta `parts` trozos de líneas completas de `source`.
+
+    Se corta justo después de un salto de línea. Ningún token ni comentario
+    ocupa más de una línea (una cadena no admite saltos y un comentario acaba
+    en el primero), así que todos los saltos quedan fuera de cadenas y
+    comentarios y cada trozo se tokeniza igual que dentro del fuente completo.
+    """
+    parts = max(1, min(parts, len(source) // min_chunk))
+    starts = [0]
+    for i in range(1, parts):
+        cut = source.find('\n', max(len(source) * i // parts, starts[-1])) + 1
+        if not cut or cut == len(source):
+            break
+        starts.append(cut)
+    return starts
+
+class _LexErrorLog:
+    """Sustituto de la sesión para un lexer sin parser: solo recoge los errores."""
+
+    def __init__(self):
+        self.errors = []
+        self.count = 0  # tokens emitidos hasta ahora
+
+    def lex_error(self, lineno, msg):
+        self.errors.append((self.count, lineno, msg))
+
+def lex_chunk(engine, text, start=0):
+    """Tokeniza `text` con el motor léxico `engine` empezando en la línea 1.
+
+    Devuelve `(columnas, errores, línea final, exceso)`: los tokens por columnas
+    como en `TokenBuffer` (tipos, valores, líneas, offsets en `text`), los
+    errores léxicos como `(nº de tokens emitidos antes, línea, mensaje)`, el
+    `lineno` del lexer al terminar y cuánto ha dejado `lexpos` más allá del
+    final con `skip()`. `start` es el offset en el que empieza a tokenizar.
+    """
+    lexer = new_lexer(engine)
+    log = lexer.analyzer = _LexErrorLog()
+    lexer.lineno = 1
+    lexer.input(text)
+    lexer.lexpos = start
+    types, values, lines, offsets = array('B'), [], array('I'), array('Q')
+    codes = TOKEN_TYPE_CODES
+    while True:
+        tok = lexer.token()
+        if tok is None:
+            break
+        types.append(codes[tok.type])
+        values.append(tok.value)
+        lines.append(tok.lineno)
+        offsets.append(tok.lexpos)
+        log.count += 1
+    return (types, values, lines, offsets), log.errors, lexer.lineno, lexer.lexpos - len(text)
+
+def lex_parallel(source, jobs=None, engine='regex', min_chunk=PARALLEL_MIN_CHUNK):
+    """Tokeniza `source` en `jobs` procesos (por defecto, uno por núcleo).
+
+    Parte el fuente con `split_source`, tokeniza cada trozo en un proceso con
+    `lex_chunk` y une los resultados corrigiendo líneas y offsets: la línea
+    inicial de cada trozo es la final del anterior, como en el lexer
+    secuencial. Si un `skip()` se sale de un trozo (el exceso que devuelve
+    `lex_chunk`), el siguiente se repite aquí empezando donde lo habría hecho el
+    lexer secuencial. Devuelve un `PrelexedLexer` con los tokens y errores
+    resultantes, que son los mismos que daría el lexer secuencial.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    starts = split_source(source, jobs, min_chunk)
+    texts = [source[a:b] for a, b in zip(starts, starts[1:] + [len(source)])]
+    if len(texts) == 1:
+        chunks = [lex_chunk(engine, texts[0])]
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(min(jobs, len(texts))) as pool:
+            chunks = pool.starmap(lex_chunk, [(engine, text) for text in texts])
+
+    buffer = TokenBuffer()
+    errors = []
+    line_base = 0  # líneas antes del trozo actual
+    overflow = 0
+    lexpos = 0
+    for base, text, chunk in zip(starts, texts, chunks):
+        if overflow:
+            chunk = lex_chunk(engine, text, overflow)
+        (types, values, lines, offsets), chunk_errors, lineno, overflow = chunk
+        first = len(buffer)
+        errors.extend((first + count, line_base + line, msg) for count, line, msg in chunk_errors)
+        buffer.types.extend(types)
+        buffer.values.extend(values)
+        buffer.lines.extend(array('I', (line + line_base for line in lines)) if line_base else lines)
+        buffer.offsets.extend(array('Q', (pos + base for pos in offsets)) if base else offsets)
+        line_base += lineno - 1
+        lexpos = base + len(text) + overflow
+        overflow = max(overflow, 0)
+    return PrelexedLexer(buffer, errors, line_base + 1, lexpos)
+
+class PrelexedLexer:
+    """Lexer que devuelve tokens ya calculados (los de `lex_parallel`).
+
+    Tiene la interfaz que usa el parser (`input`, `token`, `lineno`, `lexpos`).
+    Cada error léxico se notifica a `analyzer.lex_error` al pedir el token ante
+    el que se produjo, igual que con el lexer secuencial: si el análisis se
+    detiene antes, no aparece.
+    """
 
-# Contador de tablas para numeración
-table_counter = 1
+    def __init__(self, buffer, errors, end_lineno, end_lexpos):
+        self.buffer = buffer
+        self.errors = errors
+        self.end_lineno = end_lineno
+        self.end_lexpos = end_lexpos
+        self.analyzer = None
+        self.input(None)
+
+    def input(self, data):
+        """Vuelve al primer token (el fuente ya está tokenizado: `data` no se usa)."""
+        self.index = 0
+        self.next_error = 0
+        self.lineno = 1
+        self.lexpos = 0
+
+    def token(self):
+        i = self.index
+        errors = self.errors
+        while self.next_error < len(errors) and errors[self.next_error][0] <= i:
+            _, lineno, msg = errors[self.next_error]
+            self.analyzer.lex_error(lineno, msg)
+            self.next_error += 1
+        buffer = self.buffer
+        if i >= len(buffer):
+            self.lineno = self.end_lineno
+            self.lexpos = self.end_lexpos
+            return None
+        self.index = i + 1
+        tok = Token(TOKEN_TYPES[buffer.types[i]], buffer.values[i],
+                    buffer.lines[i], buffer.offsets[i])
+        self.lineno = tok.lineno
+        self.lexpos = tok.lexpos
+        return tok
 
-symbols_file = None  # Fichero para volcar la tabla de símbolos en tiempo real
+######    FIN SECCIÓN DE ANALIZADOR LÉXICO    ######
 
-def add_symbol(name, type=None, value=None):
-    """Agrega o reutiliza un símbolo en la Tabla de Símbolos.
-    
-    Comportamiento:
-    - Si el símbolo existe en cualquier scope visible → reutilizar su posición
-    - Si no existe en ningún scope → crear nuevo en scope actual
-    
-    Esto asegura que las referencias a identificadores ya declarados
-    (ej: llamadas a funciones) obtengan la misma posición que la declaración.
-    """
-    global tok_gcounter, symbols_file
+######    SECCIÓN DE TABLA DE SÍMBOLOS    ######
 
-    # Buscar en TODOS los scopes (de más interno a más externo)
-    for scope in reversed(symbol_table_stack):
-        if name in scope:
-            return scope[name]['position']
-    
-    # No existe en ningún scope: crear nuevo
-    tok_gcounter += 1
-    symbol_table_stack[-1][name] = {
-        'type': type,
-        # 'value' aquí NO es un valor en tiempo de ejecución: es el lexema original.
-        'value': value,
-        'position': tok_gcounter,
-        'displacement': None,  # Desplazamiento en memoria
-        'lexeme': name         # Guardar el lexema para referencia
-    }
-    return tok_gcounter
+class SymbolTable:
+    """Tabla de símbolos por scopes de una sesión de análisis.
 
-def add_symbol_to_current_scope(name, type=None, value=None):
-    """Fuerza la creación de un símbolo en el scope ACTUAL (para declaraciones let).
-    
-    Esta función se usa cuando sabemos que es una DECLARACIÓN (let), no una referencia.
-    Permite 'shadowing': declarar una variable local con el mismo nombre que una global.
+    Cada scope es un dict: lexema -> atributos. La posición (id.pos) es global e
+    incremental dentro de la sesión, y se usa como "handle" entre fases.
     """
-    global tok_gcounter
-    
-    # Verificar si ya existe en el scope ACTUAL (error: redeclaración)
-    current_scope = symbol_table_stack[-1]
-    if name in current_scope:
-        # Ya existe en este scope, devolver su posición (será un error semántico después)
-        return current_scope[name]['position']
-    
-    # Crear nuevo símbolo en el scope actual
-    tok_gcounter += 1
-    current_scope[name] = {
-        'type': type,
-        'value': value,
-        'position': tok_gcounter,
-        'displacement': None,
-        'lexeme': name
-    }
-    return tok_gcounter
 
-def get_symbol(value):
-    for scope in reversed(symbol_table_stack):
-        for tok in scope.values():
-            if tok['position'] == value:
-                return tok
-    return None
+    def __init__(self):
+        self.counter = -1
+        self.scopes = [{}]
+        # Índice directo id.pos -> registro del símbolo, solo para los scopes vivos.
+        # Se mantiene sincronizado con `scopes` (alta en `bind`, baja en
+        # exit_scope) para que `get_symbol` sea O(1) en lugar de recorrer todos los scopes.
+        self.index = {}
+        # Ligaduras vivas de cada lexema, de la más externa a la más interna: la
+        # resolución por nombre es O(1) con cualquier anidamiento. Cada scope es a
+        # la vez la lista de nombres que introdujo, así que salir de él cuesta lo
+        # que su tamaño (ver `exit_scope`).
+        self.bindings = {}
+
+    def bind(self, name, sym):
+        """Da de alta el registro `sym` con el lexema `name` en el scope actual."""
+        self.scopes[-1][name] = sym
+        self.index[sym['position']] = sym
+        chain = self.bindings.get(name)
+        if chain is None:
+            self.bindings[name] = [sym]
+        else:
+            chain.append(sym)
 
-def get_symbol_by_name(name):
-    """Busca un símbolo por nombre en todos los scopes."""
-    for scope in reversed(symbol_table_stack):
-        if name in scope:
-            return scope[name]
-    return None
+    def add_symbol(self, name, type=None, value=None):
+        """Agrega o reutiliza un símbolo en la Tabla de Símbolos.
+        
+        Comportamiento:
+        - Si el símbolo existe en cualquier scope visible → reutilizar su posición
+        - Si no existe en ningún scope → crear nuevo en scope actual
+        
+        Esto asegura que las referencias a identificadores ya declarados
+        (ej: llamadas a funciones) obtengan la misma posición que la declaración.
+        """
+        # La ligadura más interna es la visible
+        chain = self.bindings.get(name)
+        if chain is not None:
+            return chain[-1]['position']
+        
+        # No existe en ningún scope: crear nuevo
+        self.counter += 1
+        self.bind(name, {
+            'type': type,
+            # 'value' aquí NO es un valor en tiempo de ejecución: es el lexema original.
+            'value': value,
+            'position': self.counter,
+            'displacement': None,  # Desplazamiento en memoria
+            'lexeme': name         # Guardar el lexema para referencia
+        })
+        return self.counter
+
+    def add_symbol_to_current_scope(self, name, type=None, value=None):
+        """Fuerza la creación de un símbolo en el scope ACTUAL (para declaraciones let).
+        
+        Esta función se usa cuando sabemos que es una DECLARACIÓN (let), no una referencia.
+        Permite 'shadowing': declarar una variable local con el mismo nombre que una global.
+        """
+        # Verificar si ya existe en el scope ACTUAL (error: redeclaración)
+        current_scope = self.scopes[-1]
+        if name in current_scope:
+            # Ya existe en este scope, devolver su posición (será un error semántico después)
+            return current_scope[name]['position']
+        
+        # Crear nuevo símbolo en el scope actual (tapa al de los scopes externos)
+        self.counter += 1
+        self.bind(name, {
+            'type': type,
+            'value': value,
+            'position': self.counter,
+            'displacement': None,
+            'lexeme': name
+        })
+        return self.counter
+
+    def get_symbol(self, value):
+        """Devuelve el registro del símbolo con posición `value` (O(1) vía `index`).
+
+        Solo se encuentran símbolos de scopes vivos: al salir de un scope sus
+        posiciones se retiran del índice, igual que si se recorriera la pila.
+        """
+        return self.index.get(value)
+
+    def get_symbol_by_name(self, name):
+        """Busca un símbolo por nombre en todos los scopes (el más interno que lo tenga)."""
+        chain = self.bindings.get(name)
+        return chain[-1] if chain is not None else None
+
+    def set_symbol_displacement(self, pos, disp):
+        """Establece el desplazamiento de un símbolo."""
+        sym = self.get_symbol(pos)
+        if sym:
+            sym['displacement'] = disp
+
+    def get_symbol_displacement(self, pos):
+        """Obtiene el desplazamiento de un símbolo."""
+        sym = self.get_symbol(pos)
+        if sym:
+            return sym.get('displacement')
+        return None
 
-def set_symbol_displacement(pos, disp):
-    """Establece el desplazamiento de un símbolo."""
-    sym = get_symbol(pos)
-    if sym:
-        sym['displacement'] = disp
-
-def get_symbol_displacement(pos):
-    """Obtiene el desplazamiento de un símbolo."""
-    sym = get_symbol(pos)
-    if sym:
-        return sym.get('displacement')
-    return None
+    def enter_scope(self):
+        self.scopes.append({})
+
+    def exit_scope(self):
+        scope = self.scopes.pop()
+        # Retirar del índice y de las ligaduras los símbolos del scope destruido
+        # (en cada cadena, el último es el de este scope: es el más interno).
+        index = self.index
+        bindings = self.bindings
+        for name, sym in scope.items():
+            index.pop(sym['position'], None)
+            chain = bindings[name]
+            chain.pop()
+            if not chain:
+                del bindings[name]
 
 def write_single_table(file_handle, table_num, table_name, symbols_dict):
     """Escribe una tabla de símbolos individual al archivo.
@@ -314,48 +682,51 @@ def write_single_table(file_handle, table_num, table_name, symbols_dict):
     """
     # Formato: CONTENIDOS DE LA TABLA nombreFuncion #N: (para funciones)
     #          CONTENIDOS DE LA TABLA #N: (para global)
+    # Las líneas se acumulan y se escriben de una vez (una sola llamada a write).
+    out = []
     if table_name:
-        file_handle.write(f"CONTENIDOS DE LA TABLA {table_name} #{table_num}:\n\n")
+        out.append(f"CONTENIDOS DE LA TABLA {table_name} #{table_num}:\n\n")
     else:
-        file_handle.write(f"CONTENIDOS DE LA TABLA #{table_num}:\n\n")
+        out.append(f"CONTENIDOS DE LA TABLA #{table_num}:\n\n")
     
     # Ordenar por posición y escribir
     sorted_symbols = sorted(symbols_dict.items(), key=lambda x: x[1]['position'])
     
     for name, sym in sorted_symbols:
-        file_handle.write(f"* LEXEMA : '{name}'\n")
-        file_handle.write("  Atributos:\n")
+        out.append(f"* LEXEMA : '{name}'\n")
+        out.append("  Atributos:\n")
         
         # Escribir tipo si existe
-        if sym.get('type'):
-            # Separar la cadena sym['type'] por tokens de ->
-            if "->" in str(sym['type']):
-                types_parts = str(sym['type']).split("->")
-                file_handle.write(f"    + tipo: 'funcion'\n")
-                args = types_parts[0].split("x")
+        sym_type = sym.get('type')
+        if sym_type:
+            if isinstance(sym_type, FunctionType):
+                out.append("    + tipo: 'funcion'\n")
+                # Sin parámetros se muestra un único parámetro 'void' (formato de la práctica)
+                args = sym_type.params or (T_VOID,)
                 # Escribir el número de parámetros y sus tipos
-                file_handle.write(f"    + numParams: {len(args)}\n")
+                out.append(f"    + numParams: {len(args)}\n")
                 for i, arg in enumerate(args):
-                    file_handle.write(f"            + tipoParam{i+1}: '{arg.strip()}'\n")
-                file_handle.write(f"    + tipoRetorno: '{types_parts[1].strip()}'\n")
-                file_handle.write(f"    + EtiqFuncion: 'Et{name}'\n")
+                    out.append(f"            + tipoParam{i+1}: '{arg}'\n")
+                out.append(f"    + tipoRetorno: '{sym_type.ret}'\n")
+                out.append(f"    + EtiqFuncion: 'Et{name}'\n")
             else:
                 # Tipo simple (variable)
-                file_handle.write(f"    + tipo: '{sym['type']}'\n")
+                out.append(f"    + tipo: '{sym_type}'\n")
         
         # Escribir desplazamiento si existe
         if sym.get('displacement') is not None:
-            file_handle.write(f"    + despl: {sym['displacement']}\n")
+            out.append(f"    + despl: {sym['displacement']}\n")
         
-        file_handle.write("  --------- ---------\n\n")
+        out.append("  --------- ---------\n\n")
+    file_handle.write(''.join(out))
 
-def write_symbol_table_to_file(file_handle):
+def write_symbol_table_to_file(file_handle, global_scope, function_tables):
     """Escribe todas las tablas de símbolos al archivo (global + funciones)."""
     table_num = 1
     
     # 1. Escribir tabla global (scope 0)
-    if symbol_table_stack:
-        write_single_table(file_handle, table_num, None, symbol_table_stack[0])
+    if global_scope is not None:
+        write_single_table(file_handle, table_num, None, global_scope)
         table_num += 1
     
     # 2. Escribir tablas de funciones (guardadas antes de destruirse)
@@ -363,50 +734,82 @@ def write_symbol_table_to_file(file_handle):
         write_single_table(file_handle, table_num, func_name, func_scope)
         table_num += 1
 
-def enter_scope():
-    symbol_table_stack.append({})
+######    FIN SECCIÓN DE TABLA DE SÍMBOLOS    ######
 
-def exit_scope():
-    symbol_table_stack.pop()
+###### SECCIÓN DE ANÁLISIS SEMÁNTICO ######
 
-######    FIN SECCIÓN DE TABLA DE SÍMBOLOS    ######
+# Tipos
+#
+# Cada tipo es un objeto internado (una sola instancia por tipo) y a la vez un
+# `str` con su texto de siempre ('int', 'int x float -> int'): se compara, se
+# muestra en los mensajes y se vuelca en symbols.txt igual que las cadenas de
+# antes, pero los tipos de función guardan ya separados sus parámetros y su
+# retorno, así que el semántico no vuelve a partir la firma.
+
+_TYPES = {}           # texto -> tipo internado
+_FUNCTION_TYPES = {}  # (parámetros, retorno) -> tipo de función internado
+
+class Type(str):
+    """Tipo primitivo o marcador del EdT (int, void, tipo_ok, ...)."""
+    __slots__ = ()
+
+    def __reduce__(self):
+        # Al deserializar se recupera la instancia internada.
+        return (type_from_string, (str(self),))
+
+class FunctionType(Type):
+    """Tipo de función: `params` (tupla de tipos; vacía si es void) y `ret`."""
+
+def primitive_type(name):
+    """Tipo primitivo internado de nombre `name`."""
+    t = _TYPES.get(name)
+    if t is None:
+        t = _TYPES[name] = Type(name)
+    return t
 
-######    SECCIÓN DE ANALIZADOR SINTÁCTICO    ######
-grammar = {}
-parsing_table = {}
-stack = []
-production_sequence = []  # Para almacenar la secuencia de producciones aplicadas
-current_token = None      # Token actual del lexer
+def function_type(params, ret):
+    """Tipo de función internado: mismos parámetros y retorno -> mismo objeto."""
+    key = (params, ret)
+    t = _FUNCTION_TYPES.get(key)
+    if t is None:
+        t = FunctionType(f"{' x '.join(params) or T_VOID} -> {ret}")
+        t.params = params
+        t.ret = ret
+        _FUNCTION_TYPES[key] = _TYPES[str(t)] = t
+    return t
 
-###### SECCIÓN DE ANÁLISIS SEMÁNTICO ######
+def type_from_string(text):
+    """Tipo internado a partir de su texto (p. ej. al leer artefactos guardados).
+
+    Los textos que no son un tipo (como 'ID', símbolo aún sin tipo) se
+    devuelven tal cual.
+    """
+    t = _TYPES.get(text)
+    if t is None and '->' in text:
+        args, ret = (part.strip() for part in text.split('->'))
+        params = () if args == T_VOID else tuple(primitive_type(a.strip()) for a in args.split(' x '))
+        t = function_type(params, primitive_type(ret))
+    return text if t is None else t
 
 # Constantes de Tipos
-T_INT = 'int'
-T_FLOAT = 'float'
-T_STRING = 'string'
-T_BOOL = 'boolean'
-T_VOID = 'void'
-T_ERROR = 'tipo_error'
-T_OK = 'tipo_ok'
-
-# Estado Global del Semántico
-sem_stack = []        
-last_id_pos = -1      
-current_func_id = -1  # ID de la función que se está declarando
-despG = 0             
-despL = 0             
-in_function = False   
-temp_type = None      
-global_initialized = False  # Bandera para saber si ya se inicializó el scope global      
-
-# Pila de IDs para expresiones (resuelve el problema de ids anidados en llamadas)
-id_stack = []
-
-# Pila de IDs para declaraciones let (preserva el id durante análisis de Asignar)
-decl_id_stack = []
-
-# Pila de IDs para LS -> id IdOpt (preserva el id durante análisis de IdOpt)
-ls_id_stack = []      
+T_INT = primitive_type('int')
+T_FLOAT = primitive_type('float')
+T_STRING = primitive_type('string')
+T_BOOL = primitive_type('boolean')
+T_VOID = primitive_type('void')
+T_ERROR = primitive_type('tipo_error')
+T_OK = primitive_type('tipo_ok')
+
+# Tablas de compatibilidad precalculadas (consultas O(1) en las acciones).
+NUMERIC = frozenset({T_INT, T_FLOAT})
+WRITABLE = frozenset({T_INT, T_FLOAT, T_STRING})
+# (tipo de la variable, tipo del valor) admitidos en una asignación: el mismo
+# tipo o la coerción implícita int -> float.
+ASSIGNABLE = frozenset([(t, t) for t in (T_INT, T_FLOAT, T_STRING, T_BOOL)] + [(T_FLOAT, T_INT)])
+# Tipo del resultado de '+' entre numéricos (float si alguno es float).
+SUM_TYPE = {(T_INT, T_INT): T_INT, (T_INT, T_FLOAT): T_FLOAT,
+            (T_FLOAT, T_INT): T_FLOAT, (T_FLOAT, T_FLOAT): T_FLOAT}
+WIDTHS = {T_INT: 1, T_FLOAT: 2, T_BOOL: 1, T_STRING: 64}
 
 def get_width(type_str):
     """Ancho (bytes) de un tipo para cálculo de desplazamientos (despG/despL).
@@ -417,773 +820,798 @@ def get_width(type_str):
     - boolean: 1 byte
     - string: 64 bytes (tamaño máximo permitido por el lexer)
     """
-    if type_str == T_INT: return 1
-    if type_str == T_FLOAT: return 2
-    if type_str == T_BOOL: return 1
-    if type_str == T_STRING: return 64  # Tamaño máximo de cadena en MyJS
-    return 0
+    return WIDTHS.get(type_str, 0)
 
-def set_symbol_type(pos, type_val):
-    sym = get_symbol(pos)
-    if sym:
-        sym['type'] = type_val
+def args_text(args):
+    """Texto de una lista de argumentos/parámetros para los mensajes ('int x float')."""
+    return ' x '.join(args) if isinstance(args, tuple) else args
 
-def get_symbol_type(pos):
-    sym = get_symbol(pos)
-    if sym:
-        return sym['type']
-    return None
+class SemanticActions:
+    """Acciones semánticas del EdT y su estado (mezclado en `Analyzer`).
 
-def get_symbol_name(pos):
-    # Recupera el nombre real (lexema) para errores legibles
-    sym = get_symbol(pos)
-    if sym and 'value' in sym:
-        return str(sym['value'])
-    return f"ID_{pos}"
-
-def get_current_line():
-    """Obtiene la línea actual del análisis (del token previo procesado)."""
-    global prev_token, current_token
-    # Usamos prev_token porque es el último token consumido
-    if prev_token and hasattr(prev_token, 'lineno') and prev_token.lineno > 0:
-        return prev_token.lineno
-    if current_token and hasattr(current_token, 'lineno'):
-        return current_token.lineno
-    return 1  # Fallback
-
-def sem_error(msg):
-    """Registra un error semántico con la línea actual."""
-    lineno = get_current_line()
-    add_sem_error(lineno, msg)
-
-# --- ACCIONES SEMÁNTICAS ---
-
-def action_init_global():
-    """S -> LC S | LF S | eof: Inicialización del scope global.
-    
-    Per el EdT: if TSG = nulo then TSG := CrearTabla(), despG := 0
-    Solo inicializa si no se ha hecho antes.
-    """
-    global despG, sem_stack, id_stack, decl_id_stack, global_initialized, function_tables
-    
-    if not global_initialized:
-        despG = 0
-        sem_stack = []
-        id_stack = []
-        decl_id_stack = []
-        function_tables = []  # Resetear tablas de funciones
-        global_initialized = True
-
-def action_lc_check():
-    ls_type = sem_stack.pop()
-    res = T_OK if ls_type != T_ERROR else T_ERROR
-    sem_stack.append(res)
-
-def action_lc_if():
-    """LC -> if oppar Expresion clpar CuerpoIf
-    
-    Per el EdT:
-    LC.tipo := if Expresion.tipo = boolean then CuerpoIf.tipo
-               else tipo_error
+    Las acciones leen/escriben el estado de la sesión: `sem_stack`, la tabla de
+    símbolos `symtab`, los desplazamientos `despG`/`despL`, etc. Se apilan en el
+    parser como funciones y se ejecutan como `accion(sesion)`.
     """
-    cuerpo_if_type = sem_stack.pop()
-    exp_type = sem_stack.pop()
-    
-    if exp_type == T_BOOL:
-        sem_stack.append(cuerpo_if_type)
-    else:
-        sem_error(f"La condición 'if' requiere boolean. Recibido: {exp_type}")
-        sem_stack.append(T_ERROR)
 
-def action_cuerpoif_block():
-    """CuerpoIf -> opbra Cuerpo clbra LE
-    
-    Per el EdT:
-    CuerpoIf.tipo := if Cuerpo.tipo = tipo_ok then LE.tipo
-                     else tipo_error
-    """
-    le_type = sem_stack.pop()
-    cuerpo_type = sem_stack.pop()
-    
-    if cuerpo_type == T_OK:
-        sem_stack.append(le_type)
-    else:
-        sem_stack.append(T_ERROR)
+    def reset_semantic_state(self):
+        """Estado inicial del semántico para un nuevo análisis."""
+        self.symtab = SymbolTable()
+        # Almacena las tablas de funciones antes de destruirlas al salir del scope
+        # Formato: [(nombre_funcion, {copia del scope}), ...]
+        self.function_tables = []
+        self.sem_errors = []
+        self.sem_stack = []
+        self.last_id_pos = -1
+        self.current_func_id = -1  # ID de la función que se está declarando
+        self.despG = 0
+        self.despL = 0
+        self.in_function = False
+        self.temp_type = None
+        self.global_initialized = False  # Bandera para saber si ya se inicializó el scope global
+        # Pila de IDs para expresiones (resuelve el problema de ids anidados en llamadas)
+        self.id_stack = []
+        # Pila de IDs para declaraciones let (preserva el id durante análisis de Asignar)
+        self.decl_id_stack = []
+        # Pila de IDs para LS -> id IdOpt (preserva el id durante análisis de IdOpt)
+        self.ls_id_stack = []
+        # Recuperándose de un error sintáctico (`Analyzer.recover`): hasta volver a
+        # consumir un token se descartan los errores semánticos en cascada.
+        self.recovering = False
+
+    def add_sem_error(self, lineno, msg):
+        """Registra un error semántico."""
+        if self.recovering:
+            return
+        self.sem_errors.append((lineno, msg))
+
+    def set_symbol_type(self, pos, type_val):
+        sym = self.symtab.get_symbol(pos)
+        if sym:
+            sym['type'] = type_val
+
+    def get_symbol_type(self, pos):
+        sym = self.symtab.get_symbol(pos)
+        if sym:
+            return sym['type']
+        return None
 
-def action_cuerpoif_lc():
-    """CuerpoIf -> LC
-    
-    Per el EdT: CuerpoIf.tipo := LC.tipo
-    """
-    # LC.tipo ya está en la pila, no hacer nada (herencia directa)
-    pass
+    def get_symbol_name(self, pos):
+        # Recupera el nombre real (lexema) para errores legibles
+        sym = self.symtab.get_symbol(pos)
+        if sym and 'value' in sym:
+            return str(sym['value'])
+        return f"ID_{pos}"
+
+    def get_current_line(self):
+        """Obtiene la línea actual del análisis (del token previo procesado)."""
+        # Usamos prev_token porque es el último token consumido
+        if self.prev_token and hasattr(self.prev_token, 'lineno') and self.prev_token.lineno > 0:
+            return self.prev_token.lineno
+        if self.current_token and hasattr(self.current_token, 'lineno'):
+            return self.current_token.lineno
+        return 1  # Fallback
+
+    def sem_error(self, msg):
+        """Registra un error semántico con la línea actual."""
+        lineno = self.get_current_line()
+        self.add_sem_error(lineno, msg)
+
+    # --- ACCIONES SEMÁNTICAS ---
+
+    def action_init_global(self):
+        """S -> LC S | LF S | eof: Inicialización del scope global.
+
+        Per el EdT: if TSG = nulo then TSG := CrearTabla(), despG := 0
+        Solo inicializa si no se ha hecho antes.
+        """
+
+        if not self.global_initialized:
+            self.despG = 0
+            self.sem_stack = []
+            self.id_stack = []
+            self.decl_id_stack = []
+            self.function_tables = []  # Resetear tablas de funciones
+            self.global_initialized = True
+
+    def action_lc_check(self):
+        ls_type = self.sem_stack.pop()
+        res = T_OK if ls_type != T_ERROR else T_ERROR
+        self.sem_stack.append(res)
+
+    def action_lc_if(self):
+        """LC -> if oppar Expresion clpar CuerpoIf
+
+        Per el EdT:
+        LC.tipo := if Expresion.tipo = boolean then CuerpoIf.tipo
+                   else tipo_error
+        """
+        cuerpo_if_type = self.sem_stack.pop()
+        exp_type = self.sem_stack.pop()
 
-def action_le_else():
-    """LE -> else opbra Cuerpo clbra
-    
-    Per el EdT: LE.tipo := Cuerpo.tipo
-    """
-    # Cuerpo.tipo ya está en la pila, no hacer nada (herencia directa)
-    pass 
+        if exp_type == T_BOOL:
+            self.sem_stack.append(cuerpo_if_type)
+        else:
+            self.sem_error(f"La condición 'if' requiere boolean. Recibido: {exp_type}")
+            self.sem_stack.append(T_ERROR)
 
-def action_le_lambda():
-    sem_stack.append(T_OK)
+    def action_cuerpoif_block(self):
+        """CuerpoIf -> opbra Cuerpo clbra LE
 
-def action_fun_init():
-    global despL, in_function, current_func_id
-    # last_id_pos es el identificador de la función
-    current_func_id = last_id_pos 
-    
-    enter_scope()
-    despL = 0
-    in_function = True
-
-def action_fun_def():
-    # Registra la firma de la función en la Tabla de Símbolos
-    args_type = sem_stack.pop()
-    ret_type = sem_stack.pop()
-    
-    # Construir firma: args -> ret
-    if args_type == T_VOID:
-        sig = f"void -> {ret_type}"
-    else:
-        sig = f"{args_type} -> {ret_type}"
-    
-    # Actualizar símbolo (está en el scope padre/global)
-    sym = get_symbol(current_func_id)
-    if sym:
-        sym['type'] = sig
-    else:
-        # Fallback por si acaso
-        sem_error(f"No se pudo registrar la función {get_symbol_name(current_func_id)}")
+        Per el EdT:
+        CuerpoIf.tipo := if Cuerpo.tipo = tipo_ok then LE.tipo
+                         else tipo_error
+        """
+        le_type = self.sem_stack.pop()
+        cuerpo_type = self.sem_stack.pop()
 
-def action_fun_end():
-    """LF: Fin de función - guarda la tabla local antes de destruirla."""
-    global in_function, function_tables
-    
-    # Guardar la tabla de la función antes de destruirla
-    func_name = get_symbol_name(current_func_id)
-    current_scope = symbol_table_stack[-1].copy()  # Copia del scope actual
-    
-    # Guardar SIEMPRE la tabla (incluso vacía) - requerido por el formato de salida
-    function_tables.append((func_name, current_scope))
-    
-    exit_scope()
-    in_function = False
+        if cuerpo_type == T_OK:
+            self.sem_stack.append(le_type)
+        else:
+            self.sem_stack.append(T_ERROR)
 
-def action_cuerpo_lc():
-    c1 = sem_stack.pop()
-    lc = sem_stack.pop()
-    res = c1 if lc == T_OK else T_ERROR
-    sem_stack.append(res)
+    def action_cuerpoif_lc(self):
+        """CuerpoIf -> LC
 
-def action_cuerpo_lambda():
-    sem_stack.append(T_OK)
+        Per el EdT: CuerpoIf.tipo := LC.tipo
+        """
+        # LC.tipo ya está en la pila, no hacer nada (herencia directa)
+        pass
 
-def action_args_init():
-    global temp_type
-    temp_type = sem_stack[-1] 
+    def action_le_else(self):
+        """LE -> else opbra Cuerpo clbra
 
-def action_args_id():
-    """Args -> Tipo id ArgMore: Acción al procesar 'id' del parámetro.
-    
-    Per el EdT: AgregarTipo(id.pos, Tipo.tipo), AgregarDesplazamiento(id.pos, despL)
-    """
-    global despL
-    tipo = sem_stack[-1] 
-    set_symbol_type(last_id_pos, tipo)
-    set_symbol_displacement(last_id_pos, despL)
-    despL += get_width(tipo)
-
-def action_args_res():
-    am = sem_stack.pop()
-    t = sem_stack.pop()
-    if am == T_VOID:
-        sem_stack.append(t)
-    else:
-        sem_stack.append(f"{t} x {am}")
-
-def action_args_void():
-    """Args -> void: Función sin parámetros (explícito void)."""
-    sem_stack.append(T_VOID)
-
-def action_args_lambda():
-    """Args -> lambda: Función sin parámetros (implícito)."""
-    sem_stack.append(T_VOID)
-
-def action_argsl_call():
-    am = sem_stack.pop()
-    e = sem_stack.pop()
-    if e == T_ERROR or am == T_ERROR:
-        sem_stack.append(T_ERROR)
-    elif am == T_VOID:
-        sem_stack.append(e)
-    else:
-        sem_stack.append(f"{e} x {am}")
-
-def action_argsl_lambda():
-    """ArgsLlamada -> lambda: Llamada sin argumentos."""
-    sem_stack.append(T_VOID)
-
-def action_argsl_void():
-    """ArgsLlamada -> void: Llamada explícita sin argumentos."""
-    sem_stack.append(T_VOID)
-
-def action_argmore_call():
-    am1 = sem_stack.pop()
-    e = sem_stack.pop()
-    if e == T_ERROR or am1 == T_ERROR:
-        sem_stack.append(T_ERROR)
-    elif am1 == T_VOID:
-        sem_stack.append(e)
-    else:
-        sem_stack.append(f"{e} x {am1}")
+        Per el EdT: LE.tipo := Cuerpo.tipo
+        """
+        # Cuerpo.tipo ya está en la pila, no hacer nada (herencia directa)
+        pass 
 
-def action_argmore_lambda():
-    sem_stack.append(T_VOID)
+    def action_le_lambda(self):
+        self.sem_stack.append(T_OK)
 
-def action_argmore_tipo():
-    global temp_type
-    temp_type = sem_stack[-1]
+    def action_fun_init(self):
+        # last_id_pos es el identificador de la función
+        self.current_func_id = self.last_id_pos 
 
-def action_argmore_id():
-    """ArgMore -> comma Tipo id ArgMore: Acción al procesar 'id' del parámetro adicional.
-    
-    Per el EdT: AgregarTipo(id.pos, Tipo.tipo), AgregarDesplazamiento(id.pos, despL)
-    """
-    global despL
-    tipo = sem_stack[-1]
-    set_symbol_type(last_id_pos, tipo)
-    set_symbol_displacement(last_id_pos, despL)
-    despL += get_width(tipo)
-
-def action_argmore_res():
-    am1 = sem_stack.pop()
-    t = sem_stack.pop()
-    if am1 == T_VOID:
-        sem_stack.append(t)
-    else:
-        sem_stack.append(f"{t} x {am1}")
+        self.symtab.enter_scope()
+        self.despL = 0
+        self.in_function = True
 
-def action_ls_let_pre():
-    pass 
+    def action_fun_def(self):
+        # Registra la firma de la función en la Tabla de Símbolos
+        args_type = self.sem_stack.pop()
+        ret_type = self.sem_stack.pop()
 
-def action_ls_let_id():
-    """LS -> let Tipo id Asignar: Acción al procesar 'id'.
-    
-    Guarda el id en decl_id_stack para preservarlo durante el análisis de Asignar.
-    Per el EdT: AgregarTipo(id.pos, Tipo.tipo), AgregarDesplazamiento(...)
-    
-    IMPORTANTE: Si estamos en una función, debemos forzar la creación del símbolo
-    en el scope local, permitiendo 'shadowing' de variables globales.
-    
-    Verificación de redeclaración: Si el símbolo ya tiene desplazamiento asignado
-    en el scope actual, es una redeclaración (error semántico).
-    """
-    global despG, despL, decl_id_stack, last_id_pos
-    tipo = sem_stack[-1]
-    
-    # Obtener el nombre del símbolo actual
-    sym = get_symbol(last_id_pos)
-    if sym:
-        name = sym['lexeme']
-        
-        # Verificar redeclaración en el scope actual
-        current_scope = symbol_table_stack[-1]
-        if name in current_scope:
-            existing_sym = current_scope[name]
-            if existing_sym.get('displacement') is not None:
-                # Ya fue declarado con 'let' en este scope - ERROR semántico
-                sem_error(f"Variable '{name}' ya declarada en este scope")
-                # Guardamos en la pila pero NO modificamos desplazamientos
-                decl_id_stack.append(last_id_pos)
-                return
-        
-        # Si estamos en una función, verificar si necesitamos crear símbolo local
-        if in_function:
-            if name not in current_scope:
-                # El símbolo existe en scope externo pero no en el local
-                # Crear nuevo símbolo LOCAL (shadowing)
-                new_pos = add_symbol_to_current_scope(name, tipo, name)
-                last_id_pos = new_pos  # Actualizar para usar el nuevo símbolo local
-    
-    set_symbol_type(last_id_pos, tipo)
-    w = get_width(tipo)
-    
-    # Asignar desplazamiento según el scope
-    if in_function:
-        set_symbol_displacement(last_id_pos, despL)
-        despL += w
-    else:
-        set_symbol_displacement(last_id_pos, despG)
-        despG += w
-    
-    # Guardar el id para usarlo en action_ls_let_res
-    decl_id_stack.append(last_id_pos)
+        # Construir firma: args -> ret (args es la tupla de tipos de Args, o void)
+        # (T_ERROR: lista de parámetros abandonada por un error sintáctico)
+        sig = function_type(() if args_type == T_VOID or args_type == T_ERROR else args_type,
+                            ret_type)
 
-def action_ls_let_res():
-    """LS -> let Tipo id Asignar: Acción final (después de Asignar).
-    
-    Per el EdT:
-    LS.tipo := if Asignar.igualacion = tipo_error then
-                   if Asignar.tipo = Tipo.tipo then Tipo.tipo
-                   else tipo_error
-               else Tipo.tipo
-    """
-    global decl_id_stack
-    asign = sem_stack.pop()
-    tipo = sem_stack.pop()
-    
-    # Recuperar el id correcto de la pila
-    if decl_id_stack:
-        decl_id = decl_id_stack.pop()
-    else:
-        decl_id = last_id_pos  # Fallback
-    name = get_symbol_name(decl_id)
-    
-    if asign == T_ERROR:
-        sem_stack.append(T_ERROR)
-    elif asign == T_VOID: 
-        # Sin asignación (Asignar -> lambda)
-        sem_stack.append(tipo)
-    elif asign == tipo:
-        sem_stack.append(tipo)
-    elif tipo == T_FLOAT and asign == T_INT:
-        # Coerción implícita int -> float
-        sem_stack.append(tipo)
-    else:
-        sem_error(f"asignación incorrecta en 'let {name}'. Tipo de la variable es {tipo}, valor asignado es {asign}")
-        sem_stack.append(T_ERROR)
+        # Actualizar símbolo (está en el scope padre/global)
+        sym = self.symtab.get_symbol(self.current_func_id)
+        if sym:
+            sym['type'] = sig
+        else:
+            # Fallback por si acaso
+            self.sem_error(f"No se pudo registrar la función {self.get_symbol_name(self.current_func_id)}")
+
+    def action_fun_end(self):
+        """LF: Fin de función - guarda la tabla local antes de destruirla."""
+
+        # Guardar la tabla de la función antes de destruirla
+        func_name = self.get_symbol_name(self.current_func_id)
+        current_scope = self.symtab.scopes[-1].copy()  # Copia del scope actual
+
+        # Guardar SIEMPRE la tabla (incluso vacía) - requerido por el formato de salida
+        self.function_tables.append((func_name, current_scope))
+
+        # exit_scope también retira las posiciones locales de `symbol_index`
+        self.symtab.exit_scope()
+        self.in_function = False
+
+    def action_cuerpo_lc(self):
+        c1 = self.sem_stack.pop()
+        lc = self.sem_stack.pop()
+        res = c1 if lc == T_OK else T_ERROR
+        self.sem_stack.append(res)
+
+    def action_cuerpo_lambda(self):
+        self.sem_stack.append(T_OK)
+
+    def action_args_init(self):
+        self.temp_type = self.sem_stack[-1] 
+
+    def action_args_id(self):
+        """Args -> Tipo id ArgMore: Acción al procesar 'id' del parámetro.
+
+        Per el EdT: AgregarTipo(id.pos, Tipo.tipo), AgregarDesplazamiento(id.pos, despL)
+        """
+        tipo = self.sem_stack[-1] 
+        self.set_symbol_type(self.last_id_pos, tipo)
+        self.symtab.set_symbol_displacement(self.last_id_pos, self.despL)
+        self.despL += get_width(tipo)
+
+    def action_args_res(self):
+        am = self.sem_stack.pop()
+        t = self.sem_stack.pop()
+        # T_ERROR: el resto de la lista se abandonó por un error sintáctico
+        if am == T_VOID or am == T_ERROR:
+            self.sem_stack.append((t,))
+        else:
+            self.sem_stack.append((t,) + am)
+
+    def action_args_void(self):
+        """Args -> void: Función sin parámetros (explícito void)."""
+        self.sem_stack.append(T_VOID)
+
+    def action_args_lambda(self):
+        """Args -> lambda: Función sin parámetros (implícito)."""
+        self.sem_stack.append(T_VOID)
+
+    def action_argsl_call(self):
+        # Los argumentos se acumulan en una tupla de tipos. Un argumento void
+        # (llamada a una función void) al final de la lista no cuenta: void
+        # marca también el fin de los argumentos.
+        am = self.sem_stack.pop()
+        e = self.sem_stack.pop()
+        if e == T_ERROR or am == T_ERROR:
+            self.sem_stack.append(T_ERROR)
+        elif am == T_VOID:
+            self.sem_stack.append(T_VOID if e == T_VOID else (e,))
+        else:
+            self.sem_stack.append((e,) + am)
+
+    def action_argsl_lambda(self):
+        """ArgsLlamada -> lambda: Llamada sin argumentos."""
+        self.sem_stack.append(T_VOID)
+
+    def action_argsl_void(self):
+        """ArgsLlamada -> void: Llamada explícita sin argumentos."""
+        self.sem_stack.append(T_VOID)
+
+    def action_argmore_call(self):
+        am1 = self.sem_stack.pop()
+        e = self.sem_stack.pop()
+        if e == T_ERROR or am1 == T_ERROR:
+            self.sem_stack.append(T_ERROR)
+        elif am1 == T_VOID:
+            self.sem_stack.append(T_VOID if e == T_VOID else (e,))
+        else:
+            self.sem_stack.append((e,) + am1)
 
-def action_ls_id_pre():
-    """LS -> id IdOpt: Acción PRE al procesar 'id'.
-    
-    Per el EdT: Guardar id.pos para usarlo en IdOpt (que puede modificar last_id_pos).
-    Si el id no existe en TS, se asigna tipo int por defecto (declaración implícita).
-    EdT: despG := despG + 2 (para declaraciones implícitas)
-    """
-    global despG, ls_id_stack
-    
-    # CRÍTICO: Guardar el id ANTES de que IdOpt lo sobrescriba con otros identificadores
-    ls_id_stack.append(last_id_pos)
-    
-    sym_type = get_symbol_type(last_id_pos)
-    if sym_type is None:
-        # Declaración implícita de variable no declarada (comportamiento EdT)
-        set_symbol_type(last_id_pos, T_INT)
-        set_symbol_displacement(last_id_pos, despG)
-        despG += 2  # Per el EdT: despG := despG + 2
-
-def action_ls_id_res():
-    """LS -> id IdOpt: Acción final (después de IdOpt).
-    
-    Per el EdT: Recuperar el id original de ls_id_stack (no usar last_id_pos).
-    """
-    global ls_id_stack
-    
-    idopt = sem_stack.pop()
-    
-    # CRÍTICO: Recuperar el id correcto de la pila (NO usar last_id_pos)
-    if ls_id_stack:
-        id_pos = ls_id_stack.pop()
-    else:
-        id_pos = last_id_pos  # Fallback (no debería ocurrir)
-    
-    sym_type = get_symbol_type(id_pos)
-    name = get_symbol_name(id_pos)
-
-    if idopt == T_ERROR:
-        sem_stack.append(T_ERROR)
-    elif idopt == T_OK: 
-        # Llamada a función con retorno void - verificar que es función
-        if sym_type and "->" in str(sym_type):
-            parts = str(sym_type).split("->")
-            ret_type = parts[1].strip()
-            sem_stack.append(T_OK if ret_type == T_VOID else ret_type)
+    def action_argmore_lambda(self):
+        self.sem_stack.append(T_VOID)
+
+    def action_argmore_tipo(self):
+        self.temp_type = self.sem_stack[-1]
+
+    def action_argmore_id(self):
+        """ArgMore -> comma Tipo id ArgMore: Acción al procesar 'id' del parámetro adicional.
+
+        Per el EdT: AgregarTipo(id.pos, Tipo.tipo), AgregarDesplazamiento(id.pos, despL)
+        """
+        tipo = self.sem_stack[-1]
+        self.set_symbol_type(self.last_id_pos, tipo)
+        self.symtab.set_symbol_displacement(self.last_id_pos, self.despL)
+        self.despL += get_width(tipo)
+
+    def action_argmore_res(self):
+        am1 = self.sem_stack.pop()
+        t = self.sem_stack.pop()
+        if am1 == T_VOID or am1 == T_ERROR:
+            self.sem_stack.append((t,))
         else:
-            sem_stack.append(T_OK)
-    else:
-        # Validación de asignación o retorno función
-        if sym_type and "->" in str(sym_type):
-             # Es llamada, IdOpt es el retorno
-             sem_stack.append(idopt)
-        elif sym_type == idopt:
-             sem_stack.append(sym_type)
-        elif sym_type == T_FLOAT and idopt == T_INT:
-             sem_stack.append(sym_type)
+            self.sem_stack.append((t,) + am1)
+
+    def action_ls_let_pre(self):
+        pass 
+
+    def action_ls_let_id(self):
+        """LS -> let Tipo id Asignar: Acción al procesar 'id'.
+
+        Guarda el id en decl_id_stack para preservarlo durante el análisis de Asignar.
+        Per el EdT: AgregarTipo(id.pos, Tipo.tipo), AgregarDesplazamiento(...)
+
+        IMPORTANTE: Si estamos en una función, debemos forzar la creación del símbolo
+        en el scope local, permitiendo 'shadowing' de variables globales.
+
+        Verificación de redeclaración: Si el símbolo ya tiene desplazamiento asignado
+        en el scope actual, es una redeclaración (error semántico).
+        """
+        tipo = self.sem_stack[-1]
+
+        # Obtener el nombre del símbolo actual
+        sym = self.symtab.get_symbol(self.last_id_pos)
+        if sym:
+            name = sym['lexeme']
+
+            # Verificar redeclaración en el scope actual
+            current_scope = self.symtab.scopes[-1]
+            if name in current_scope:
+                existing_sym = current_scope[name]
+                if existing_sym.get('displacement') is not None:
+                    # Ya fue declarado con 'let' en este scope - ERROR semántico
+                    self.sem_error(f"Variable '{name}' ya declarada en este scope")
+                    # Guardamos en la pila pero NO modificamos desplazamientos
+                    self.decl_id_stack.append(self.last_id_pos)
+                    return
+
+            # Si estamos en una función, verificar si necesitamos crear símbolo local
+            if self.in_function:
+                if name not in current_scope:
+                    # El símbolo existe en scope externo pero no en el local
+                    # Crear nuevo símbolo LOCAL (shadowing)
+                    new_pos = self.symtab.add_symbol_to_current_scope(name, tipo, name)
+                    self.last_id_pos = new_pos  # Actualizar para usar el nuevo símbolo local
+
+        self.set_symbol_type(self.last_id_pos, tipo)
+        w = get_width(tipo)
+
+        # Asignar desplazamiento según el scope
+        if self.in_function:
+            self.symtab.set_symbol_displacement(self.last_id_pos, self.despL)
+            self.despL += w
+        else:
+            self.symtab.set_symbol_displacement(self.last_id_pos, self.despG)
+            self.despG += w
+
+        # Guardar el id para usarlo en action_ls_let_res
+        self.decl_id_stack.append(self.last_id_pos)
+
+    def action_ls_let_res(self):
+        """LS -> let Tipo id Asignar: Acción final (después de Asignar).
+
+        Per el EdT:
+        LS.tipo := if Asignar.igualacion = tipo_error then
+                       if Asignar.tipo = Tipo.tipo then Tipo.tipo
+                       else tipo_error
+                   else Tipo.tipo
+        """
+        asign = self.sem_stack.pop()
+        tipo = self.sem_stack.pop()
+
+        # Recuperar el id correcto de la pila
+        if self.decl_id_stack:
+            decl_id = self.decl_id_stack.pop()
         else:
-             sem_error(f"asignación incorrecta a '{name}'. Tipo de la variable es {sym_type}, valor asignado es {idopt}")
-             sem_stack.append(T_ERROR)
+            decl_id = self.last_id_pos  # Fallback
+        name = self.get_symbol_name(decl_id)
+
+        if asign == T_ERROR:
+            self.sem_stack.append(T_ERROR)
+        elif asign == T_VOID: 
+            # Sin asignación (Asignar -> lambda)
+            self.sem_stack.append(tipo)
+        elif (tipo, asign) in ASSIGNABLE:
+            # Mismo tipo o coerción implícita int -> float
+            self.sem_stack.append(tipo)
+        else:
+            self.sem_error(f"asignación incorrecta en 'let {name}'. Tipo de la variable es {tipo}, valor asignado es {asign}")
+            self.sem_stack.append(T_ERROR)
 
-def action_ls_read():
-    sem_stack.append(T_OK)
+    def action_ls_id_pre(self):
+        """LS -> id IdOpt: Acción PRE al procesar 'id'.
 
-def action_ls_write():
-    """LS -> write Expresion
-    
-    Per el EdT:
-    LS.tipo := if Expresion.tipo = int then tipo_ok
-               else if Expresion.tipo = float then tipo_ok
-               else if Expresion.tipo = string then tipo_ok
-               else tipo_error
-    
-    Nota: boolean NO está permitido según el EdT.
-    """
-    t = sem_stack.pop()
-    if t in [T_INT, T_FLOAT, T_STRING]:
-        sem_stack.append(T_OK)
-    else:
-        sem_error(f"write() no soporta el tipo {t}")
-        sem_stack.append(T_ERROR)
+        Per el EdT: Guardar id.pos para usarlo en IdOpt (que puede modificar last_id_pos).
+        Si el id no existe en TS, se asigna tipo int por defecto (declaración implícita).
+        EdT: despG := despG + 2 (para declaraciones implícitas)
+        """
 
-def action_ls_return():
-    t = sem_stack.pop()
-    sem_stack.append(t) 
+        # CRÍTICO: Guardar el id ANTES de que IdOpt lo sobrescriba con otros identificadores
+        self.ls_id_stack.append(self.last_id_pos)
 
-def action_idopt_call():
-    """IdOpt -> oppar ArgsLlamada clpar: Llamada a función.
-    
-    Per el EdT: IdOpt.tipo := ArgsLlamada.tipo, IdOpt.igualacion := tipo_ok
-    CRÍTICO: Usar ls_id_stack[-1] (NO last_id_pos) para obtener el id de la función.
-    """
-    global ls_id_stack
-    
-    args_llamada = sem_stack.pop()
-    
-    # CRÍTICO: El id de la función está en ls_id_stack (NO en last_id_pos)
-    # last_id_pos ahora contiene el último argumento procesado
-    if ls_id_stack:
-        func_id = ls_id_stack[-1]  # Peek (no pop, lo hace action_ls_id_res)
-    else:
-        func_id = last_id_pos  # Fallback
-    
-    sym_type = get_symbol_type(func_id)
-    name = get_symbol_name(func_id)
-    
-    if not sym_type:
-        sem_error(f"Función no declarada: {name}")
-        sem_stack.append(T_ERROR)
-    elif "->" not in str(sym_type):
-        sem_error(f"'{name}' no es una función (es {sym_type})")
-        sem_stack.append(T_ERROR)
-    else:
-        parts = str(sym_type).split("->")
-        ret_type = parts[1].strip()
-        # Empujar T_OK como marcador de igualacion (llamada válida)
-        sem_stack.append(T_OK)
-
-def action_idopt_eq():
-    pass 
-
-def action_idopt_pluseq():
-    t = sem_stack.pop()
-    if t in [T_INT, T_FLOAT]:
-        sem_stack.append(t)
-    else:
-        sem_error("Operador += requiere tipo numérico")
-        sem_stack.append(T_ERROR)
-
-# Tipos Primitivos
-def action_type_int(): sem_stack.append(T_INT)
-def action_type_float(): sem_stack.append(T_FLOAT)
-def action_type_string(): sem_stack.append(T_STRING)
-def action_type_bool(): sem_stack.append(T_BOOL)
-def action_type_void(): sem_stack.append(T_VOID)
-def action_type_inherit(): pass 
-
-def action_asign_eq():
-    pass 
-
-def action_asign_lambda():
-    sem_stack.append(T_VOID)
-
-def action_ret_exp():
-    pass 
-
-def action_ret_lambda():
-    sem_stack.append(T_VOID)
-
-def action_exp_logic():
-    aux = sem_stack.pop()
-    e1 = sem_stack.pop()
-    if aux == T_VOID: sem_stack.append(e1)
-    elif aux == T_BOOL and e1 == T_BOOL: sem_stack.append(T_BOOL)
-    elif aux == e1: sem_stack.append(T_BOOL)
-    else: 
-        sem_stack.append(T_ERROR)
-
-def action_expaux_and():
-    # ExpresionAux -> and Expresion1 ExpresionAux
-    # Pila: [Expresion1.tipo, ExpresionAux.tipo]
-    aux = sem_stack.pop()   # ExpresionAux recursivo
-    e1 = sem_stack.pop()    # Expresion1
-    if e1 == T_BOOL:
-        if aux == T_VOID:
-            sem_stack.append(T_BOOL)
-        elif aux == T_BOOL:
-            sem_stack.append(T_BOOL)
+        sym_type = self.get_symbol_type(self.last_id_pos)
+        if sym_type is None:
+            # Declaración implícita de variable no declarada (comportamiento EdT)
+            self.set_symbol_type(self.last_id_pos, T_INT)
+            self.symtab.set_symbol_displacement(self.last_id_pos, self.despG)
+            self.despG += 2  # Per el EdT: despG := despG + 2
+
+    def action_ls_id_res(self):
+        """LS -> id IdOpt: Acción final (después de IdOpt).
+
+        Per el EdT: Recuperar el id original de ls_id_stack (no usar last_id_pos).
+        """
+
+        idopt = self.sem_stack.pop()
+
+        # CRÍTICO: Recuperar el id correcto de la pila (NO usar last_id_pos)
+        if self.ls_id_stack:
+            id_pos = self.ls_id_stack.pop()
         else:
-            sem_stack.append(T_ERROR)
-    else:
-        sem_error(f"Operador && requiere boolean. Recibido: {e1}")
-        sem_stack.append(T_ERROR)
-
-def action_expaux_lambda():
-    sem_stack.append(T_VOID)
-
-def action_exp1_rel():
-    aux = sem_stack.pop()
-    e2 = sem_stack.pop()
-    if aux == T_VOID: sem_stack.append(e2)
-    elif aux == T_BOOL: sem_stack.append(T_BOOL) 
-    else: sem_stack.append(T_ERROR)
-
-def action_exp1aux_min():
-    # Expresion1Aux -> minorthan Expresion2 Expresion1Aux
-    # Pila: [Expresion2.tipo, Expresion1Aux.tipo]
-    aux = sem_stack.pop()   # Expresion1Aux recursivo
-    e2 = sem_stack.pop()    # Expresion2
-    if e2 in [T_INT, T_FLOAT]:
-        # < siempre produce boolean, independiente del aux recursivo
-        sem_stack.append(T_BOOL)
-    else:
-        sem_error(f"Operador < requiere numéricos. Recibido: {e2}")
-        sem_stack.append(T_ERROR)
-
-def action_exp1aux_lambda():
-    sem_stack.append(T_VOID)
-
-def action_exp2_arit():
-    aux = sem_stack.pop()
-    e3 = sem_stack.pop()
-    if aux == T_VOID: sem_stack.append(e3)
-    elif aux == e3: sem_stack.append(e3)
-    elif (e3 == T_FLOAT and aux == T_INT) or (e3 == T_INT and aux == T_FLOAT):
-        sem_stack.append(T_FLOAT) 
-    else: sem_stack.append(T_ERROR)
-
-def action_exp2aux_sum():
-    # Expresion2Aux -> sum Expresion3 Expresion2Aux
-    # Pila: [Expresion3.tipo, Expresion2Aux.tipo]
-    aux = sem_stack.pop()   # Expresion2Aux recursivo
-    e3 = sem_stack.pop()    # Expresion3
-    if aux == T_VOID:
-        # No hay más sumas, el tipo es el de Expresion3
-        sem_stack.append(e3)
-    elif e3 in [T_INT, T_FLOAT] and aux in [T_INT, T_FLOAT]:
-        # Coerción: si alguno es float, resultado es float
-        if e3 == T_FLOAT or aux == T_FLOAT:
-            sem_stack.append(T_FLOAT)
+            id_pos = self.last_id_pos  # Fallback (no debería ocurrir)
+
+        sym_type = self.get_symbol_type(id_pos)
+        name = self.get_symbol_name(id_pos)
+
+        if idopt == T_ERROR:
+            self.sem_stack.append(T_ERROR)
+        elif idopt == T_OK: 
+            # Llamada a función con retorno void - verificar que es función
+            if isinstance(sym_type, FunctionType):
+                ret_type = sym_type.ret
+                self.sem_stack.append(T_OK if ret_type == T_VOID else ret_type)
+            else:
+                self.sem_stack.append(T_OK)
         else:
-            sem_stack.append(T_INT)
-    else:
-        sem_stack.append(T_ERROR)
+            # Validación de asignación o retorno función
+            if isinstance(sym_type, FunctionType):
+                 # Es llamada, IdOpt es el retorno
+                 self.sem_stack.append(idopt)
+            elif (sym_type, idopt) in ASSIGNABLE:
+                 self.sem_stack.append(sym_type)
+            else:
+                 self.sem_error(f"asignación incorrecta a '{name}'. Tipo de la variable es {sym_type}, valor asignado es {idopt}")
+                 self.sem_stack.append(T_ERROR)
 
-def action_exp2aux_lambda():
-    sem_stack.append(T_VOID)
+    def action_ls_read(self):
+        self.sem_stack.append(T_OK)
 
-def action_exp3_par():
-    pass 
+    def action_ls_write(self):
+        """LS -> write Expresion
 
-def action_exp3_id_pre():
-    global id_stack
-    id_stack.append(last_id_pos)
+        Per el EdT:
+        LS.tipo := if Expresion.tipo = int then tipo_ok
+                   else if Expresion.tipo = float then tipo_ok
+                   else if Expresion.tipo = string then tipo_ok
+                   else tipo_error
 
-def action_exp3_id():
-    """Expresion3 -> id Expresion4: Evalúa un identificador en una expresión.
-    
-    Per el EdT:
-    Expresion3.tipo := if BuscaTipoTS(id.pos) := Expresion4.tipo -> t then t
-                       else if BuscaTipoTS(id.pos) := s -> t then tipo_error
-                       else BuscaTipoTS(id.pos)
-    
-    REGLA MyJS: Si la variable no ha sido declarada (tipo == 'ID'), se declara
-    implícitamente como int global.
-    """
-    global id_stack, despG
-    
-    e4 = sem_stack.pop()
-    
-    # Recuperar el id correcto de la pila (el que empujamos en action_exp3_id_pre)
-    if id_stack:
-        id_pos = id_stack.pop()
-    else:
-        id_pos = last_id_pos  # Fallback (no debería ocurrir)
-    
-    sym_type = get_symbol_type(id_pos)
-    name = get_symbol_name(id_pos)
-    
-    # REGLA MyJS: Si sym_type == 'ID', la variable no fue declarada formalmente.
-    # Se declara implícitamente como int global.
-    if sym_type is None or sym_type == 'ID':
-        # Declaración implícita: variable global de tipo int
-        set_symbol_type(id_pos, T_INT)
-        set_symbol_displacement(id_pos, despG)
-        despG += get_width(T_INT)
-        sym_type = T_INT  # Actualizar para el resto de la lógica
-
-    # Caso 1: Expresion4 -> lambda (e4 == T_VOID): id usado como variable
-    if e4 == T_VOID:
-        if "->" in str(sym_type):
-             sem_error(f"Uso de función '{name}' sin paréntesis")
-             sem_stack.append(T_ERROR)
+        Nota: boolean NO está permitido según el EdT.
+        """
+        t = self.sem_stack.pop()
+        if t in WRITABLE:
+            self.sem_stack.append(T_OK)
         else:
-             sem_stack.append(sym_type)
-    # Caso 2: Expresion4 -> oppar ArgsLlamada clpar: id usado como llamada a función
-    elif isinstance(e4, tuple) and e4[0] == "CALL":
-        args_tipo = e4[1]  # Tipos de los argumentos pasados
-        
-        if "->" not in str(sym_type):
-            sem_error(f"'{name}' no es una función (es {sym_type})")
-            sem_stack.append(T_ERROR)
+            self.sem_error(f"write() no soporta el tipo {t}")
+            self.sem_stack.append(T_ERROR)
+
+    def action_ls_return(self):
+        t = self.sem_stack.pop()
+        self.sem_stack.append(t) 
+
+    def action_idopt_call(self):
+        """IdOpt -> oppar ArgsLlamada clpar: Llamada a función.
+
+        Per el EdT: IdOpt.tipo := ArgsLlamada.tipo, IdOpt.igualacion := tipo_ok
+        CRÍTICO: Usar ls_id_stack[-1] (NO last_id_pos) para obtener el id de la función.
+        """
+
+        args_llamada = self.sem_stack.pop()
+
+        # CRÍTICO: El id de la función está en ls_id_stack (NO en last_id_pos)
+        # last_id_pos ahora contiene el último argumento procesado
+        if self.ls_id_stack:
+            func_id = self.ls_id_stack[-1]  # Peek (no pop, lo hace action_ls_id_res)
         else:
-            # sym_type tiene formato: "args_esperados -> ret_type"
-            parts = str(sym_type).split("->")
-            expected_args = parts[0].strip()
-            ret_type = parts[1].strip()
-            
-            # Validar que los argumentos pasados coincidan con los esperados
-            if args_tipo == expected_args:
-                # Coincidencia exacta de tipos
-                sem_stack.append(ret_type)
-            elif args_tipo == T_VOID and expected_args == "":
-                # Llamada sin argumentos a función sin parámetros
-                sem_stack.append(ret_type)
+            func_id = self.last_id_pos  # Fallback
+
+        sym_type = self.get_symbol_type(func_id)
+        name = self.get_symbol_name(func_id)
+
+        if not sym_type:
+            self.sem_error(f"Función no declarada: {name}")
+            self.sem_stack.append(T_ERROR)
+        elif not isinstance(sym_type, FunctionType):
+            self.sem_error(f"'{name}' no es una función (es {sym_type})")
+            self.sem_stack.append(T_ERROR)
+        else:
+            # Empujar T_OK como marcador de igualacion (llamada válida)
+            self.sem_stack.append(T_OK)
+
+    def action_idopt_eq(self):
+        pass 
+
+    def action_idopt_pluseq(self):
+        t = self.sem_stack.pop()
+        if t in NUMERIC:
+            self.sem_stack.append(t)
+        else:
+            self.sem_error("Operador += requiere tipo numérico")
+            self.sem_stack.append(T_ERROR)
+
+    # Tipos Primitivos
+    def action_type_int(self): self.sem_stack.append(T_INT)
+    def action_type_float(self): self.sem_stack.append(T_FLOAT)
+    def action_type_string(self): self.sem_stack.append(T_STRING)
+    def action_type_bool(self): self.sem_stack.append(T_BOOL)
+    def action_type_void(self): self.sem_stack.append(T_VOID)
+    def action_type_inherit(self): pass 
+
+    def action_asign_eq(self):
+        pass 
+
+    def action_asign_lambda(self):
+        self.sem_stack.append(T_VOID)
+
+    def action_ret_exp(self):
+        pass 
+
+    def action_ret_lambda(self):
+        self.sem_stack.append(T_VOID)
+
+    def action_exp_logic(self):
+        aux = self.sem_stack.pop()
+        e1 = self.sem_stack.pop()
+        if aux == T_VOID: self.sem_stack.append(e1)
+        elif aux == T_BOOL and e1 == T_BOOL: self.sem_stack.append(T_BOOL)
+        elif aux == e1: self.sem_stack.append(T_BOOL)
+        else: 
+            self.sem_stack.append(T_ERROR)
+
+    def action_expaux_and(self):
+        # ExpresionAux -> and Expresion1 ExpresionAux
+        # Pila: [Expresion1.tipo, ExpresionAux.tipo]
+        aux = self.sem_stack.pop()   # ExpresionAux recursivo
+        e1 = self.sem_stack.pop()    # Expresion1
+        if e1 == T_BOOL:
+            if aux == T_VOID:
+                self.sem_stack.append(T_BOOL)
+            elif aux == T_BOOL:
+                self.sem_stack.append(T_BOOL)
             else:
-                # Error: tipos de argumentos no coinciden
-                sem_error(f"Llamada a '{name}': argumentos incompatibles. Esperado ({expected_args}), recibido ({args_tipo})")
-                sem_stack.append(T_ERROR)
-    else:
-        # Fallback inesperado
-        sem_error(f"Estado inesperado en expresión con '{name}'")
-        sem_stack.append(T_ERROR)
-
-def action_exp4_call():
-    # ArgsLlamada.tipo ya está en la pila, solo marcamos que es una llamada
-    # Reemplazamos el tipo de ArgsLlamada con un marcador de llamada + los args
-    args_tipo = sem_stack.pop()
-    sem_stack.append(("CALL", args_tipo))
-
-def action_exp4_lambda():
-    # Expresion4 -> lambda (id usado como variable, no como llamada)
-    sem_stack.append(T_VOID)
-
-# --- MAPEO COMPLETO DE REGLAS ---
-# Según Gramatica.txt y Esquema_de_traduccion.txt actualizados
-
-SEMANTIC_RULES = {
-    # S -> LC S | LF S | eof
-    ('S', ('LC', 'S')): [(0, action_init_global)],
-    ('S', ('LF', 'S')): [(0, action_init_global)],
-    ('S', ('eof',)): [(0, action_init_global)],
-    
-    # LC -> LS semicolon | if oppar Expresion clpar CuerpoIf
-    ('LC', ('LS', 'semicolon')): [(2, action_lc_check)],
-    ('LC', ('if', 'oppar', 'Expresion', 'clpar', 'CuerpoIf')): [(5, action_lc_if)],
-    
-    # LF -> function TypeFun id oppar Args clpar opbra Cuerpo clbra
-    ('LF', ('function', 'TypeFun', 'id', 'oppar', 'Args', 'clpar', 'opbra', 'Cuerpo', 'clbra')): 
-        [(3, action_fun_init), (6, action_fun_def), (9, action_fun_end)],
-    
-    # CuerpoIf -> opbra Cuerpo clbra LE | LC
-    ('CuerpoIf', ('opbra', 'Cuerpo', 'clbra', 'LE')): [(4, action_cuerpoif_block)],
-    ('CuerpoIf', ('LC',)): [(1, action_cuerpoif_lc)],
-    
-    # LE -> else opbra Cuerpo clbra | lambda
-    ('LE', ('else', 'opbra', 'Cuerpo', 'clbra')): [(4, action_le_else)],
-    ('LE', ('lambda',)): [(1, action_le_lambda)],
-    
-    # Cuerpo -> LC Cuerpo | lambda
-    ('Cuerpo', ('LC', 'Cuerpo')): [(2, action_cuerpo_lc)],
-    ('Cuerpo', ('lambda',)): [(1, action_cuerpo_lambda)],
-    
-    # Args -> Tipo id ArgMore | void | lambda
-    ('Args', ('Tipo', 'id', 'ArgMore')): [(1, action_args_init), (2, action_args_id), (3, action_args_res)],
-    ('Args', ('void',)): [(1, action_args_void)],
-    ('Args', ('lambda',)): [(1, action_args_lambda)],
-    
-    # ArgMore -> comma Tipo id ArgMore | lambda
-    ('ArgMore', ('comma', 'Tipo', 'id', 'ArgMore')): [(2, action_argmore_tipo), (3, action_argmore_id), (4, action_argmore_res)],
-    ('ArgMore', ('lambda',)): [(1, action_argmore_lambda)],
-    
-    # ArgsLlamada -> Expresion ArgMoreLlamada | void | lambda
-    ('ArgsLlamada', ('Expresion', 'ArgMoreLlamada')): [(2, action_argsl_call)],
-    ('ArgsLlamada', ('void',)): [(1, action_argsl_void)],
-    ('ArgsLlamada', ('lambda',)): [(1, action_argsl_lambda)],
-    
-    # ArgMoreLlamada -> comma Expresion ArgMoreLlamada | lambda
-    ('ArgMoreLlamada', ('comma', 'Expresion', 'ArgMoreLlamada')): [(3, action_argmore_call)],
-    ('ArgMoreLlamada', ('lambda',)): [(1, action_argmore_lambda)],
-    
-    # LS -> let Tipo id Asignar | id IdOpt | read id | write Expresion | return ExpReturn
-    ('LS', ('let', 'Tipo', 'id', 'Asignar')): [(2, action_ls_let_pre), (3, action_ls_let_id), (4, action_ls_let_res)],
-    ('LS', ('id', 'IdOpt')): [(1, action_ls_id_pre), (2, action_ls_id_res)],
-    ('LS', ('read', 'id')): [(2, action_ls_read)],
-    ('LS', ('write', 'Expresion')): [(2, action_ls_write)],
-    ('LS', ('return', 'ExpReturn')): [(2, action_ls_return)],
-    
-    # IdOpt -> oppar ArgsLlamada clpar | eq Expresion | pluseq Expresion
-    ('IdOpt', ('oppar', 'ArgsLlamada', 'clpar')): [(3, action_idopt_call)],
-    ('IdOpt', ('eq', 'Expresion')): [(2, action_idopt_eq)],
-    ('IdOpt', ('pluseq', 'Expresion')): [(2, action_idopt_pluseq)],
-    
-    # TypeFun -> void | Tipo
-    ('TypeFun', ('void',)): [(1, action_type_void)],
-    ('TypeFun', ('Tipo',)): [(1, action_type_inherit)],
-    
-    # Tipo -> int | float | string | boolean
-    ('Tipo', ('int',)): [(1, action_type_int)],
-    ('Tipo', ('float',)): [(1, action_type_float)],
-    ('Tipo', ('string',)): [(1, action_type_string)],
-    ('Tipo', ('boolean',)): [(1, action_type_bool)],
-    
-    # Asignar -> eq Expresion | lambda
-    ('Asignar', ('eq', 'Expresion')): [(2, action_asign_eq)],
-    ('Asignar', ('lambda',)): [(1, action_asign_lambda)],
-    
-    # ExpReturn -> Expresion | lambda
-    ('ExpReturn', ('Expresion',)): [(1, action_ret_exp)],
-    ('ExpReturn', ('lambda',)): [(1, action_ret_lambda)],
-    
-    # Expresion -> Expresion1 ExpresionAux
-    ('Expresion', ('Expresion1', 'ExpresionAux')): [(2, action_exp_logic)],
-    
-    # ExpresionAux -> and Expresion1 ExpresionAux | lambda
-    ('ExpresionAux', ('and', 'Expresion1', 'ExpresionAux')): [(3, action_expaux_and)],
-    ('ExpresionAux', ('lambda',)): [(1, action_expaux_lambda)],
-    
-    # Expresion1 -> Expresion2 Expresion1Aux
-    ('Expresion1', ('Expresion2', 'Expresion1Aux')): [(2, action_exp1_rel)],
-    
-    # Expresion1Aux -> minorthan Expresion2 Expresion1Aux | lambda
-    ('Expresion1Aux', ('minorthan', 'Expresion2', 'Expresion1Aux')): [(3, action_exp1aux_min)],
-    ('Expresion1Aux', ('lambda',)): [(1, action_exp1aux_lambda)],
-    
-    # Expresion2 -> Expresion3 Expresion2Aux
-    ('Expresion2', ('Expresion3', 'Expresion2Aux')): [(2, action_exp2_arit)],
-    
-    # Expresion2Aux -> sum Expresion3 Expresion2Aux | lambda
-    ('Expresion2Aux', ('sum', 'Expresion3', 'Expresion2Aux')): [(3, action_exp2aux_sum)],
-    ('Expresion2Aux', ('lambda',)): [(1, action_exp2aux_lambda)],
-    
-    # Expresion3 -> oppar Expresion clpar | intconst | floatconst | str | true | false | id Expresion4
-    ('Expresion3', ('oppar', 'Expresion', 'clpar')): [(3, action_exp3_par)],
-    ('Expresion3', ('intconst',)): [(1, action_type_int)],
-    ('Expresion3', ('floatconst',)): [(1, action_type_float)],
-    ('Expresion3', ('str',)): [(1, action_type_string)],
-    ('Expresion3', ('true',)): [(1, action_type_bool)],
-    ('Expresion3', ('false',)): [(1, action_type_bool)],
-    ('Expresion3', ('id', 'Expresion4')): [(1, action_exp3_id_pre), (2, action_exp3_id)],
-    
-    # Expresion4 -> oppar ArgsLlamada clpar | lambda
-    ('Expresion4', ('oppar', 'ArgsLlamada', 'clpar')): [(3, action_exp4_call)],
-    ('Expresion4', ('lambda',)): [(1, action_exp4_lambda)],
-}
+                self.sem_stack.append(T_ERROR)
+        else:
+            self.sem_error(f"Operador && requiere boolean. Recibido: {e1}")
+            self.sem_stack.append(T_ERROR)
+
+    def action_expaux_lambda(self):
+        self.sem_stack.append(T_VOID)
+
+    def action_exp1_rel(self):
+        aux = self.sem_stack.pop()
+        e2 = self.sem_stack.pop()
+        if aux == T_VOID: self.sem_stack.append(e2)
+        elif aux == T_BOOL: self.sem_stack.append(T_BOOL) 
+        else: self.sem_stack.append(T_ERROR)
+
+    def action_exp1aux_min(self):
+        # Expresion1Aux -> minorthan Expresion2 Expresion1Aux
+        # Pila: [Expresion2.tipo, Expresion1Aux.tipo]
+        aux = self.sem_stack.pop()   # Expresion1Aux recursivo
+        e2 = self.sem_stack.pop()    # Expresion2
+        if e2 in NUMERIC:
+            # < siempre produce boolean, independiente del aux recursivo
+            self.sem_stack.append(T_BOOL)
+        else:
+            self.sem_error(f"Operador < requiere numéricos. Recibido: {e2}")
+            self.sem_stack.append(T_ERROR)
+
+    def action_exp1aux_lambda(self):
+        self.sem_stack.append(T_VOID)
+
+    def action_exp2_arit(self):
+        aux = self.sem_stack.pop()
+        e3 = self.sem_stack.pop()
+        if aux == T_VOID: self.sem_stack.append(e3)
+        elif aux == e3: self.sem_stack.append(e3)
+        else: self.sem_stack.append(SUM_TYPE.get((e3, aux), T_ERROR))
+
+    def action_exp2aux_sum(self):
+        # Expresion2Aux -> sum Expresion3 Expresion2Aux
+        # Pila: [Expresion3.tipo, Expresion2Aux.tipo]
+        aux = self.sem_stack.pop()   # Expresion2Aux recursivo
+        e3 = self.sem_stack.pop()    # Expresion3
+        if aux == T_VOID:
+            # No hay más sumas, el tipo es el de Expresion3
+            self.sem_stack.append(e3)
+        else:
+            # Coerción: si alguno es float, resultado es float (tipo_error si no son numéricos)
+            self.sem_stack.append(SUM_TYPE.get((e3, aux), T_ERROR))
+
+    def action_exp2aux_lambda(self):
+        self.sem_stack.append(T_VOID)
+
+    def action_exp3_par(self):
+        pass 
+
+    def action_exp3_id_pre(self):
+        self.id_stack.append(self.last_id_pos)
+
+    def action_exp3_id(self):
+        """Expresion3 -> id Expresion4: Evalúa un identificador en una expresión.
+
+        Per el EdT:
+        Expresion3.tipo := if BuscaTipoTS(id.pos) := Expresion4.tipo -> t then t
+                           else if BuscaTipoTS(id.pos) := s -> t then tipo_error
+                           else BuscaTipoTS(id.pos)
+
+        REGLA MyJS: Si la variable no ha sido declarada (tipo == 'ID'), se declara
+        implícitamente como int global.
+        """
+
+        e4 = self.sem_stack.pop()
+
+        # Recuperar el id correcto de la pila (el que empujamos en action_exp3_id_pre)
+        if self.id_stack:
+            id_pos = self.id_stack.pop()
+        else:
+            id_pos = self.last_id_pos  # Fallback (no debería ocurrir)
+
+        sym_type = self.get_symbol_type(id_pos)
+        name = self.get_symbol_name(id_pos)
+
+        # REGLA MyJS: Si sym_type == 'ID', la variable no fue declarada formalmente.
+        # Se declara implícitamente como int global.
+        if sym_type is None or sym_type == 'ID':
+            # Declaración implícita: variable global de tipo int
+            self.set_symbol_type(id_pos, T_INT)
+            self.symtab.set_symbol_displacement(id_pos, self.despG)
+            self.despG += get_width(T_INT)
+            sym_type = T_INT  # Actualizar para el resto de la lógica
+
+        # Caso 1: Expresion4 -> lambda (e4 == T_VOID): id usado como variable
+        if e4 == T_VOID:
+            if isinstance(sym_type, FunctionType):
+                 self.sem_error(f"Uso de función '{name}' sin paréntesis")
+                 self.sem_stack.append(T_ERROR)
+            else:
+                 self.sem_stack.append(sym_type)
+        # Caso 2: Expresion4 -> oppar ArgsLlamada clpar: id usado como llamada a función
+        elif isinstance(e4, tuple) and e4[0] == "CALL":
+            args_tipo = e4[1]  # Tipos de los argumentos pasados
+
+            if not isinstance(sym_type, FunctionType):
+                self.sem_error(f"'{name}' no es una función (es {sym_type})")
+                self.sem_stack.append(T_ERROR)
+            else:
+                expected_args = sym_type.params
+
+                # Validar que los argumentos pasados coincidan con los esperados
+                if args_tipo == expected_args:
+                    # Coincidencia exacta de tipos
+                    self.sem_stack.append(sym_type.ret)
+                elif args_tipo == T_VOID and not expected_args:
+                    # Llamada sin argumentos a función sin parámetros
+                    self.sem_stack.append(sym_type.ret)
+                else:
+                    # Error: tipos de argumentos no coinciden
+                    self.sem_error(f"Llamada a '{name}': argumentos incompatibles. Esperado ({args_text(expected_args) or T_VOID}), recibido ({args_text(args_tipo)})")
+                    self.sem_stack.append(T_ERROR)
+        # Expresion4 abandonado por un error sintáctico (modo recuperación)
+        elif e4 == T_ERROR:
+            self.sem_stack.append(T_ERROR)
+        else:
+            # Fallback inesperado
+            self.sem_error(f"Estado inesperado en expresión con '{name}'")
+            self.sem_stack.append(T_ERROR)
+
+    def action_exp4_call(self):
+        # ArgsLlamada.tipo ya está en la pila, solo marcamos que es una llamada
+        # Reemplazamos el tipo de ArgsLlamada con un marcador de llamada + los args
+        args_tipo = self.sem_stack.pop()
+        self.sem_stack.append(("CALL", args_tipo))
+
+    def action_exp4_lambda(self):
+        # Expresion4 -> lambda (id usado como variable, no como llamada)
+        self.sem_stack.append(T_VOID)
+
+    # --- MAPEO COMPLETO DE REGLAS ---
+    # Según Gramatica.txt y Esquema_de_traduccion.txt actualizados
+
+    SEMANTIC_RULES = {
+        # S -> LC S | LF S | eof
+        ('S', ('LC', 'S')): [(0, action_init_global)],
+        ('S', ('LF', 'S')): [(0, action_init_global)],
+        ('S', ('eof',)): [(0, action_init_global)],
+
+        # LC -> LS semicolon | if oppar Expresion clpar CuerpoIf
+        ('LC', ('LS', 'semicolon')): [(2, action_lc_check)],
+        ('LC', ('if', 'oppar', 'Expresion', 'clpar', 'CuerpoIf')): [(5, action_lc_if)],
+
+        # LF -> function TypeFun id oppar Args clpar opbra Cuerpo clbra
+        ('LF', ('function', 'TypeFun', 'id', 'oppar', 'Args', 'clpar', 'opbra', 'Cuerpo', 'clbra')): 
+            [(3, action_fun_init), (6, action_fun_def), (9, action_fun_end)],
+
+        # CuerpoIf -> opbra Cuerpo clbra LE | LC
+        ('CuerpoIf', ('opbra', 'Cuerpo', 'clbra', 'LE')): [(4, action_cuerpoif_block)],
+        ('CuerpoIf', ('LC',)): [(1, action_cuerpoif_lc)],
+
+        # LE -> else opbra Cuerpo clbra | lambda
+        ('LE', ('else', 'opbra', 'Cuerpo', 'clbra')): [(4, action_le_else)],
+        ('LE', ('lambda',)): [(1, action_le_lambda)],
+
+        # Cuerpo -> LC Cuerpo | lambda
+        ('Cuerpo', ('LC', 'Cuerpo')): [(2, action_cuerpo_lc)],
+        ('Cuerpo', ('lambda',)): [(1, action_cuerpo_lambda)],
+
+        # Args -> Tipo id ArgMore | void | lambda
+        ('Args', ('Tipo', 'id', 'ArgMore')): [(1, action_args_init), (2, action_args_id), (3, action_args_res)],
+        ('Args', ('void',)): [(1, action_args_void)],
+        ('Args', ('lambda',)): [(1, action_args_lambda)],
+
+        # ArgMore -> comma Tipo id ArgMore | lambda
+        ('ArgMore', ('comma', 'Tipo', 'id', 'ArgMore')): [(2, action_argmore_tipo), (3, action_argmore_id), (4, action_argmore_res)],
+        ('ArgMore', ('lambda',)): [(1, action_argmore_lambda)],
+
+        # ArgsLlamada -> Expresion ArgMoreLlamada | void | lambda
+        ('ArgsLlamada', ('Expresion', 'ArgMoreLlamada')): [(2, action_argsl_call)],
+        ('ArgsLlamada', ('void',)): [(1, action_argsl_void)],
+        ('ArgsLlamada', ('lambda',)): [(1, action_argsl_lambda)],
+
+        # ArgMoreLlamada -> comma Expresion ArgMoreLlamada | lambda
+        ('ArgMoreLlamada', ('comma', 'Expresion', 'ArgMoreLlamada')): [(3, action_argmore_call)],
+        ('ArgMoreLlamada', ('lambda',)): [(1, action_argmore_lambda)],
+
+        # LS -> let Tipo id Asignar | id IdOpt | read id | write Expresion | return ExpReturn
+        ('LS', ('let', 'Tipo', 'id', 'Asignar')): [(2, action_ls_let_pre), (3, action_ls_let_id), (4, action_ls_let_res)],
+        ('LS', ('id', 'IdOpt')): [(1, action_ls_id_pre), (2, action_ls_id_res)],
+        ('LS', ('read', 'id')): [(2, action_ls_read)],
+        ('LS', ('write', 'Expresion')): [(2, action_ls_write)],
+        ('LS', ('return', 'ExpReturn')): [(2, action_ls_return)],
+
+        # IdOpt -> oppar ArgsLlamada clpar | eq Expresion | pluseq Expresion
+        ('IdOpt', ('oppar', 'ArgsLlamada', 'clpar')): [(3, action_idopt_call)],
+        ('IdOpt', ('eq', 'Expresion')): [(2, action_idopt_eq)],
+        ('IdOpt', ('pluseq', 'Expresion')): [(2, action_idopt_pluseq)],
+
+        # TypeFun -> void | Tipo
+        ('TypeFun', ('void',)): [(1, action_type_void)],
+        ('TypeFun', ('Tipo',)): [(1, action_type_inherit)],
+
+        # Tipo -> int | float | string | boolean
+        ('Tipo', ('int',)): [(1, action_type_int)],
+        ('Tipo', ('float',)): [(1, action_type_float)],
+        ('Tipo', ('string',)): [(1, action_type_string)],
+        ('Tipo', ('boolean',)): [(1, action_type_bool)],
+
+        # Asignar -> eq Expresion | lambda
+        ('Asignar', ('eq', 'Expresion')): [(2, action_asign_eq)],
+        ('Asignar', ('lambda',)): [(1, action_asign_lambda)],
+
+        # ExpReturn -> Expresion | lambda
+        ('ExpReturn', ('Expresion',)): [(1, action_ret_exp)],
+        ('ExpReturn', ('lambda',)): [(1, action_ret_lambda)],
+
+        # Expresion -> Expresion1 ExpresionAux
+        ('Expresion', ('Expresion1', 'ExpresionAux')): [(2, action_exp_logic)],
+
+        # ExpresionAux -> and Expresion1 ExpresionAux | lambda
+        ('ExpresionAux', ('and', 'Expresion1', 'ExpresionAux')): [(3, action_expaux_and)],
+        ('ExpresionAux', ('lambda',)): [(1, action_expaux_lambda)],
+
+        # Expresion1 -> Expresion2 Expresion1Aux
+        ('Expresion1', ('Expresion2', 'Expresion1Aux')): [(2, action_exp1_rel)],
+
+        # Expresion1Aux -> minorthan Expresion2 Expresion1Aux | lambda
+        ('Expresion1Aux', ('minorthan', 'Expresion2', 'Expresion1Aux')): [(3, action_exp1aux_min)],
+        ('Expresion1Aux', ('lambda',)): [(1, action_exp1aux_lambda)],
+
+        # Expresion2 -> Expresion3 Expresion2Aux
+        ('Expresion2', ('Expresion3', 'Expresion2Aux')): [(2, action_exp2_arit)],
+
+        # Expresion2Aux -> sum Expresion3 Expresion2Aux | lambda
+        ('Expresion2Aux', ('sum', 'Expresion3', 'Expresion2Aux')): [(3, action_exp2aux_sum)],
+        ('Expresion2Aux', ('lambda',)): [(1, action_exp2aux_lambda)],
+
+        # Expresion3 -> oppar Expresion clpar | intconst | floatconst | str | true | false | id Expresion4
+        ('Expresion3', ('oppar', 'Expresion', 'clpar')): [(3, action_exp3_par)],
+        ('Expresion3', ('intconst',)): [(1, action_type_int)],
+        ('Expresion3', ('floatconst',)): [(1, action_type_float)],
+        ('Expresion3', ('str',)): [(1, action_type_string)],
+        ('Expresion3', ('true',)): [(1, action_type_bool)],
+        ('Expresion3', ('false',)): [(1, action_type_bool)],
+        ('Expresion3', ('id', 'Expresion4')): [(1, action_exp3_id_pre), (2, action_exp3_id)],
+
+        # Expresion4 -> oppar ArgsLlamada clpar | lambda
+        ('Expresion4', ('oppar', 'ArgsLlamada', 'clpar')): [(3, action_exp4_call)],
+        ('Expresion4', ('lambda',)): [(1, action_exp4_lambda)],
+    }
+
+
+
+SEMANTIC_RULES = SemanticActions.SEMANTIC_RULES
 
 ###### FIN SECCIÓN DE ANÁLISIS SEMÁNTICO ######
 
+######    SECCIÓN DE ANALIZADOR SINTÁCTICO    ######
+
 def load_grammar(filename):
-    global grammar
+    """Lee Gramatica.txt y devuelve la gramática como dict.
+
+    Claves: 'terminals', 'non_terminals', 'axiom', 'productions' (nt -> lista de
+    producciones) y 'production_numbers' ((nt, tupla) -> nº de producción).
+    """
+    grammar = {}
     with open(filename, 'r', encoding='utf-8') as f:
         content = f.read()
     
@@ -1262,8 +1690,9 @@ def load_grammar(filename):
     grammar['non_terminals'] = non_terminals
     grammar['axiom'] = axiom
     grammar['productions'] = productions
+    return grammar
 
-def compute_first():
+def compute_first(grammar):
     first = {nt: set() for nt in grammar['non_terminals']}
     
     changed = True
@@ -1298,7 +1727,7 @@ def compute_first():
     
     return first
 
-def compute_follow(first):
+def compute_follow(grammar, first):
     follow = {nt: set() for nt in grammar['non_terminals']}
     follow[grammar['axiom']].add('eof')
     
@@ -1341,13 +1770,8 @@ def compute_follow(first):
     
     return follow
 
-def build_parsing_table():
+def build_parsing_table(grammar, first, follow):
     """Construye la tabla de análisis sintáctico LL(1)."""
-    global parsing_table
-    
-    first = compute_first()
-    follow = compute_follow(first)
-    
     parsing_table = {}
     
     for nt in grammar['non_terminals']:
@@ -1382,300 +1806,1110 @@ def build_parsing_table():
                     if terminal not in parsing_table[nt]:
                         parsing_table[nt][terminal] = production
 
-def token_type_to_grammar_symbol(token):
-    """Mapea `token.type` (PLY) al nombre de terminal usado por la gramática LL(1)."""
-    mapping = {
-        'BOOLEAN': 'boolean',
-        'STRING': 'string',
-        'ELSE': 'else',
-        'FLOAT': 'float',
-        'FUNCTION': 'function',
-        'IF': 'if',
-        'INT': 'int',
-        'LET': 'let',
-        'READ': 'read',
-        'RETURN': 'return',
-        'VOID': 'void',
-        'WRITE': 'write',
-        'FALSE': 'false',
-        'TRUE': 'true',
-        'FLOATCONST': 'floatconst',
-        'INTCONST': 'intconst',
-        'STR': 'str',
-        'PLUSEQ': 'pluseq',
-        'EQ': 'eq',
-        'COMMA': 'comma',
-        'SEMICOLON': 'semicolon',
-        'OPPAR': 'oppar',
-        'CLPAR': 'clpar',
-        'OPBRA': 'opbra',
-        'CLBRA': 'clbra',
-        'SUM': 'sum',
-        'AND': 'and',
-        'MINORTHAN': 'minorthan',
-        'EOF': 'eof'
-    }
-    
-    if token.type in mapping:
-        return mapping[token.type]
-    
-    if token.type == 'ID':
-        return 'id'
-    
-    return token.type.lower()
+    return parsing_table
 
-def handle_syntactic_error(no_terminal, terminal, token):
-    global prev_token
+def production_push_items(nt, production):
+    """Secuencia a apilar al expandir `nt -> production` (símbolos + acciones del EdT).
 
-    # Tratamiento de la línea donde se comete el error
-    prev_lineno = getattr(prev_token, 'lineno', 1)
+    Convención: las acciones vienen indexadas por "posición" dentro de la
+    producción para ejecutarlas en el punto exacto del EdT (0 = antes del primer
+    símbolo, i = después del i-ésimo). La pila es LIFO, así que la secuencia se
+    construye de derecha a izquierda: para A (1) B (2) C (3) queda
+    [Act3, C, Act2, B, Act1, A, Act0] y el último elemento queda en el tope.
+    """
+    actions = SEMANTIC_RULES.get((nt, tuple(production)), [])
+
+    if not production or production[0] == 'lambda':
+        # Caso Lambda: solo acciones (lambda cuenta como 1 posición abstracta)
+        return tuple(act for _, act in actions)
+
+    items_to_push = []
+    # Recorrer símbolos de derecha a izquierda (len..1)
+    for i in range(len(production), 0, -1):
+        # Acciones después del símbolo i
+        for idx, act in actions:
+            if idx == i:
+                items_to_push.append(act)
+        items_to_push.append(production[i-1])
+
+    # Acciones antes del primer símbolo (0)
+    for idx, act in actions:
+        if idx == 0:
+            items_to_push.append(act)
+
+    return tuple(items_to_push)
+
+class CompiledGrammar:
+    """Gramática LL(1) compilada: inmutable y compartida por todas las sesiones.
+
+    Agrupa la gramática, FIRST/FOLLOW, la tabla LL(1), las expansiones
+    precompiladas (`expansion_table[nt][terminal] = (nº producción, items a apilar)`)
+    y su codificación entera (`build_dense_table`). Rangos de códigos:
+      [0, num_terminals)                     terminales
+      [num_terminals, first_unknown_code)    no terminales
+      [first_unknown_code, first_action_code) símbolos desconocidos en producciones
+      [first_action_code, ...)               acciones semánticas
+    """
 
-    line = token.lineno
-    changed = False
+    def __init__(self, grammar, first_sets, follow_sets, parsing_table, key=None):
+        self.grammar = grammar
+        self.first_sets = first_sets
+        self.follow_sets = follow_sets
+        self.parsing_table = parsing_table
+        self.key = key  # Clave de la caché (hash de la gramática + versión)
+        self.build_expansion_table()
+        self.build_dense_table()
+
+    @classmethod
+    def from_file(cls, grammar_path, key=None):
+        """Lee la gramática y calcula FIRST, FOLLOW y la tabla LL(1)."""
+        grammar = load_grammar(grammar_path)
+        first = compute_first(grammar)
+        follow = compute_follow(grammar, first)
+        return cls(grammar, first, follow, build_parsing_table(grammar, first, follow), key)
+
+    def build_expansion_table(self):
+        """Compila cada entrada de `parsing_table` en (nº de producción, items a apilar).
+
+        Se hace una vez al construir/cargar la tabla: en `parse()` expandir un no
+        terminal se reduce a un `stack.extend` de la secuencia precompilada.
+        """
+        compiled = {}
+        self.expansion_table = {}
+        for nt, row in self.parsing_table.items():
+            self.expansion_table[nt] = {}
+            for terminal, production in row.items():
+                key = (nt, tuple(production))
+                if key not in compiled:
+                    compiled[key] = (self.grammar['production_numbers'].get(key),
+                                     production_push_items(nt, production))
+                self.expansion_table[nt][terminal] = compiled[key]
+
+    def build_dense_table(self):
+        """Codifica los símbolos como enteros pequeños y compila la tabla densa.
+
+        `parse()` trabaja solo con códigos: la pila es un `array('H')` (2 bytes por
+        elemento) y la expansión es `dense_table[nt][terminal]`, sin diccionarios
+        de cadenas. `token_codes` traduce cada tipo de token del lexer a su código
+        de terminal una única vez por token.
+        """
+        grammar = self.grammar
+        terminals = sorted(grammar['terminals'] | {'eof'})
+        non_terminals = sorted(grammar['non_terminals'])
+        symbol_names = terminals + non_terminals
+        self.num_terminals = len(terminals)
+
+        # Símbolos de producciones que no son ni terminales ni no terminales
+        # (parse() los notifica como "Símbolo desconocido") y acciones semánticas.
+        unknown = []
+        action_by_code = []
+        for row in self.expansion_table.values():
+            for _, items in row.values():
+                for item in items:
+                    if callable(item):
+                        if item not in action_by_code:
+                            action_by_code.append(item)
+                    elif item not in grammar['terminals'] and item not in grammar['non_terminals'] \
+                            and item != 'eof' and item not in unknown:
+                        unknown.append(item)
+        self.first_unknown_code = len(symbol_names)
+        symbol_names += sorted(unknown)
+        self.first_action_code = len(symbol_names)
+        self.symbol_names = symbol_names
+        self.symbol_codes = symbol_codes = {name: code for code, name in enumerate(symbol_names)}
+        self.action_by_code = action_by_code
+        action_codes = {act: self.first_action_code + i for i, act in enumerate(action_by_code)}
+
+        self.token_codes = {}
+        for token_type, terminal in TOKEN_TO_GRAMMAR.items():
+            if terminal in symbol_codes and symbol_codes[terminal] < self.num_terminals:
+                self.token_codes[token_type] = symbol_codes[terminal]
+
+        compiled = {}
+        self.dense_table = [[None] * self.num_terminals for _ in non_terminals]
+        for nt, row in self.expansion_table.items():
+            nt_row = self.dense_table[symbol_codes[nt] - self.num_terminals]
+            for terminal, (production_num, items) in row.items():
+                if id(items) not in compiled:
+                    codes = array('H', (action_codes[item] if callable(item) else symbol_codes[item]
+                                        for item in items))
+                    compiled[id(items)] = (production_num, codes)
+                nt_row[symbol_codes[terminal]] = compiled[id(items)]
+
+        # Conjuntos de sincronización de la recuperación en modo pánico
+        # (`Analyzer.panic_mode`): FOLLOW del no terminal más ';' y '}', que
+        # cierran sentencias y bloques, y las palabras reservadas que abren una
+        # sentencia o función (FIRST del axioma salvo `id`). El axioma solo se
+        # sincroniza con su FOLLOW (eof): nunca se abandona.
+        closers = {symbol_codes[t] for t in ('semicolon', 'clbra') if t in symbol_codes}
+        closers |= {symbol_codes[t] for t in self.first_sets[grammar['axiom']]
+                    if t in symbol_codes and t not in ('id', 'eof')}
+        self.sync_codes = []
+        for nt in non_terminals:
+            sync = {symbol_codes[t] for t in self.follow_sets.get(nt, ())}
+            if nt != grammar['axiom']:
+                sync |= closers
+            self.sync_codes.append(frozenset(sync))
+
+######    CACHÉ PERSISTENTE DE LA GRAMÁTICA COMPILADA    ######
+
+# La gramática no cambia entre ejecuciones: guardamos en disco la gramática, los
+# números de producción, FIRST/FOLLOW y la tabla LL(1). La clave es el hash de
+# Gramatica.txt + ANALYZER_VERSION; si no coincide o el fichero está corrupto,
+# se reconstruye y se vuelve a guardar. El fichero es JSON (solo nombres de
+# símbolos y números, nunca pickle), así que leerlo no ejecuta código aunque el
+# directorio de cachés sea compartido. Sí puede cambiar el análisis: un fichero
+# manipulado con la clave correcta y símbolos válidos da otra tabla LL(1), así
+# que el directorio solo debe compartirse entre usuarios de confianza. Si algún
+# símbolo no es de la gramática, o la tabla no se puede compilar, el fichero
+# se descarta y la gramática se reconstruye.
+GRAMMAR_CACHE_FORMAT = 2
+
+def get_cache_dir():
+    """Directorio de cachés del analizador (configurable con MYJS_CACHE_DIR)."""
+    base = os.environ.get('MYJS_CACHE_DIR')
+    if base:
+        return base
+    if os.name == 'nt':
+        root = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'myjs_analyzer')
 
-    if token.lineno > prev_lineno:
-        line = prev_lineno
-        changed = True
+def grammar_cache_key(grammar_path):
+    """Hash de la gramática + versión del analizador."""
+    h = hashlib.sha256()
+    with open(grammar_path, 'rb') as f:
+        h.update(f.read())
+    h.update(ANALYZER_VERSION.encode('utf-8'))
+    h.update(str(GRAMMAR_CACHE_FORMAT).encode('utf-8'))
+    return h.hexdigest()
 
-    if line == 0:
-        line = prev_lineno  
-        changed = True
+def _grammar_cache_path(key):
+    return os.path.join(get_cache_dir(), f"ll1-{key[:16]}.json")
 
-    # Tratamiento del símbolo a mostrar
-    token_info = get_symbol(token.value)
+def _symbols(value, allowed=None):
+    """Lista de nombres de símbolos leída de la caché; ValueError si no lo es.
 
-    if token_info is None:
-        showID = terminal
-    else:
-        showID = token_info['value']
-
-    # Mensajes de error específicos por no terminal
-    print(f"{Colors.RED}{Colors.BOLD}MyJS Syntactic Error:{Colors.RESET}{Colors.RED} En la línea {line}", end=' ')
-
-    if no_terminal == 'S':
-        print(f"se esperaba el inicio de una sentencia o función, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'LC':
-        print(f"se esperaba el inicio de una sentencia, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'LF':
-        print(f"se esperaba 'function', pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'CuerpoIf':
-        print(f"se esperaba el inicio de una sentencia o un '{{{{', pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Cuerpo':
-        print(f"se esperaba el inicio de una sentencia o un '}}}}', pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Args':
-        print(f"se esperaba un tipo de dato o falta ')', se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'ArgsLlamada':
-        print(f"hay un argumento no válido o falta ')', se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'ArgMoreLlamada':
-        print(f"se esperaba ',' para llamar más argumentos o falta ')', se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'ArgMore':
-        print(f"se esperaba ',' para llamar más argumentos o falta ')', se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'LS':
-        print(f"se esperaba la llamada a una función o una declaración, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'IdOpt':
-        print(f"se esperaba '=' o una llamada de función, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'TypeFun':
-        print(f"se esperaba un tipo de función, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Tipo':
-        print(f"se esperaba un tipo de dato, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Asignar':
-        print(f"se esperaba '=' , pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'ExpReturn':
-        if changed:
-            print(f"se esperaba ';'{Colors.RESET}")
-        else:
-            print(f"hay una expresión no válida después del return, se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion':
-        print(f"hay una expresión mal declarada, se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'ExpresionAux':
-        if changed:
-            print(f"se esperaba ';'{Colors.RESET}")
-        else:
-            print(f"se esperaba un operador o el cierre de una sentencia, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion1':
-        print(f"hay una expresión mal declarada, se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion1Aux':
-        if changed:
-            print(f"se esperaba ';'{Colors.RESET}")
-        else:
-            print(f"se esperaba un operador o el cierre de una sentencia, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion2':
-        print(f"hay una expresión mal declarada, se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion2Aux':
-        if changed:
-            print(f"se esperaba ';'{Colors.RESET}")
-        else:
-            print(f"se esperaba un operador o el cierre de una sentencia, pero se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion3':
-        print(f"hay una expresión no válida, se encontró '{showID}'{Colors.RESET}")
-    elif no_terminal == 'Expresion4':
-        if changed:
-            print(f"se esperaba ';'{Colors.RESET}")
-        else:
-            print(f"hay una función mal llamada o falta ')', pero se encontró '{showID}'{Colors.RESET}")
-    else:
-        print(f"se esperaba '{no_terminal}', pero se encontró '{showID}'{Colors.RESET}")
-
-current_token = None
-prev_token = None
-lexed_file = None
-
-def init_lexer_for_parser(code):
-    global current_token, prev_token
-    lexer.input(code)
-    # Primer token: se escribe en `lexed.txt` y queda listo como lookahead del parser.
-    prev_token = current_token
-    current_token = get_next_token()
-
-def get_next_token():
-    global lexed_file
-
-    tok = lexer.token()
-    if tok is None:
-        class EOFToken:
-            type = 'EOF'
-            value = None
-            lineno = 0
-        tok = EOFToken()
-
-    # Volcado de tokens para inspección externa (formato de la práctica).
-    if lexed_file is not None:
-        if tok.type in noattr:
-            lexed_file.write(f'<{tok.type},>\n')
-        elif tok.type == 'STR':
-            lexed_file.write(f'<{tok.type},\"{getattr(tok, "value", "")}\">\n')
-        else:
-            lexed_file.write(f'<{tok.type},{getattr(tok, "value", "")}>\n')
+    Con `allowed`, además todos tienen que estar en ese conjunto.
+    """
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value) \
+            or (allowed is not None and not allowed.issuperset(value)):
+        raise ValueError("caché de la gramática con formato incorrecto")
+    return value
+
+def _decode_grammar_cache(data):
+    """Gramática, FIRST, FOLLOW y tabla LL(1) del JSON de la caché (ValueError si no encaja)."""
+    productions = {nt: [_symbols(prod) for prod in prods] for nt, prods in data['productions']}
+    numbers = {}
+    for nt, prod, num in data['production_numbers']:
+        if not isinstance(num, int):
+            raise ValueError("caché de la gramática con formato incorrecto")
+        numbers[nt, tuple(_symbols(prod))] = num
+    grammar = {
+        'production_numbers': numbers,
+        'terminals': set(_symbols(data['terminals'])),
+        'non_terminals': set(_symbols(data['non_terminals'])),
+        'axiom': data['axiom'],
+        'productions': productions,
+    }
+    # Los símbolos de las tablas tienen que ser de la gramática: `CompiledGrammar`
+    # los busca por nombre al codificarlos. En las producciones puede haber
+    # símbolos desconocidos (se notifican al analizar), como en Gramatica.txt.
+    non_terminals = grammar['non_terminals']
+    terminals = grammar['terminals'] | {'eof'}
+    symbols = terminals | non_terminals
+    if grammar['axiom'] not in non_terminals or not set(productions) <= non_terminals \
+            or not all(isinstance(nt, str) for nt, _ in numbers):
+        raise ValueError("caché de la gramática con formato incorrecto")
+    first = {nt: set(_symbols(syms, terminals | {'lambda'})) for nt, syms in data['first']}
+    follow = {nt: set(_symbols(syms, terminals)) for nt, syms in data['follow']}
+    table = {nt: {terminal: _symbols(prod) for terminal, prod in row}
+             for nt, row in data['parsing_table']}
+    if not set(first) | set(follow) <= symbols or not set(table) <= non_terminals \
+            or not all(set(row) <= terminals for row in table.values()):
+        raise ValueError("caché de la gramática con formato incorrecto")
+    return grammar, first, follow, table
+
+def _read_grammar_cache(key):
+    """Lee la caché; devuelve None si no existe, es de otra clave o está corrupta."""
+    try:
+        with open(_grammar_cache_path(key), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('key') != key:
+            return None
+        return _decode_grammar_cache(data)
+    except Exception:
+        return None
 
-    # 2) DEVOLVER AL SINTÁCTICO
-    return tok
+def _write_grammar_cache(key, compiled):
+    """Guarda la gramática compilada de forma atómica (tmp + os.replace)."""
+    grammar = compiled.grammar
+    data = {
+        'key': key,
+        'axiom': grammar['axiom'],
+        'terminals': sorted(grammar['terminals']),
+        'non_terminals': sorted(grammar['non_terminals']),
+        'productions': list(grammar['productions'].items()),
+        'production_numbers': [[nt, list(prod), num]
+                               for (nt, prod), num in grammar['production_numbers'].items()],
+        'first': [[nt, sorted(syms)] for nt, syms in compiled.first_sets.items()],
+        'follow': [[nt, sorted(syms)] for nt, syms in compiled.follow_sets.items()],
+        'parsing_table': [[nt, list(row.items())] for nt, row in compiled.parsing_table.items()],
+    }
+    path = _grammar_cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        # Sin permisos de escritura: la caché es opcional.
+        pass
+
+def load_compiled_grammar(grammar_path, use_cache=True, grammar_class=CompiledGrammar):
+    """Carga la gramática compilada (`CompiledGrammar`) desde la caché o la construye.
+
+    El resultado es inmutable: se comparte entre todas las sesiones `Analyzer`
+    del proceso (también entre hilos). `from_cache` indica si se usó la caché.
+    `grammar_class` permite construirla con una subclase (p. ej. el perfilador
+    cronometra así la construcción de las tablas).
+    """
+    key = grammar_cache_key(grammar_path) if use_cache else None
+    data = _read_grammar_cache(key) if use_cache else None
+    if data is not None:
+        # Las secuencias contienen las acciones (funciones): no se guardan en disco,
+        # se recompilan en el constructor. Si aun así la tabla no se puede
+        # compilar, la caché no vale y se reconstruye.
+        try:
+            compiled = grammar_class(*data, key)
+        except Exception:
+            compiled = None
+        if compiled is not None:
+            compiled.from_cache = True
+            return compiled
+
+    compiled = grammar_class.from_file(grammar_path, key)
+    compiled.from_cache = False
+    if use_cache:
+        _write_grammar_cache(key, compiled)
+    return compiled
+
+_default_grammar = None
+
+def default_compiled_grammar():
+    """Gramática compilada de `Gramatica.txt`, cargada una vez por proceso."""
+    global _default_grammar
+    if _default_grammar is None:
+        _default_grammar = load_compiled_grammar(get_resource_path('Gramatica.txt'))
+    return _default_grammar
+
+# Mapeo `token.type` (PLY) -> terminal de la gramática LL(1). Constante de módulo:
+# se construye una sola vez (también lo usa el generador de parsers, parsergen.py).
+TOKEN_TO_GRAMMAR = {
+    'BOOLEAN': 'boolean',
+    'STRING': 'string',
+    'ELSE': 'else',
+    'FLOAT': 'float',
+    'FUNCTION': 'function',
+    'IF': 'if',
+    'INT': 'int',
+    'LET': 'let',
+    'READ': 'read',
+    'RETURN': 'return',
+    'VOID': 'void',
+    'WRITE': 'write',
+    'FALSE': 'false',
+    'TRUE': 'true',
+    'FLOATCONST': 'floatconst',
+    'INTCONST': 'intconst',
+    'STR': 'str',
+    'PLUSEQ': 'pluseq',
+    'EQ': 'eq',
+    'COMMA': 'comma',
+    'SEMICOLON': 'semicolon',
+    'OPPAR': 'oppar',
+    'CLPAR': 'clpar',
+    'OPBRA': 'opbra',
+    'CLBRA': 'clbra',
+    'SUM': 'sum',
+    'AND': 'and',
+    'MINORTHAN': 'minorthan',
+    'EOF': 'eof',
+    'ID': 'id',
+}
 
-def advance_token():
-    global current_token, prev_token
-    prev_token = current_token
-    current_token = get_next_token()
+def token_type_to_grammar_symbol(token):
+    """Mapea `token.type` (PLY) al nombre de terminal usado por la gramática LL(1)."""
+    symbol = TOKEN_TO_GRAMMAR.get(token.type)
+    if symbol is not None:
+        return symbol
+    return token.type.lower()
+
+######    SESIÓN DE ANÁLISIS    ######
 
-def parse():
-    """Ejecuta el análisis LL(1) con pila.
+@dataclass
+class Diagnostic:
+    """Error detectado durante el análisis.
 
-    La pila mezcla símbolos de gramática (terminales/no terminales) y callbacks Python.
-    Las callbacks implementan el EdT: consumen/produces atributos vía `sem_stack`.
+    `kind` es 'lex', 'syntax', 'semantic' o 'internal' (símbolo desconocido en la
+    gramática, anidamiento demasiado profundo para el parser generado).
+    `message` no lleva colores: se añaden en `render()`.
+    """
+    kind: str
+    line: int
+    message: str
+
+    TITLES = {'lex': 'MyJS Lex Error', 'syntax': 'MyJS Syntactic Error',
+              'semantic': 'MyJS Semantic Error'}
+
+    def render(self):
+        """Línea de consola con el formato del analizador."""
+        if self.kind == 'internal':
+            return f"Error: {self.message}"
+        return (f"{Colors.RED}{Colors.BOLD}{self.TITLES[self.kind]}:{Colors.RESET}{Colors.RED} "
+                f"En la línea {self.line} {self.message}{Colors.RESET}")
+
+@dataclass
+class AnalysisResult:
+    """Resultado en memoria de `Analyzer.analyze()`.
+
+    `tokens` son tuplas (tipo, valor, línea, offset en el fuente) en el orden en
+    que los consumió el parser (incluido el EOF final), normalmente en un
+    `TokenBuffer`; `global_scope` y
+    `function_tables` son las tablas de símbolos tal y como se vuelcan en
+    `symbols.txt`. `syntax_errors` son todos los errores sintácticos (varios
+    solo con `Analyzer(recover=True)`); `syntax_error` es el primero.
+    """
+    ok: bool
+    tokens: list = field(default_factory=list)
+    lex_errors: list = field(default_factory=list)
+    sem_errors: list = field(default_factory=list)
+    syntax_error: Optional[Diagnostic] = None
+    syntax_errors: list = field(default_factory=list)
+    production_sequence: list = field(default_factory=list)
+    global_scope: dict = field(default_factory=dict)
+    function_tables: list = field(default_factory=list)
+
+    @property
+    def success(self):
+        """True si no hay errores léxicos, sintácticos ni semánticos."""
+        return self.ok and not self.lex_errors and not self.sem_errors
+
+    @property
+    def diagnostics(self):
+        """Errores en el orden en que los muestra el analizador."""
+        diagnostics = list(self.syntax_errors)
+        if not diagnostics and self.syntax_error is not None:
+            diagnostics.append(self.syntax_error)
+        diagnostics += [Diagnostic('lex', line, msg) for line, msg in self.lex_errors]
+        diagnostics += [Diagnostic('semantic', line, msg) for line, msg in self.sem_errors]
+        return diagnostics
+
+    def lexed_lines(self):
+        """Líneas de `lexed.txt` (una por token), sin unirlas."""
+        return (format_token(tok_type, value) for tok_type, value, _, _ in self.tokens)
+
+    def lexed_text(self):
+        """Contenido de `lexed.txt`."""
+        return ''.join(self.lexed_lines())
+
+    def symbols_text(self):
+        """Contenido de `symbols.txt`."""
+        out = io.StringIO()
+        write_symbol_table_to_file(out, self.global_scope, self.function_tables)
+        return out.getvalue()
+
+    def parse_text(self):
+        """Contenido de `parse.txt`."""
+        return "Descendente " + ''.join(f"{num} " for num in self.production_sequence)
+
+# Con `Analyzer(recover=True)`, errores sintácticos tras los que se abandona el
+# análisis: pasado cierto punto lo que sigue suelen ser errores en cascada.
+MAX_SYNTAX_ERRORS = 20
+# Tokens que hay que consumir tras un error recuperado antes de volver a
+# notificar errores (los de antes se consideran consecuencia del primero).
+RECOVERY_TOKENS = 3
+
+class Analyzer(SemanticActions):
+    """Sesión de análisis léxico, sintáctico y semántico de MyJS.
+
+    Todo el estado mutable (lexer, tabla de símbolos, pilas, errores) es de la
+    sesión; la gramática compilada es inmutable y se comparte. Una sesión se
+    puede reutilizar para muchos `analyze()` seguidos, pero no desde varios
+    hilos a la vez: para concurrencia, una sesión por hilo.
     """
-    global stack, production_sequence, current_token, last_id_pos, global_initialized
 
-    stack = ['eof', grammar['axiom']]
-    production_sequence = []
-    
-    # Resetear estado global para nueva ejecución
-    global_initialized = False
-    
-    # Inicialización forzada del semántico
-    action_init_global()
+    TOKEN_TO_GRAMMAR = TOKEN_TO_GRAMMAR
+    EOF_TOKEN = EOF_TOKEN
+    token_type_to_grammar_symbol = staticmethod(token_type_to_grammar_symbol)
+    # Callback de `parse()` en cada frontera entre unidades de nivel superior
+    # (pila `[eof, S]`); la usa `incremental.IncrementalAnalyzer`.
+    on_unit_boundary = None
+
+    def __init__(self, compiled=None, parser='tabla', keep_tokens=True, lexer='regex',
+                 recover=False, max_errors=MAX_SYNTAX_ERRORS, token_cache=None):
+        """
+        Args:
+            compiled: `CompiledGrammar` (por defecto, la de Gramatica.txt con caché).
+            parser: Motor sintáctico: 'tabla' (intérprete LL(1)) o 'generado'
+                (parser especializado de parsergen.py).
+            keep_tokens: Guardar los tokens en el resultado (para `lexed.txt`).
+            lexer: Motor léxico: 'regex' (`Scanner`) o 'ply' (lexer de PLY).
+            recover: Recuperarse de los errores sintácticos en modo pánico y seguir
+                analizando, en vez de detenerse en el primero (solo parser 'tabla').
+            max_errors: Con `recover`, nº de errores sintácticos tras el que se
+                abandona el análisis (corta las cascadas).
+            token_cache: `caches.TokenCache` de la que `analyze()` toma los tokens del
+                fuente (y en la que los guarda si no están).
+        """
+        if parser not in ('tabla', 'generado'):
+            raise ValueError(f"Motor sintáctico desconocido: {parser}")
+        if lexer not in LEXERS:
+            raise ValueError(f"Motor léxico desconocido: {lexer}")
+        if recover and parser != 'tabla':
+            raise ValueError("La recuperación de errores solo está disponible con el parser 'tabla'")
+        if max_errors < 1:
+            raise ValueError(f"max_errors debe ser al menos 1: {max_errors}")
+        self.compiled = compiled if compiled is not None else default_compiled_grammar()
+        self.engine = parser
+        self.keep_tokens = keep_tokens
+        self.recover = recover
+        self.max_errors = max_errors
+        self.token_cache = token_cache
+        self.lexer_engine = lexer
+        self.lexer = new_lexer(lexer)
+        self.lexer.analyzer = self
+        self._generated_parse = None
+        self.reset()
+
+    def reset(self):
+        """Deja la sesión lista para un nuevo análisis."""
+        self.reset_semantic_state()
+        self.lex_errors = []
+        self.tokens = TokenBuffer()
+        self.stack = None
+        self.production_sequence = []
+        self.syntax_error = None
+        self.syntax_errors = []
+        self.current_token = None      # Token actual del lexer
+        self.prev_token = None
+
+    def lex_error(self, lineno, msg):
+        """Registra un error léxico."""
+        self.lex_errors.append((lineno, msg))
+
+    def unknown_symbol(self, name):
+        """Registra un símbolo de la gramática que no es terminal ni no terminal."""
+        self.syntax_error = Diagnostic('internal', 0, f"Símbolo desconocido {name}")
+
+    def analyze(self, source):
+        """Analiza `source` y devuelve un `AnalysisResult`.
+
+        Sin `token_cache` no toca disco; con ella el parser lee los tokens ya
+        calculados (`prelex`) en vez de llamar al lexer.
+        """
+        if self.token_cache is not None:
+            return self.analyze_prelexed(source, self.prelex(source))
+        return self._analyze(source)
+
+    def _analyze(self, source):
+        self.reset()
+        self.init_lexer_for_parser(source)
+        if self.engine == 'generado':
+            ok = self.parse_generated()
+            if ok is None:
+                ok = self.parse_too_deep(source)
+        else:
+            ok = self.parse()
+        return AnalysisResult(
+            ok=ok,
+            tokens=self.tokens,
+            lex_errors=self.lex_errors,
+            sem_errors=self.sem_errors,
+            syntax_error=self.syntax_error,
+            syntax_errors=self.syntax_errors,
+            production_sequence=self.production_sequence,
+            global_scope=self.symtab.scopes[0],
+            function_tables=self.function_tables,
+        )
+
+    def analyze_stream(self, chunks, flush=None):
+        """Analiza un fuente dado por trozos de texto (p. ej. `read_source_chunks`).
+
+        El lexer lee el fuente por ventanas de líneas completas (`StreamLexer`),
+        así que nunca está entero en memoria. Con `flush`, en cada frontera entre
+        unidades de nivel superior (y al terminar) se llama a
+        `flush(tokens, production_sequence)` con lo acumulado desde la anterior y
+        después se vacían ambas listas: la memoria ya no crece con el número de
+        tokens ni de producciones (con el parser 'generado' solo hay un volcado,
+        al final). El resultado es el de `analyze()` sobre el texto completo,
+        salvo que con `flush` sus `tokens` y `production_sequence` quedan vacíos.
+        """
+        lexer = self.lexer
+        self.lexer = StreamLexer(lexer)
+        if flush is not None:
+            def flush_unit():
+                flush(self.tokens, self.production_sequence)
+                del self.tokens[:]
+                del self.production_sequence[:]
+            self.on_unit_boundary = flush_unit
+        try:
+            result = self._analyze(chunks)
+            if flush is not None:
+                flush_unit()
+        finally:
+            self.lexer = lexer
+            self.__dict__.pop('on_unit_boundary', None)
+        return result
+
+    def analyze_parallel(self, source, jobs=None):
+        """`analyze(source)` con el fuente tokenizado antes en `jobs` procesos.
+
+        El lexer no depende del estado del parser (las posiciones en la TS se
+        asignan al consumir cada token), así que se puede tokenizar todo el
+        fuente por adelantado con `lex_parallel` y después analizar sobre esos
+        tokens. El resultado es idéntico al de `analyze()`. Solo compensa con
+        fuentes grandes: con menos de `PARALLEL_MIN_CHUNK` caracteres por
+        proceso se usan menos procesos (o ninguno).
+        """
+        return self.analyze_prelexed(source, self.prelex(source, jobs))
+
+    def prelex(self, source, jobs=1):
+        """Tokens de `source` como `PrelexedLexer`.
+
+        Salen de `token_cache` si están; si no, se tokeniza con `lex_parallel` (en
+        `jobs` procesos; None = uno por núcleo) y se guardan en ella.
+        """
+        cache = self.token_cache
+        if cache is None:
+            return lex_parallel(source, jobs, self.lexer_engine)
+        key = cache.key(source, self.lexer_engine)
+        lexer = cache.get(key)
+        if lexer is None:
+            lexer = lex_parallel(source, jobs, self.lexer_engine)
+            cache.put(key, lexer)
+        return lexer
+
+    def analyze_prelexed(self, source, lexer):
+        """`analyze(source)` leyendo los tokens de `lexer` (un `PrelexedLexer` de `source`)."""
+        if self.on_unit_boundary is not None:
+            raise ValueError("Los tokens precalculados no admiten mover la entrada durante el análisis")
+        saved = self.lexer
+        self.lexer = lexer
+        lexer.analyzer = self
+        try:
+            return self._analyze(source)
+        finally:
+            self.lexer = saved
 
-    while stack:
-        top = stack[-1]
-        
-        # 1. Ejecutar Acción Semántica (Si hay una función en el tope)
-        if callable(top):
-            top()
-            stack.pop()
-            continue
-            
-        current_symbol = token_type_to_grammar_symbol(current_token)
-
-        # 2. Match de terminal: consume el lookahead si coincide.
-        if top in grammar['terminals'] or top == 'eof':
-            if top == current_symbol:
-                # Capturar id.pos para las acciones semánticas asociadas al identificador.
-                if top == 'id':
-                    last_id_pos = current_token.value # Guardar posición TS
-                
-                stack.pop()
-                # EOF es un terminal “sentinela”: se consume en la pila pero no se avanza
-                # el lexer, para evitar lecturas repetidas de EOF y duplicados en `lexed.txt`.
-                if top != 'eof':
-                    advance_token()
+    def handle_syntactic_error(self, no_terminal, terminal, token):
+        """Registra un error sintáctico (sin `recover`, el análisis se detiene en el primero)."""
+        # Tratamiento de la línea donde se comete el error
+        prev_lineno = getattr(self.prev_token, 'lineno', 1)
+
+        line = token.lineno
+        changed = False
+
+        if token.lineno > prev_lineno:
+            line = prev_lineno
+            changed = True
+
+        if line == 0:
+            line = prev_lineno  
+            changed = True
+
+        # Tratamiento del símbolo a mostrar
+        token_info = self.symtab.get_symbol(token.value)
+
+        if token_info is None:
+            showID = terminal
+        else:
+            showID = token_info['value']
+
+        # Mensajes de error específicos por no terminal
+        if no_terminal == 'S':
+            msg = f"se esperaba el inicio de una sentencia o función, pero se encontró '{showID}'"
+        elif no_terminal == 'LC':
+            msg = f"se esperaba el inicio de una sentencia, pero se encontró '{showID}'"
+        elif no_terminal == 'LF':
+            msg = f"se esperaba 'function', pero se encontró '{showID}'"
+        elif no_terminal == 'CuerpoIf':
+            msg = f"se esperaba el inicio de una sentencia o un '{{{{', pero se encontró '{showID}'"
+        elif no_terminal == 'Cuerpo':
+            msg = f"se esperaba el inicio de una sentencia o un '}}}}', pero se encontró '{showID}'"
+        elif no_terminal == 'Args':
+            msg = f"se esperaba un tipo de dato o falta ')', se encontró '{showID}'"
+        elif no_terminal == 'ArgsLlamada':
+            msg = f"hay un argumento no válido o falta ')', se encontró '{showID}'"
+        elif no_terminal == 'ArgMoreLlamada':
+            msg = f"se esperaba ',' para llamar más argumentos o falta ')', se encontró '{showID}'"
+        elif no_terminal == 'ArgMore':
+            msg = f"se esperaba ',' para llamar más argumentos o falta ')', se encontró '{showID}'"
+        elif no_terminal == 'LS':
+            msg = f"se esperaba la llamada a una función o una declaración, pero se encontró '{showID}'"
+        elif no_terminal == 'IdOpt':
+            msg = f"se esperaba '=' o una llamada de función, pero se encontró '{showID}'"
+        elif no_terminal == 'TypeFun':
+            msg = f"se esperaba un tipo de función, pero se encontró '{showID}'"
+        elif no_terminal == 'Tipo':
+            msg = f"se esperaba un tipo de dato, pero se encontró '{showID}'"
+        elif no_terminal == 'Asignar':
+            msg = f"se esperaba '=' , pero se encontró '{showID}'"
+        elif no_terminal == 'ExpReturn':
+            if changed:
+                msg = "se esperaba ';'"
             else:
-                handle_syntactic_error(top, current_symbol, current_token)
-                return False
+                msg = f"hay una expresión no válida después del return, se encontró '{showID}'"
+        elif no_terminal == 'Expresion':
+            msg = f"hay una expresión mal declarada, se encontró '{showID}'"
+        elif no_terminal == 'ExpresionAux':
+            if changed:
+                msg = "se esperaba ';'"
+            else:
+                msg = f"se esperaba un operador o el cierre de una sentencia, pero se encontró '{showID}'"
+        elif no_terminal == 'Expresion1':
+            msg = f"hay una expresión mal declarada, se encontró '{showID}'"
+        elif no_terminal == 'Expresion1Aux':
+            if changed:
+                msg = "se esperaba ';'"
+            else:
+                msg = f"se esperaba un operador o el cierre de una sentencia, pero se encontró '{showID}'"
+        elif no_terminal == 'Expresion2':
+            msg = f"hay una expresión mal declarada, se encontró '{showID}'"
+        elif no_terminal == 'Expresion2Aux':
+            if changed:
+                msg = "se esperaba ';'"
+            else:
+                msg = f"se esperaba un operador o el cierre de una sentencia, pero se encontró '{showID}'"
+        elif no_terminal == 'Expresion3':
+            msg = f"hay una expresión no válida, se encontró '{showID}'"
+        elif no_terminal == 'Expresion4':
+            if changed:
+                msg = "se esperaba ';'"
+            else:
+                msg = f"hay una función mal llamada o falta ')', pero se encontró '{showID}'"
+        else:
+            msg = f"se esperaba '{no_terminal}', pero se encontró '{showID}'"
+
+        diagnostic = Diagnostic('syntax', line, msg)
+        if self.syntax_error is None:
+            self.syntax_error = diagnostic
+        self.syntax_errors.append(diagnostic)
+
+    def syntactic_error(self, top, muted=False):
+        """Error con el símbolo `top` en la cima de la pila y el lookahead actual.
+
+        Lo registra (salvo `muted`: error en cascada, antes de consumir
+        `RECOVERY_TOKENS` tokens desde el anterior) y, con `recover`,
+        resincroniza con `panic_mode`.
+        Devuelve False si el análisis debe detenerse.
+        """
+        if not muted:
+            self.handle_syntactic_error(self.compiled.symbol_names[top],
+                                        token_type_to_grammar_symbol(self.current_token),
+                                        self.current_token)
+        if not self.recover or len(self.syntax_errors) >= self.max_errors:
+            return False
+        self.recovering = True
+        self.panic_mode(top)
+        return True
+
+    def panic_mode(self, top):
+        """Recuperación en modo pánico: deja la pila y la entrada en un estado válido.
+
+        - Terminal esperado que no está: se da por insertado (se desapila). Si es
+          un `id`, sus acciones ven una posición inexistente (-1) en vez de la
+          del último identificador.
+        - No terminal sin entrada en la tabla: se descartan tokens hasta uno de
+          su FIRST (se reintenta la expansión) o de su conjunto de
+          sincronización (`CompiledGrammar.sync_codes`); en ese caso se
+          abandona y se apila `T_ERROR` como su atributo: cada no terminal salvo
+          el axioma deja exactamente un tipo en `sem_stack`, así que las
+          acciones pendientes siguen encontrando la pila semántica que esperan.
+        """
+        compiled = self.compiled
+        n_terminals = compiled.num_terminals
+        token_codes = compiled.token_codes
+        eof_code = compiled.symbol_codes['eof']
+        if top < n_terminals:
+            if top == eof_code:
+                # Sobra entrada tras el final del programa: se descarta.
+                while self.current_token.type != 'EOF':
+                    self.advance_token()
+            else:
+                self.stack.pop()
+                if top == compiled.symbol_codes['id']:
+                    self.last_id_pos = -1
+            return
+
+        row = compiled.dense_table[top - n_terminals]
+        sync = compiled.sync_codes[top - n_terminals]
+        while True:
+            code = token_codes.get(self.current_token.type, -1)
+            if code >= 0 and row[code] is not None:
+                return
+            if code == eof_code or code in sync:
+                break
+            self.advance_token()
+        self.stack.pop()
+        self.sem_stack.append(T_ERROR)
+
+    def init_lexer_for_parser(self, code):
+        self.lexer.lineno = 1
+        self.lexer.input(code)
+        # Primer token: queda listo como lookahead del parser.
+        self.prev_token = self.current_token
+        self.current_token = self.get_next_token()
+
+    def get_next_token(self):
+        tok = self.lexer.token()
+        if tok is None:
+            tok = EOF_TOKEN
+        elif tok.type == 'ID':
+            # El parser trabaja con id.pos: el lexema se guarda en la TS al consumir
+            # el token, con los scopes del punto del análisis en el que se lee.
+            tok.value = self.symtab.add_symbol(tok.value, 'ID', tok.value)
+
+        # Tokens consumidos, para `lexed.txt` (formato de la práctica).
+        if self.keep_tokens:
+            self.tokens.add(tok.type, tok.value, tok.lineno,
+                            getattr(tok, "lexpos", self.lexer.lexpos))
+
+        # 2) DEVOLVER AL SINTÁCTICO
+        return tok
+
+    def advance_token(self):
+        self.prev_token = self.current_token
+        self.current_token = self.get_next_token()
+
+    def parse_generated(self):
+        """Análisis con el parser especializado (se genera/enlaza la primera vez)."""
+        if self._generated_parse is None:
+            import parsergen
+            self._generated_parse = parsergen.build_generated_parser(self)
+        return self._generated_parse()
+
+    def parse_too_deep(self, source):
+        """El parser generado agotó el límite de recursión con el anidamiento de `source`.
+
+        Se repite el análisis desde cero con el intérprete de la tabla, que usa
+        una pila explícita y no tiene ese límite. Un fuente leído por trozos
+        (`analyze_stream`) ya se ha consumido y no se puede repetir: se notifica.
+        """
+        if not isinstance(source, str):
+            line = getattr(self.current_token, 'lineno', 0)
+            self.syntax_error = Diagnostic(
+                'internal', line, f"Anidamiento demasiado profundo para el parser generado "
+                                  f"(línea {line}); use --parser tabla")
+            return False
+        self.reset()
+        self.init_lexer_for_parser(source)
+        return self.parse()
+
+    def parse(self):
+        """Ejecuta el análisis LL(1) con pila.
+
+        La pila mezcla símbolos de gramática (terminales/no terminales) y callbacks Python,
+        todos codificados como enteros (ver `CompiledGrammar.build_dense_table`).
+        Las callbacks implementan el EdT: consumen/produces atributos vía `sem_stack`.
+        """
+        compiled = self.compiled
+        symbol_codes = compiled.symbol_codes
+        stack = self.stack = array('H', (symbol_codes['eof'], symbol_codes[compiled.grammar['axiom']]))
+        production_sequence = self.production_sequence = []
+        
+        # Resetear estado para nueva ejecución
+        self.global_initialized = False
         
-        # 3. Expandir No Terminal
-        elif top in grammar['non_terminals']:
-            rules_for_top = parsing_table.get(top, {})
+        # Inicialización forzada del semántico
+        self.action_init_global()
+
+        n_terminals = compiled.num_terminals
+        unknown_code = compiled.first_unknown_code
+        action_code = compiled.first_action_code
+        action_by_code = compiled.action_by_code
+        dense_table = compiled.dense_table
+        token_codes = compiled.token_codes
+        id_code = symbol_codes['id']
+        eof_code = symbol_codes['eof']
+        axiom_code = symbol_codes[compiled.grammar['axiom']]
+        on_unit = self.on_unit_boundary
+        # Tras un error recuperado (`recover`), tokens que faltan por consumir para
+        # volver a notificar errores (0: no se está recuperando).
+        recovering = 0
+        # Código del lookahead: se calcula una vez por token (-1 = no es un terminal).
+        current_code = token_codes.get(self.current_token.type, -1)
+
+        while stack:
+            top = stack[-1]
             
-            if current_symbol in rules_for_top:
-                production = rules_for_top[current_symbol]
-                production_key = (top, tuple(production))
-                
-                if production_key in grammar['production_numbers']:
-                    production_sequence.append(grammar['production_numbers'][production_key])
-                
+            # 1. Ejecutar Acción Semántica (Si hay una acción en el tope)
+            if top >= action_code:
+                action_by_code[top - action_code](self)
                 stack.pop()
-                
-                # Inyección de símbolos + acciones en la pila.
-                # Convención: las acciones vienen indexadas por “posición” dentro de la
-                # producción para poder ejecutarlas en el punto exacto del EdT.
-                if production and production[0] != 'lambda':
-                    actions = SEMANTIC_RULES.get(production_key, [])
-                    # Necesitamos empujar en orden inverso: C, B, A
-                    # E intercalar acciones.
-                    # Producción: A (1) B (2) C (3)
-                    
-                    items_to_push = []
-                    
-                    # Recorrer símbolos de derecha a izquierda (len..1)
-                    for i in range(len(production), 0, -1):
-                        # Acciones después del símbolo i
-                        for idx, act in actions:
-                            if idx == i: items_to_push.append(act)
-                        
-                        items_to_push.append(production[i-1])
-                    
-                    # Acciones antes del primer símbolo (0)
-                    for idx, act in actions:
-                        if idx == 0: items_to_push.append(act)
-                        
-                    # Empujar todo a la pila (como append añade al final, y stack es LIFO,
-                    # el último append es el tope. items_to_push[0] debe ser lo más profundo.
-                    # Pero hemos construido items_to_push en orden inverso (C, B, A).
-                    # Ejemplo: A, B. items = [Act2, B, Act1, A, Act0].
-                    # Al hacer append en ese orden: stack... Act2, B, Act1, A, Act0(tope).
-                    # Correcto.
+                continue
+
+            # 2. Match de terminal: consume el lookahead si coincide.
+            if top < n_terminals:
+                if top == current_code:
+                    # Capturar id.pos para las acciones semánticas asociadas al identificador.
+                    if top == id_code:
+                        self.last_id_pos = self.current_token.value # Guardar posición TS
                     
-                    for item in items_to_push:
-                        stack.append(item)
-                        
+                    stack.pop()
+                    # EOF es un terminal “sentinela”: se consume en la pila pero no se avanza
+                    # el lexer, para evitar lecturas repetidas de EOF y duplicados en `lexed.txt`.
+                    if top != eof_code:
+                        self.advance_token()
+                        current_code = token_codes.get(self.current_token.type, -1)
+                    if recovering:
+                        recovering -= 1
+                        self.recovering = recovering > 0
+                else:
+                    if not self.syntactic_error(top, recovering > 0):
+                        return False
+                    recovering = RECOVERY_TOKENS
+                    current_code = token_codes.get(self.current_token.type, -1)
+            
+            # 3. Expandir No Terminal: apilar la secuencia precompilada de la producción
+            elif top < unknown_code:
+                if top == axiom_code and on_unit is not None and len(stack) == 2:
+                    on_unit()
+                    current_code = token_codes.get(self.current_token.type, -1)
+                expansion = dense_table[top - n_terminals][current_code] if current_code >= 0 else None
+
+                if expansion is not None:
+                    production_num, items = expansion
+                    if production_num is not None:
+                        production_sequence.append(production_num)
+
+                    stack.pop()
+                    stack.extend(items)
                 else:
-                    # Caso Lambda
-                    actions = SEMANTIC_RULES.get(production_key, [])
-                    # Solo acciones índice 1 (o 0/1, lambda cuenta como 1 posición abstracta)
-                    for idx, act in actions:
-                        stack.append(act)
-                        
+                    if not self.syntactic_error(top, recovering > 0):
+                        return False
+                    recovering = RECOVERY_TOKENS
+                    current_code = token_codes.get(self.current_token.type, -1)
             else:
-                handle_syntactic_error(top, current_symbol, current_token)
+                self.unknown_symbol(compiled.symbol_names[top])
                 return False
-        else:
-            print(f"Error: Símbolo desconocido {top}")
-            return False
 
-    return token_type_to_grammar_symbol(current_token) == 'eof'
+        self.recovering = False
+        return not self.syntax_errors and token_type_to_grammar_symbol(self.current_token) == 'eof'
 
 ######    FIN SECCIÓN DE ANALIZADOR SINTÁCTICO    ######
 
+######    SECCIÓN DE SALIDA    ######
+
+# Los destinos de cada artefacto (sinks) están en sinks.py.
+
+def _generated(sinks, *artifacts):
+    """Lista de "Archivos generados" (sin los artefactos desactivados)."""
+    names = [sinks[artifact].name for artifact in artifacts if sinks[artifact].enabled]
+    return ', '.join(names) if names else 'ninguno'
+
+def report_analysis(diagnostics, lexed_text, symbols_text, parse_text, sinks=None):
+    """Escribe `lexed.txt`, `symbols.txt` y `parse.txt` e informa como la CLI.
+
+    `parse_text` es None si el análisis tiene errores (no se genera `parse.txt`).
+    Los textos pueden ser str o iterables de trozos. `lexed_text` es None si
+    `lexed.txt` ya se escribió durante el análisis (`--stream`). `sinks` indica
+    el destino de cada artefacto (por defecto, `default_sinks()`). La usan
+    `main()` y el cliente del servidor (server.py). Devuelve el código de salida.
+    """
+    sinks = {**default_sinks(), **(sinks or {})}
+    if lexed_text is not None:
+        try:
+            write_artifact(sinks['lexed'], lexed_text)
+        except IOError as e:
+            print(f"Error al escribir archivos de salida: {e}")
+            return 1
+
+    # Reportar errores: sintáctico (si lo hay), léxicos y semánticos acumulados.
+    for diagnostic in diagnostics:
+        print(diagnostic.render())
+
+    # Escribir tabla de símbolos al final con todos los atributos
+    try:
+        write_artifact(sinks['symbols'], symbols_text)
+    except IOError as e:
+        print(f"Error al escribir tabla de símbolos: {e}")
+
+    # Generar parse.txt
+    if parse_text is not None:
+        try:
+            write_artifact(sinks['parse'], parse_text)
+            print(f"{Colors.GREEN}{Colors.BOLD}Análisis completado exitosamente.{Colors.RESET}")
+            print(f"{Colors.GREEN}Archivos generados: {_generated(sinks, 'lexed', 'symbols', 'parse')}{Colors.RESET}")
+        except IOError as e:
+            print(f"{Colors.RED}Error al escribir parse.txt: {e}{Colors.RESET}")
+            return 1
+    else:
+        print(f"\n{Colors.RED}{Colors.BOLD}Análisis finalizado con errores.{Colors.RESET}")
+        print(f"{Colors.YELLOW}Archivos generados: {_generated(sinks, 'lexed', 'symbols')}{Colors.RESET}")
+        return 1
+    return 0
+
+def analyze_file_streaming(analyzer, path, use_mmap=False, sinks=None):
+    """`--stream`: analiza `path` por trozos escribiendo `lexed.txt` sobre la marcha.
+
+    Los tokens van al sink de `lexed.txt` y las producciones a un fichero
+    temporal en cada frontera entre unidades (`Analyzer.analyze_stream`), de
+    modo que la memoria no depende del tamaño del fuente. Misma salida que el
+    análisis en memoria; devuelve el código de salida.
+    """
+    sinks = {**default_sinks(), **(sinks or {})}
+    lexed = sinks['lexed']
+    try:
+        lexed.open()
+    except IOError as e:
+        print(f"Error al escribir archivos de salida: {e}")
+        return 1
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as productions:
+        def flush(tokens, production_sequence):
+            if lexed.enabled:
+                lexed.writelines(format_token(tok_type, value)
+                                 for tok_type, value, _, _ in tokens)
+            if sinks['parse'].enabled:
+                productions.write(''.join(f"{num} " for num in production_sequence))
+
+        try:
+            result = analyzer.analyze_stream(read_source_chunks(path, use_mmap=use_mmap), flush)
+        finally:
+            lexed.close()
+
+        parse_text = None
+        if result.success:
+            productions.seek(0)
+            parse_text = itertools.chain(["Descendente "],
+                                         iter(lambda: productions.read(CHUNK_SIZE), ''))
+        symbols_text = result.symbols_text() if sinks['symbols'].enabled else ''
+        return report_analysis(result.diagnostics, None, symbols_text, parse_text, sinks)
+
+def describe_cache(name, info):
+    """Línea de `--cache-info` para una caché (`caches.DiskCache.info()`)."""
+    lookups = info['hits'] + info['misses']
+    rate = f" ({info['hits'] / lookups:.1%} aciertos)" if lookups else ""
+    return (f"Caché de {name} ({info['directory']}): {info['entries']} entradas, "
+            f"{info['bytes'] / 2**20:.1f} de {info['max_bytes'] / 2**20:.0f} MiB; "
+            f"{info['hits']} aciertos y {info['misses']} fallos{rate}")
+
 def main():
     """Función principal del analizador."""
     parser = argparse.ArgumentParser(
         description='Analizador Léxico, Sintáctico y Semántico para MyJS',
-        formatter_class=argparse.RawDescriptionHelpFormatter
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Cachés en disco (activadas por defecto): cada ejecución guarda la tabla\n"
+               "LL(1), los tokens y el resultado del análisis de cada fuente en\n"
+               "$MYJS_CACHE_DIR o, si no está definida, en ~/.cache/myjs_analyzer\n"
+               "(%LOCALAPPDATA%\\myjs_analyzer en Windows). --no-cache no lee ni escribe\n"
+               "en ellas; --cache-info muestra su estado y --clear-cache las vacía."
     )
-    parser.add_argument("file", help="Archivo fuente MyJS a analizar")
+    parser.add_argument("file", nargs="?", help="Archivo fuente MyJS a analizar")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No usar las cachés en disco (tabla LL(1), tokens y resultados)")
+    parser.add_argument("--cache-info", action="store_true",
+                        help="Mostrar el estado de las cachés de tokens y resultados y salir")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Invalidar (vaciar) las cachés de tokens y resultados y salir")
+    parser.add_argument("--parser", choices=["tabla", "generado"], default="tabla",
+                        help="Motor sintáctico: intérprete de la tabla LL(1) o parser "
+                             "especializado generado con parsergen.py")
+    parser.add_argument("--lexer", choices=LEXERS, default="regex",
+                        help="Motor léxico: expresión regular maestra (Scanner) o PLY")
+    parser.add_argument("--stream", action="store_true",
+                        help="Leer el fuente por trozos y volcar tokens y producciones "
+                             "sobre la marcha (memoria acotada para fuentes muy grandes)")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Con --stream, leer el fuente proyectándolo en memoria (mmap)")
+    parser.add_argument("--lex-jobs", type=int, metavar="N",
+                        help="Tokenizar el fuente en N procesos antes del análisis (fuentes "
+                             "grandes; 0 = uno por núcleo)")
+    parser.add_argument("--sem-jobs", type=int, metavar="N",
+                        help="Comprobar los cuerpos de las funciones en N procesos (ver "
+                             "incremental.ParallelAnalyzer; 0 = uno por núcleo). Mismo "
+                             "resultado, pero más lento que el análisis secuencial")
+    for artifact, (default, _) in ARTIFACTS.items():
+        parser.add_argument(f"--{artifact}", metavar="RUTA",
+                            help=f"Destino de {default}: otra ruta (comprimido si acaba "
+                                 f"en .gz) o 'none' para no generarlo")
+    parser.add_argument("--check", action="store_true",
+                        help="Solo el veredicto: no genera ningún fichero de salida")
+    parser.add_argument("--recover", action="store_true",
+                        help="Recuperarse de los errores sintácticos (modo pánico) y "
+                             "notificar todos los errores en una sola pasada")
+    parser.add_argument("--max-errors", type=int, default=MAX_SYNTAX_ERRORS, metavar="N",
+                        help="Con --recover, errores sintácticos tras los que se abandona "
+                             f"el análisis (por defecto {MAX_SYNTAX_ERRORS})")
+    parser.add_argument("--binary", metavar="RUTA",
+                        help="Escribir también tokens, tablas de símbolos y derivación en "
+                             "formato binario compacto (ver artifacts.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mostrar tiempos por fase y contadores del análisis (ver profiling.py)")
+    parser.add_argument("--profile-json", metavar="RUTA",
+                        help="Exportar el perfil en JSON")
+    parser.add_argument("--profile-collapsed", metavar="RUTA",
+                        help="Exportar el perfil como pilas colapsadas (flamegraph.pl)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Perfil de memoria en vez de tiempos: pico y retenido por fase "
+                             "y tamaño de cada estructura (tracemalloc)")
     args = parser.parse_args()
-
-    # Verificar que el archivo existe
+    from caches import TokenCache
+    if args.cache_info or args.clear_cache:
+        import artifacts
+        for name, cache in (('tokens', TokenCache()), ('resultados', artifacts.ResultCache())):
+            if args.clear_cache:
+                print(f"Caché de {name}: {cache.clear()} entradas borradas ({cache.directory})")
+            else:
+                print(describe_cache(name, cache.info()))
+        return
+    if args.file is None:
+        parser.error("falta el archivo fuente")
+    if args.binary and args.stream:
+        parser.error("--binary no es compatible con --stream")
+    if args.recover and args.parser != 'tabla':
+        parser.error("--recover solo está disponible con --parser tabla")
+    if args.max_errors < 1:
+        parser.error("--max-errors debe ser al menos 1")
+    if args.lex_jobs is not None:
+        if args.lex_jobs < 0:
+            parser.error("--lex-jobs no puede ser negativo")
+        if args.stream:
+            parser.error("--lex-jobs no es compatible con --stream")
+    if args.sem_jobs is not None:
+        if args.sem_jobs < 0:
+            parser.error("--sem-jobs no puede ser negativo")
+        for option, value in (('--stream', args.stream), ('--lex-jobs', args.lex_jobs is not None),
+                              ('--recover', args.recover),
+                              ('--parser generado', args.parser != 'tabla')):
+            if value:
+                parser.error(f"--sem-jobs no es compatible con {option}")
+    profiler = None
+    if args.profile or args.profile_json or args.profile_collapsed or args.profile_memory:
+        if args.stream:
+            parser.error("--profile no es compatible con --stream")
+        if args.lex_jobs is not None:
+            parser.error("--profile no es compatible con --lex-jobs")
+        if args.sem_jobs is not None:
+            parser.error("--profile no es compatible con --sem-jobs")
+        if args.profile_memory and args.profile_collapsed:
+            parser.error("--profile-collapsed no es compatible con --profile-memory")
+        import profiling
+        profiler = profiling.MemoryProfiler() if args.profile_memory else profiling.Profiler()
+    sinks = {artifact: make_sink(artifact, 'none' if args.check else getattr(args, artifact))
+             for artifact in ARTIFACTS}
+
+    # Verificar que el archivo existe (con --stream se lee después, por trozos)
     try:
         with open(args.file, 'r', encoding='utf-8') as f:
-            content = f.read()
+            content = None if args.stream else f.read()
     except FileNotFoundError:
         print(f"Error: No se encontró el archivo '{args.file}'")
         sys.exit(1)
@@ -1692,62 +2926,80 @@ def main():
         print("Error: No se encontró el archivo 'Gramatica.txt'")
         sys.exit(1)
 
-    global lexed_file, symbols_file
-    
-    # Limpiar errores de ejecuciones anteriores
-    clear_lex_errors()
-    clear_sem_errors()
-
-    # `lexed.txt` se genera durante el análisis (streaming). La TS se vuelca al final.
-    try:
-        with open('lexed.txt', 'w', encoding="utf-8") as lf:
-            lexed_file = lf
-            symbols_file = None
-
-            load_grammar(grammar_path)
-            build_parsing_table()
-
-            # Inicializar lexer (lookahead listo) y ejecutar parser+semántico.
-            init_lexer_for_parser(content)
-
-            # Ejecutar análisis sintáctico y semántico
-            ok = parse()
-
-    except IOError as e:
-        print(f"Error al escribir archivos de salida: {e}")
-        sys.exit(1)
-
-    # Reportar errores léxicos acumulados (si existen).
-    if has_lex_errors():
-        print_lex_errors()
-
-    # Reportar errores semánticos acumulados (si existen).
-    if has_sem_errors():
-        print_sem_errors()
-
-    # Escribir tabla de símbolos al final con todos los atributos
-    try:
-        with open('symbols.txt', 'w', encoding='utf-8') as sf:
-            write_symbol_table_to_file(sf)
-    except IOError as e:
-        print(f"Error al escribir tabla de símbolos: {e}")
-
-    # Generar parse.txt
-    if ok and not has_lex_errors() and not has_sem_errors():
-        try:
-            with open('parse.txt', 'w') as f:
-                f.write("Descendente ")
-                for production_num in production_sequence:
-                    f.write(f"{production_num} ")
-            print(f"{Colors.GREEN}{Colors.BOLD}Análisis completado exitosamente.{Colors.RESET}")
-            print(f"{Colors.GREEN}Archivos generados: lexed.txt, symbols.txt, parse.txt{Colors.RESET}")
-        except IOError as e:
-            print(f"{Colors.RED}Error al escribir parse.txt: {e}{Colors.RESET}")
-            sys.exit(1)
-    else:
-        print(f"\n{Colors.RED}{Colors.BOLD}Análisis finalizado con errores.{Colors.RESET}")
-        print(f"{Colors.YELLOW}Archivos generados: lexed.txt, symbols.txt{Colors.RESET}")
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
+    # Un fuente ya analizado con la misma gramática y opciones no se vuelve a
+    # analizar: el resultado sale de la caché (el perfil mide el análisis: sin cachés).
+    keep_tokens = sinks['lexed'].enabled or bool(args.binary)
+    caches = []
+    result = None
+    if not (args.no_cache or args.stream or profiler):
+        import artifacts
+        result_cache = artifacts.ResultCache()
+        caches.append(result_cache)
+        result_key = result_cache.key(content, grammar_path, parser=args.parser,
+                                      lexer=args.lexer, recover=args.recover, tokens=keep_tokens,
+                                      max_errors=args.max_errors if args.recover else None)
+        result = result_cache.get(result_key)
+
+    if result is None:
+        if profiler:
+            compiled = profiler.load_grammar(grammar_path, use_cache=not args.no_cache)
+        else:
+            compiled = load_compiled_grammar(grammar_path, use_cache=not args.no_cache)
+        if args.sem_jobs is not None:
+            import incremental
+            analyzer = incremental.ParallelAnalyzer(compiled, lexer=args.lexer,
+                                                    jobs=args.sem_jobs or None)
+        else:
+            analyzer = Analyzer(compiled, parser=args.parser, lexer=args.lexer,
+                                keep_tokens=keep_tokens,
+                                recover=args.recover, max_errors=args.max_errors,
+                                token_cache=TokenCache() if caches else None)
+        if profiler:
+            profiler.instrument(analyzer)
+
+        if args.stream:
+            code = analyze_file_streaming(analyzer, args.file, use_mmap=args.mmap, sinks=sinks)
+            if code:
+                sys.exit(code)
+            return
+
+        # Ejecutar análisis léxico, sintáctico y semántico (todo en memoria)
+        if profiler:
+            result = profiler.analyze(analyzer, content)
+        elif args.lex_jobs is not None:
+            result = analyzer.analyze_parallel(content, args.lex_jobs or None)
+        else:
+            result = analyzer.analyze(content)
+        if caches:
+            if analyzer.token_cache:
+                caches.append(analyzer.token_cache)
+            result_cache.put(result_key, result)
+    for cache in caches:
+        cache.save_stats()
+
+    with profiler.phase('output') if profiler else contextlib.nullcontext():
+        if args.binary:
+            import artifacts
+            try:
+                artifacts.write_binary(result, args.binary)
+            except IOError as e:
+                print(f"Error al escribir {args.binary}: {e}")
+                sys.exit(1)
+
+        # Los artefactos desactivados ni siquiera se formatean.
+        parse_text = None
+        if result.success:
+            parse_text = result.parse_text() if sinks['parse'].enabled else ''
+        code = report_analysis(result.diagnostics, result.lexed_lines(),
+                               result.symbols_text() if sinks['symbols'].enabled else '',
+                               parse_text, sinks)
+
+    if profiler:
+        if args.profile or args.profile_memory:
+            print(profiler.render())
+        if args.profile_json:
+            profiler.write_json(args.profile_json)
+        if args.profile_collapsed:
+            profiler.write_collapsed(args.profile_collapsed)
+    if code:
+        sys.exit(code)
@@ -0,0 +1,479 @@
+"""Servidor LSP (Language Server Protocol) de MyJS sobre stdio.
+
+Publica los diagnósticos léxicos, sintácticos y semánticos mientras se edita
+y responde a hover e ir a la definición a partir de las tablas de símbolos.
+
+Para seguir respondiendo con ficheros de decenas de miles de líneas:
+- Sincronización incremental: el editor envía solo los rangos modificados.
+- Debounce: cada cambio reprograma el análisis `--debounce` segundos después,
+  así que una ráfaga de pulsaciones produce un único análisis.
+- El análisis se ejecuta en un proceso aparte y nunca bloquea el bucle de
+  eventos. Cada documento tiene allí su `IncrementalAnalyzer`: tras una
+  edición solo se reanalizan las unidades de nivel superior afectadas. Por
+  documento hay como mucho un análisis en curso: si llegan cambios mientras
+  tanto, su resultado se considera obsoleto (no se publica) y se reanaliza la
+  última versión al terminar.
+- Hover y definición usan el índice de identificadores del último análisis
+  (offsets ordenados + búsqueda binaria).
+
+Uso (configurar el editor para lanzar):
+    python lsp.py [--debounce 0.3] [-j 1]
+"""
+import argparse
+import asyncio
+import bisect
+import concurrent.futures
+import json
+import multiprocessing
+import re
+import sys
+import threading
+from array import array
+
+import incremental
+import lex
+
+DEBOUNCE_SECONDS = 0.3
+# Sesiones incrementales por proceso de análisis (una por documento, las más recientes).
+MAX_SESSIONS = 16
+
+# Constantes del protocolo
+SYNC_INCREMENTAL = 2
+SEVERITY_ERROR = 1
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+LOG_ERROR = 1
+
+IDENTIFIER = re.compile(lex.t_ID.__doc__)
+
+# Estado del proceso de análisis: gramática compilada y una sesión por documento.
+_compiled = None
+_sessions = {}
+
+
+def _init_worker(grammar_path, use_cache):
+    global _compiled
+    if _compiled is None:
+        _compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+
+
+def _warm_up(_):
+    return None
+
+
+def analyze_for_editor(source, uri=None):
+    """Analiza `source` (en el proceso de análisis) y devuelve diagnósticos + índice.
+
+    Con `uri`, la sesión incremental del documento reaprovecha su análisis
+    anterior.
+
+    El índice es compacto para que viaje barato entre procesos: offsets de
+    los identificadores (en orden), su posición en la TS, la información de
+    cada símbolo y el offset de la primera aparición de cada posición.
+    """
+    session = _sessions.pop(uri, None)
+    if session is None:
+        session = incremental.IncrementalAnalyzer(_compiled)
+        if len(_sessions) >= MAX_SESSIONS:
+            del _sessions[next(iter(_sessions))]
+    _sessions[uri] = session  # al final: el orden del dict es el de uso
+    result = session.analyze(source)
+
+    symbols = {}
+    for scope_name, scope in [(None, result.global_scope)] + list(result.function_tables):
+        for sym in scope.values():
+            symbols.setdefault(sym['position'], {
+                'lexeme': sym['lexeme'],
+                'type': sym['type'],
+                'displacement': sym['displacement'],
+                'scope': scope_name,
+            })
+
+    id_offsets = array('i')
+    id_positions = array('i')
+    definitions = {}
+    for tok_type, value, _, lexpos in result.tokens:
+        if tok_type == 'ID':
+            id_offsets.append(lexpos)
+            id_positions.append(value)
+            definitions.setdefault(value, lexpos)
+
+    return {
+        'diagnostics': [(d.kind, d.line, d.message) for d in result.diagnostics],
+        'id_offsets': id_offsets,
+        'id_positions': id_positions,
+        'symbols': symbols,
+        'definitions': definitions,
+    }
+
+
+def line_starts(text):
+    """Offset de inicio de cada línea de `text`."""
+    return [0] + [m.end() for m in re.finditer('\n', text)]
+
+
+def utf16_length(text):
+    """Longitud en unidades UTF-16 (las columnas de LSP se miden así)."""
+    return len(text) + sum(1 for ch in text if ord(ch) > 0xFFFF)
+
+
+def position_to_offset(text, starts, position):
+    """Posición LSP (línea, carácter UTF-16) -> offset en `text`."""
+    line = min(max(position['line'], 0), len(starts) - 1)
+    start = starts[line]
+    end = starts[line + 1] - 1 if line + 1 < len(starts) else len(text)
+    units = position['character']
+    offset = start
+    while offset < end and units > 0:
+        units -= 2 if ord(text[offset]) > 0xFFFF else 1
+        offset += 1
+    return offset
+
+
+def offset_to_position(text, starts, offset):
+    """Offset en `text` -> posición LSP."""
+    line = bisect.bisect_right(starts, offset) - 1
+    return {'line': line, 'character': utf16_length(text[starts[line]:offset])}
+
+
+def format_symbol(sym):
+    """Texto del hover de un símbolo (mismos datos que `symbols.txt`)."""
+    name = sym['lexeme']
+    sym_type = sym['type']
+    if isinstance(sym_type, lex.FunctionType):
+        params = ', '.join(sym_type.params) or lex.T_VOID
+        header = f"function {sym_type.ret} {name}({params})"
+    else:
+        header = f"{sym_type or '?'} {name}"
+    lines = [f"```myjs\n{header}\n```"]
+    scope = f"local de `{sym['scope']}`" if sym['scope'] else "global"
+    if sym['displacement'] is not None:
+        scope += f", despl: {sym['displacement']}"
+    lines.append(scope)
+    return '\n\n'.join(lines)
+
+
+class Document:
+    """Documento abierto en el editor y su último análisis."""
+
+    def __init__(self, uri, text, version):
+        self.uri = uri
+        self.text = text
+        self.version = version
+        self.timer = None        # Análisis programado (debounce)
+        self.running = False     # Hay un análisis en curso
+        self.dirty = False       # Hubo cambios durante el análisis en curso
+        self.closed = False
+        self.published_version = None
+        # Último análisis completado: texto analizado y su índice
+        self.analyzed_text = None
+        self.analyzed_starts = None
+        self.index = None
+
+
+class LanguageServer:
+    """Servidor LSP: bucle asyncio + hilo lector de stdin + proceso de análisis."""
+
+    def __init__(self, workers=1, debounce=DEBOUNCE_SECONDS, use_cache=True, grammar_path=None,
+                 stdin=None, stdout=None):
+        global _compiled
+        grammar_path = grammar_path or lex.get_resource_path('Gramatica.txt')
+        _compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+        # `spawn`: un hijo creado con fork mientras el hilo lector está bloqueado
+        # en stdin se quedaría colgado al cerrar su copia de stdin.
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(grammar_path, use_cache))
+        self.workers = workers
+        self.debounce = debounce
+        # Lector propio sobre el descriptor de stdin: el hilo lector puede seguir
+        # bloqueado en él al salir sin bloquear el cierre de `sys.stdin`.
+        self.stdin = stdin or open(sys.stdin.fileno(), 'rb', closefd=False)
+        self.stdout = stdout or sys.stdout.buffer
+        self.documents = {}
+        self.loop = None
+        self.shutdown_requested = False
+        self.handlers = {
+            'initialize': self.on_initialize,
+            'shutdown': self.on_shutdown,
+            'exit': self.on_exit,
+            'textDocument/didOpen': self.on_did_open,
+            'textDocument/didChange': self.on_did_change,
+            'textDocument/didSave': self.on_did_save,
+            'textDocument/didClose': self.on_did_close,
+            'textDocument/hover': self.on_hover,
+            'textDocument/definition': self.on_definition,
+        }
+
+    # --- Transporte (JSON-RPC con cabeceras Content-Length) ---
+
+    def run(self):
+        """Atiende al editor hasta `exit` o fin de stdin. Devuelve el código de salida."""
+        self.loop = asyncio.new_event_loop()
+        # Arrancar los procesos de análisis antes de leer (sin latencia en el 1er análisis).
+        list(self.executor.map(_warm_up, range(self.workers)))
+        threading.Thread(target=self._read_messages, daemon=True).start()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.loop.close()
+        return 0 if self.shutdown_requested else 1
+
+    def _read_messages(self):
+        """Hilo lector: decodifica mensajes de stdin y los pasa al bucle de eventos."""
+        while True:
+            length = None
+            while True:
+                header = self.stdin.readline()
+                if not header:
+                    self.loop.call_soon_threadsafe(self.loop.stop)
+                    return
+                header = header.strip()
+                if not header:
+                    break
+                name, _, value = header.decode('ascii', 'replace').partition(':')
+                if name.lower() == 'content-length' and value.strip().isdigit():
+                    length = int(value)
+            if length is None:
+                continue
+            # Un mensaje mal formado se responde con un error y se sigue leyendo.
+            try:
+                message = json.loads(self.stdin.read(length))
+                if not isinstance(message, dict):
+                    raise ValueError('el mensaje no es un objeto JSON')
+            except ValueError as e:
+                error = {'id': None, 'error': {'code': PARSE_ERROR,
+                                               'message': f'Mensaje inválido: {e}'}}
+                self.loop.call_soon_threadsafe(self.send, error)
+                continue
+            self.loop.call_soon_threadsafe(self.dispatch, message)
+
+    def send(self, message):
+        message['jsonrpc'] = '2.0'
+        body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+        self.stdout.write(f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body)
+        self.stdout.flush()
+
+    def notify(self, method, params):
+        self.send({'method': method, 'params': params})
+
+    def dispatch(self, message):
+        method = message.get('method')
+        if method is None:
+            return  # Respuesta del editor a una petición nuestra: no se usan.
+        handler = self.handlers.get(method)
+        request_id = message.get('id')
+        if handler is None:
+            if request_id is not None:
+                self.send({'id': request_id, 'error': {'code': METHOD_NOT_FOUND,
+                                                       'message': f'Método no soportado: {method}'}})
+            return
+        # Un fallo en un manejador no detiene el servidor: se responde con el
+        # error de JSON-RPC (o se notifica en el log, si no era una petición).
+        params = message.get('params') or {}
+        try:
+            if not isinstance(params, dict):
+                raise TypeError('params no es un objeto')
+            result = handler(params)
+        except (KeyError, TypeError, ValueError, IndexError) as e:
+            error = {'code': INVALID_PARAMS, 'message': f'Parámetros inválidos en {method}: {e!r}'}
+        except Exception as e:
+            error = {'code': INTERNAL_ERROR, 'message': f'Error interno en {method}: {e!r}'}
+        else:
+            if request_id is not None:
+                self.send({'id': request_id, 'result': result})
+            return
+        if request_id is not None:
+            self.send({'id': request_id, 'error': error})
+        else:
+            self.notify('window/logMessage', {'type': LOG_ERROR, 'message': error['message']})
+
+    # --- Ciclo de vida ---
+
+    def on_initialize(self, params):
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': SYNC_INCREMENTAL,
+                                     'save': {'includeText': False}},
+                'hoverProvider': True,
+                'definitionProvider': True,
+            },
+            'serverInfo': {'name': 'myjs-analyzer', 'version': lex.ANALYZER_VERSION},
+        }
+
+    def on_shutdown(self, params):
+        self.shutdown_requested = True
+        return None
+
+    def on_exit(self, params):
+        self.loop.stop()
+
+    # --- Sincronización de documentos ---
+
+    def on_did_open(self, params):
+        item = params['textDocument']
+        doc = Document(item['uri'], item['text'], item.get('version', 0))
+        self.documents[doc.uri] = doc
+        self.schedule(doc, 0)
+
+    def on_did_change(self, params):
+        doc = self.documents.get(params['textDocument']['uri'])
+        if doc is None:
+            return
+        for change in params['contentChanges']:
+            if 'range' not in change:
+                doc.text = change['text']
+            else:
+                starts = line_starts(doc.text)
+                start = position_to_offset(doc.text, starts, change['range']['start'])
+                end = position_to_offset(doc.text, starts, change['range']['end'])
+                doc.text = doc.text[:start] + change['text'] + doc.text[end:]
+        doc.version = params['textDocument'].get('version', doc.version + 1)
+        self.schedule(doc, self.debounce)
+
+    def on_did_save(self, params):
+        doc = self.documents.get(params['textDocument']['uri'])
+        if doc is not None and doc.version != doc.published_version:
+            self.schedule(doc, 0)
+
+    def on_did_close(self, params):
+        doc = self.documents.pop(params['textDocument']['uri'], None)
+        if doc is not None:
+            doc.closed = True
+            if doc.timer is not None:
+                doc.timer.cancel()
+            self.notify('textDocument/publishDiagnostics', {'uri': doc.uri, 'diagnostics': []})
+
+    # --- Análisis ---
+
+    def schedule(self, doc, delay):
+        """(Re)programa el análisis de `doc`: los cambios anteriores quedan absorbidos."""
+        if doc.timer is not None:
+            doc.timer.cancel()
+        doc.timer = self.loop.call_later(delay, self.start_analysis, doc)
+
+    def start_analysis(self, doc):
+        doc.timer = None
+        if doc.closed:
+            return
+        if doc.running:
+            # Se reanaliza al terminar el análisis en curso (que queda obsoleto).
+            doc.dirty = True
+            return
+        doc.running = True
+        text, version = doc.text, doc.version
+        future = self.loop.run_in_executor(self.executor, analyze_for_editor, text,
+                                          doc.uri)
+        future.add_done_callback(lambda f: self.finish_analysis(doc, text, version, f))
+
+    def finish_analysis(self, doc, text, version, future):
+        doc.running = False
+        if doc.closed:
+            return
+        try:
+            index = future.result()
+        except Exception as e:
+            self.notify('window/logMessage', {'type': LOG_ERROR,
+                                              'message': f'Error al analizar {doc.uri}: {e}'})
+            index = None
+        stale = doc.dirty or version != doc.version
+        if stale:
+            # Los cambios llegados durante el análisis se analizan aunque este fallara.
+            doc.dirty = False
+            if doc.timer is None:
+                self.start_analysis(doc)
+        if index is None or (stale and doc.index is not None):
+            return
+        # Un resultado obsoleto solo se conserva (para hover/definición) si no
+        # había ninguno; sus diagnósticos no se publican.
+        doc.analyzed_text = text
+        doc.analyzed_starts = line_starts(text)
+        doc.index = index
+        if not stale:
+            doc.published_version = version
+            self.publish_diagnostics(doc)
+
+    def publish_diagnostics(self, doc):
+        text, starts = doc.analyzed_text, doc.analyzed_starts
+        diagnostics = []
+        for kind, line, message in doc.index['diagnostics']:
+            line = min(max(line - 1, 0), len(starts) - 1)
+            end = starts[line + 1] - 1 if line + 1 < len(starts) else len(text)
+            diagnostics.append({
+                'range': {'start': {'line': line, 'character': 0},
+                          'end': offset_to_position(text, starts, end)},
+                'severity': SEVERITY_ERROR,
+                'source': 'myjs',
+                'code': kind,
+                'message': message,
+            })
+        self.notify('textDocument/publishDiagnostics',
+                    {'uri': doc.uri, 'version': doc.version, 'diagnostics': diagnostics})
+
+    # --- Consultas sobre el último análisis ---
+
+    def identifier_at(self, params):
+        """Documento y (posición TS, offset inicial, offset final) del identificador bajo el cursor."""
+        doc = self.documents.get(params['textDocument']['uri'])
+        if doc is None or doc.index is None:
+            return None, None
+        text, starts, index = doc.analyzed_text, doc.analyzed_starts, doc.index
+        offset = position_to_offset(text, starts, params['position'])
+        i = bisect.bisect_right(index['id_offsets'], offset) - 1
+        if i < 0:
+            return doc, None
+        start = index['id_offsets'][i]
+        match = IDENTIFIER.match(text, start)
+        if match is None or offset > match.end():
+            return doc, None
+        return doc, (index['id_positions'][i], start, match.end())
+
+    def on_hover(self, params):
+        doc, found = self.identifier_at(params)
+        if found is None:
+            return None
+        pos, start, end = found
+        sym = doc.index['symbols'].get(pos)
+        if sym is None:
+            return None
+        text, starts = doc.analyzed_text, doc.analyzed_starts
+        return {
+            'contents': {'kind': 'markdown', 'value': format_symbol(sym)},
+            'range': {'start': offset_to_position(text, starts, start),
+                      'end': offset_to_position(text, starts, end)},
+        }
+
+    def on_definition(self, params):
+        doc, found = self.identifier_at(params)
+        if found is None:
+            return None
+        start = doc.index['definitions'].get(found[0])
+        if start is None:
+            return None
+        text, starts = doc.analyzed_text, doc.analyzed_starts
+        end = IDENTIFIER.match(text, start).end()
+        return {'uri': doc.uri,
+                'range': {'start': offset_to_position(text, starts, start),
+                          'end': offset_to_position(text, starts, end)}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor LSP de MyJS (stdio)')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS,
+                        help=f'Segundos sin cambios antes de reanalizar (por defecto, {DEBOUNCE_SECONDS})')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='Procesos de análisis (por defecto, 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='No usar la caché en disco de la tabla LL(1)')
+    args = parser.parse_args()
+    server = LanguageServer(args.workers, args.debounce, use_cache=not args.no_cache)
+    sys.exit(server.run())
+
+
+if __name__ == '__main__':
+    # Los procesos del pool en un ejecutable congelado (PyInstaller, spawn).
+    multiprocessing.freeze_support()
+    main()
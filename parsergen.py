@@ -0,0 +1,313 @@
+"""Generador de un parser LL(1) especializado para MyJS.
+
+Compila Gramatica.txt + SEMANTIC_RULES en un módulo Python autónomo con un
+parser predictivo sin tabla: una función por no terminal con la selección de
+producción cableada (comparaciones directas sobre `token.type`) y las acciones
+semánticas llamadas en el punto exacto del EdT.
+
+El parser generado es equivalente a `Analyzer.parse()` de lex.py: misma
+`production_sequence`, mismos errores y mismas tablas de símbolos. Para ello el
+orden de ejecución de símbolos y acciones de cada producción se obtiene de las
+secuencias precompiladas del intérprete (`expansion_table`). La recursión por la derecha de
+una producción sobre su propio no terminal (S -> LC S, Cuerpo -> LC Cuerpo,
+ExpresionAux -> and Expresion1 ExpresionAux, ...) se convierte en un bucle, de
+modo que la profundidad de recursión solo depende del anidamiento del fuente.
+Si ese anidamiento agota el límite de recursión, `parse()` devuelve None y
+`Analyzer` repite el análisis con el intérprete de la tabla (pila explícita).
+
+Uso:
+    python parsergen.py [-o myjs_parser.py]
+"""
+import argparse
+import sys
+
+GENERATED_MODULE_NAME = 'myjs_parser_generado'
+
+# Límite de recursión durante el análisis con el parser generado: cada nivel de
+# anidamiento de expresiones/if es una llamada Python, así que el límite por
+# defecto (1000) se agota con pocos cientos de paréntesis. Solo se eleva desde
+# Python 3.11, donde las llamadas Python->Python no consumen pila de C; un
+# anidamiento mayor sigue dando RecursionError (ver `build_generated_parser`).
+RECURSION_LIMIT = 100000
+
+
+def _is_lambda(production):
+    return not production or production[0] == 'lambda'
+
+
+class _Emitter:
+    def __init__(self):
+        self.lines = []
+
+    def __call__(self, indent, text=''):
+        self.lines.append(('    ' * indent + text) if text else '')
+
+    def source(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def generate_parser_source(grammar, expansion_table, token_to_grammar):
+    """Devuelve el código fuente del módulo con el parser especializado.
+
+    Args:
+        grammar: Gramática cargada (`CompiledGrammar.grammar`).
+        expansion_table: Expansiones precompiladas nt -> terminal -> (nº, items)
+            (`CompiledGrammar.expansion_table`); los items están en orden de apilado.
+        token_to_grammar: Mapeo token.type -> terminal (`lex.TOKEN_TO_GRAMMAR`).
+    """
+    terminals = grammar['terminals']
+    non_terminals = grammar['non_terminals']
+    numbers = grammar['production_numbers']
+    grammar_to_token = {term: tok for tok, term in token_to_grammar.items()}
+
+    def token_type(terminal):
+        return grammar_to_token.get(terminal, terminal.upper())
+
+    # No terminales en orden de aparición en la gramática (código legible y estable).
+    ordered_nts = [nt for nt in grammar['productions'] if nt in non_terminals]
+    ordered_nts += sorted(nt for nt in non_terminals if nt not in grammar['productions'])
+
+    productions_by_number = {num: prod for (_, prod), num in numbers.items()}
+
+    action_names = set()
+    for row in expansion_table.values():
+        for _, items in row.values():
+            action_names.update(item.__name__ for item in items if callable(item))
+
+    out = _Emitter()
+    out(0, '"""Parser LL(1) especializado para MyJS (generado por parsergen.py).')
+    out(0)
+    out(0, 'NO EDITAR A MANO: regenerar con `python parsergen.py -o <fichero>`.')
+    out(0, f'Axioma: {grammar["axiom"]}. Producciones: {len(numbers)}.')
+    out(0, '"""')
+    out(0)
+    out(0)
+    out(0, 'class SyntaxStop(Exception):')
+    out(1, '"""Aborta el análisis tras notificar un error sintáctico."""')
+    out(0)
+    out(0)
+    out(0, 'def make_parser(rt):')
+    out(1, '"""Enlaza el parser con la sesión `rt` (`lex.Analyzer`).')
+    out(0)
+    out(1, '`rt` aporta las acciones semánticas, el lexer, la tabla de símbolos,')
+    out(1, 'handle_syntactic_error y el estado de la sesión (current_token,')
+    out(1, 'last_id_pos, production_sequence, global_initialized).')
+    out(1, '"""')
+    out(1, 'eof_token = rt.EOF_TOKEN')
+    out(1, 'handle_syntactic_error = rt.handle_syntactic_error')
+    out(1, 'token_type_to_grammar_symbol = rt.token_type_to_grammar_symbol')
+    for name in sorted(action_names):
+        out(1, f'{name} = rt.{name}')
+    out(1, 'tok = None')
+    out(1, 'tt = None')
+    out(1, 'seq_append = None')
+    out(1, 'lexer = lexer_token = add_symbol = add_token = None')
+    out(0)
+    # `Analyzer.advance_token` + `get_next_token` en línea: es el paso por token.
+    out(1, 'def advance():')
+    out(2, 'nonlocal tok, tt')
+    out(2, 'rt.prev_token = rt.current_token')
+    out(2, 'tok = lexer_token()')
+    out(2, 'if tok is None:')
+    out(3, 'tok = eof_token')
+    out(3, 'if add_token is not None:')
+    out(4, "add_token('EOF', None, 0, lexer.lexpos)")
+    out(2, 'else:')
+    out(3, "if tok.type == 'ID':")
+    out(4, "tok.value = add_symbol(tok.value, 'ID', tok.value)")
+    out(3, 'if add_token is not None:')
+    out(4, 'add_token(tok.type, tok.value, tok.lineno, tok.lexpos)')
+    out(2, 'rt.current_token = tok')
+    out(2, 'tt = tok.type')
+    out(0)
+    out(1, 'def expect(top):')
+    out(2, 'handle_syntactic_error(top, token_type_to_grammar_symbol(tok), tok)')
+    out(2, 'raise SyntaxStop')
+    out(0)
+
+    selection_sets = []
+
+    def selection_test(nt, types):
+        types = sorted(types)
+        if len(types) == 1:
+            return f"tt == {types[0]!r}"
+        name = f"_SEL_{nt}_{len(selection_sets)}"
+        selection_sets.append((name, types))
+        return f"tt in {name}"
+
+    def emit_body(indent, nt, items, selected_by, tail):
+        """Emite símbolos/acciones en orden de ejecución.
+
+        `selected_by` es el conjunto de token.type que eligieron la producción:
+        si el primer elemento es un terminal único de ese conjunto no se
+        vuelve a comprobar. Con `tail`, el último no terminal (igual a `nt`) no
+        se llama: las acciones posteriores se apilan en `pending` (que se crea
+        la primera vez que hace falta: casi todas las llamadas no la usan).
+        """
+        first = True
+        for pos, item in enumerate(items):
+            if callable(item):
+                out(indent, f'{item.__name__}()')
+                continue
+            if tail is not None and pos == tail:
+                post = items[pos + 1:]
+                if post:
+                    names = ', '.join(act.__name__ for act in reversed(post))
+                    out(indent, 'if pending is None:')
+                    out(indent + 1, 'pending = []')
+                    out(indent, f'pending.extend(({names},))')
+                out(indent, 'continue')
+                return
+            if item in terminals or item == 'eof':
+                ttype = token_type(item)
+                if not (first and selected_by == {ttype}):
+                    out(indent, f'if tt != {ttype!r}:')
+                    out(indent + 1, f'expect({item!r})')
+                if item == 'id':
+                    out(indent, 'rt.last_id_pos = tok.value')
+                if item != 'eof':
+                    # EOF es sentinela: se acepta sin avanzar el lexer (igual que parse()).
+                    out(indent, 'advance()')
+            elif item in non_terminals:
+                out(indent, f'p_{item}()')
+            else:
+                out(indent, f'rt.unknown_symbol({item!r})')
+                out(indent, 'raise SyntaxStop')
+                return
+            first = False
+
+    for nt in ordered_nts:
+        # Agrupar por producción los terminales que la seleccionan (orden de la gramática).
+        selected = {}
+        for terminal, (number, items) in expansion_table.get(nt, {}).items():
+            entry = selected.setdefault(id(items), [number, items, set()])
+            entry[2].add(token_type(terminal))
+        branches = []
+        for number, pushed, types in sorted(selected.values(), key=lambda e: e[0] or 0):
+            production = productions_by_number.get(number, ())
+            # Pila LIFO: el orden de ejecución es el inverso del de apilado.
+            items = list(reversed(pushed))
+            tail = None
+            if not _is_lambda(production) and production[-1] == nt:
+                symbol_positions = [i for i, it in enumerate(items) if not callable(it)]
+                tail = symbol_positions[-1]
+            branches.append((production, number, types, items, tail))
+
+        loops = any(b[4] is not None for b in branches)
+        needs_pending = any(
+            b[4] is not None and len(b[3]) > b[4] + 1 for b in branches)
+
+        out(1, f'def p_{nt}():')
+        indent = 2
+        if needs_pending:
+            out(2, 'pending = None')
+        if loops:
+            out(2, 'while True:')
+            indent = 3
+        for i, (production, number, types, items, tail) in enumerate(branches):
+            keyword = 'if' if i == 0 else 'elif'
+            out(indent, f'{keyword} {selection_test(nt, types)}:')
+            out(indent + 1, f'# {nt} -> {" ".join(production)}')
+            if number is not None:
+                out(indent + 1, f'seq_append({number})')
+            emit_body(indent + 1, nt, items, types, tail)
+            if loops and tail is None:
+                out(indent + 1, 'break')
+        out(indent, 'else:')
+        out(indent + 1, f'expect({nt!r})')
+        if needs_pending:
+            out(2, 'if pending is not None:')
+            out(3, 'for act in reversed(pending):')
+            out(4, 'act()')
+        out(0)
+
+    axiom = grammar['axiom']
+    out(1, 'def parse():')
+    out(2, '"""Equivalente a Analyzer.parse(): True si la entrada es sintácticamente correcta.')
+    out(0)
+    out(2, 'None si el anidamiento del fuente agota el límite de recursión (el estado')
+    out(2, 'de la sesión queda a medias: hay que repetir el análisis).')
+    out(2, '"""')
+    out(2, 'nonlocal tok, tt, seq_append, lexer, lexer_token, add_symbol, add_token')
+    # El lexer, la tabla de símbolos y los tokens pueden cambiar entre análisis.
+    out(2, 'lexer = rt.lexer')
+    out(2, 'lexer_token = lexer.token')
+    out(2, 'add_symbol = rt.symtab.add_symbol')
+    out(2, 'add_token = rt.tokens.add if rt.keep_tokens else None')
+    out(2, 'sequence = []')
+    out(2, 'rt.production_sequence = sequence')
+    out(2, 'seq_append = sequence.append')
+    out(2, 'rt.global_initialized = False')
+    out(2, 'rt.action_init_global()')
+    out(2, 'tok = rt.current_token')
+    out(2, 'tt = tok.type')
+    out(2, 'try:')
+    out(3, f'p_{axiom}()')
+    out(3, "if tt != 'EOF':")
+    out(4, "expect('eof')")
+    out(2, 'except SyntaxStop:')
+    out(3, 'return False')
+    out(2, 'except RecursionError:')
+    out(3, 'return None')
+    out(2, "return token_type_to_grammar_symbol(rt.current_token) == 'eof'")
+    out(0)
+    out(1, 'return parse')
+
+    # Los conjuntos de selección se definen como constantes del módulo.
+    header_end = out.lines.index('class SyntaxStop(Exception):')
+    constants = [f'{name} = frozenset({tuple(types)!r})' for name, types in selection_sets]
+    out.lines[header_end:header_end] = constants + ['', '']
+    return out.source()
+
+
+def compile_parser(compiled, token_to_grammar):
+    """Genera y compila en memoria el parser de `compiled` (`lex.CompiledGrammar`).
+
+    Devuelve `make_parser`. Se genera una sola vez por gramática compilada y se
+    reutiliza para todas las sesiones que la comparten.
+    """
+    make_parser = getattr(compiled, 'generated_make_parser', None)
+    if make_parser is None:
+        source = generate_parser_source(compiled.grammar, compiled.expansion_table,
+                                        token_to_grammar)
+        namespace = {'__name__': GENERATED_MODULE_NAME}
+        exec(compile(source, f'<{GENERATED_MODULE_NAME}>', 'exec'), namespace)
+        make_parser = compiled.generated_make_parser = namespace['make_parser']
+    return make_parser
+
+
+def build_generated_parser(rt):
+    """Enlaza el parser especializado con la sesión `rt` (`lex.Analyzer`).
+
+    Devuelve una función `parse()` con la misma interfaz que `Analyzer.parse`,
+    salvo que devuelve None si el anidamiento del fuente es demasiado profundo.
+    """
+    # El límite de recursión es global al intérprete: se eleva una vez y no se
+    # restaura, para no interferir con análisis en curso en otros hilos.
+    if sys.version_info >= (3, 11) and sys.getrecursionlimit() < RECURSION_LIMIT:
+        sys.setrecursionlimit(RECURSION_LIMIT)
+    return compile_parser(rt.compiled, rt.TOKEN_TO_GRAMMAR)(rt)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Genera un parser LL(1) especializado a partir de Gramatica.txt'
+    )
+    parser.add_argument('-o', '--output', help='Fichero de salida (por defecto, stdout)')
+    parser.add_argument('--grammar', help='Ruta de la gramática (por defecto, Gramatica.txt)')
+    args = parser.parse_args()
+
+    import lex
+    grammar_path = args.grammar or lex.get_resource_path('Gramatica.txt')
+    compiled = lex.load_compiled_grammar(grammar_path)
+    source = generate_parser_source(compiled.grammar, compiled.expansion_table,
+                                    lex.TOKEN_TO_GRAMMAR)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(source)
+    else:
+        sys.stdout.write(source)
+
+
+if __name__ == '__main__':
+    main()
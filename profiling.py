@@ -0,0 +1,469 @@
+"""Perfilado del analizador MyJS (`python lex.py --profile`).
+
+Mide el tiempo de pared y de CPU de cada fase (carga de la gramática,
+construcción de las tablas, lexer, parser, acciones semánticas y salida) y
+cuenta lo que pasa por el camino caliente: tokens, expansiones por no terminal,
+llamadas y tiempo acumulado de cada acción de `SEMANTIC_RULES`, consultas a la
+tabla de símbolos y profundidad máxima de la pila del parser y de `sem_stack`.
+
+Sin `--profile` no cuesta nada: `parse()` no lleva contadores. En modo perfil
+se envuelven las acciones semánticas (en una copia de la gramática compilada)
+y los métodos de la tabla de símbolos de la sesión, y la profundidad de la
+pila del parser se reconstruye después repitiendo `production_sequence`. El
+lexer se mide en una pasada aparte sobre el mismo fuente; el parser es el
+resto del análisis. Los contadores de acciones y de pila requieren el parser
+'tabla' (el 'generado' enlaza las acciones al generarse).
+
+Con `--profile-memory`, `MemoryProfiler` mide en su lugar la memoria con
+tracemalloc: pico y retenido por fase (gramática, lexer, parser, salida),
+tamaño de cada estructura de la sesión (tokens, `production_sequence`, tablas
+de símbolos, `function_tables`...) y bytes por línea y por token del fuente.
+
+Uso:
+    python lex.py programa.txt --profile
+    python lex.py programa.txt --profile-json perfil.json
+    python lex.py programa.txt --profile-collapsed perfil.folded
+    python lex.py programa.txt --profile-memory [--profile-json memoria.json]
+    flamegraph.pl perfil.folded > perfil.svg
+"""
+import copy
+import json
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+
+import lex
+
+# Métodos de `SymbolTable` que cuentan como consultas a la tabla de símbolos.
+SYMBOL_TABLE_METHODS = ('add_symbol', 'add_symbol_to_current_scope', 'get_symbol',
+                        'get_symbol_by_name')
+
+# Fases en el orden del informe (y su ruta en la salida para flame graphs).
+PHASES = {
+    'grammar': 'main;grammar',
+    'tables': 'main;grammar;tables',
+    'lexing': 'main;analyze;lexing',
+    'parsing': 'main;analyze;parsing',
+    'semantic': 'main;analyze;semantic',
+    'output': 'main;output',
+}
+
+
+class Profiler:
+    """Acumula tiempos por fase y contadores de un análisis."""
+
+    def __init__(self):
+        self.phases = {}            # fase -> [pared, CPU] en segundos
+        self.actions = {}           # acción -> [llamadas, segundos]
+        self.expansions = Counter() # no terminal -> nº de expansiones
+        self.symbol_lookups = Counter()
+        self.counters = {}
+        self.max_sem_stack = 0
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el bloque como la fase `name` (se acumula si se repite)."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add_phase(self, name, wall, cpu):
+        totals = self.phases.setdefault(name, [0.0, 0.0])
+        totals[0] += wall
+        totals[1] += cpu
+
+    # Instrumentación
+
+    def load_grammar(self, grammar_path, use_cache=True):
+        """`lex.load_compiled_grammar` midiendo aparte la construcción de las tablas.
+
+        Usa una subclase local de `CompiledGrammar`: la clase compartida no se
+        toca, así que otros hilos que carguen la gramática no se ven afectados.
+        """
+        profiler = self
+
+        class TimedGrammar(lex.CompiledGrammar):
+            def build_expansion_table(self):
+                with profiler.phase('tables'):
+                    super().build_expansion_table()
+
+            def build_dense_table(self):
+                with profiler.phase('tables'):
+                    super().build_dense_table()
+
+        with self.phase('grammar'):
+            return lex.load_compiled_grammar(grammar_path, use_cache=use_cache,
+                                             grammar_class=TimedGrammar)
+
+    def instrument(self, analyzer):
+        """Prepara la sesión: acciones cronometradas y tabla de símbolos con contadores."""
+        if analyzer.engine == 'tabla':
+            compiled = copy.copy(analyzer.compiled)
+            compiled.action_by_code = [self.timed_action(action)
+                                       for action in analyzer.compiled.action_by_code]
+            analyzer.compiled = compiled
+
+        reset_semantic_state = analyzer.reset_semantic_state
+
+        def reset():
+            reset_semantic_state()
+            for name in SYMBOL_TABLE_METHODS:
+                setattr(analyzer.symtab, name, self.counted(name, getattr(analyzer.symtab, name)))
+        analyzer.reset_semantic_state = reset
+
+    def timed_action(self, action):
+        stats = self.actions.setdefault(action.__name__, [0, 0.0])
+        clock = time.perf_counter
+
+        def run(session):
+            start = clock()
+            action(session)
+            stats[1] += clock() - start
+            stats[0] += 1
+            if len(session.sem_stack) > self.max_sem_stack:
+                self.max_sem_stack = len(session.sem_stack)
+        return run
+
+    def counted(self, name, method):
+        lookups = self.symbol_lookups
+
+        def run(*args, **kwargs):
+            lookups[name] += 1
+            return method(*args, **kwargs)
+        return run
+
+    # Análisis
+
+    def analyze(self, analyzer, source):
+        """`analyzer.analyze(source)` con el desglose lexer / parser / semántico."""
+        with self.phase('lexing'):
+            tokens = count_tokens(analyzer, source)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = analyzer.analyze(source)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        lex_wall, lex_cpu = self.phases['lexing']
+        # Las acciones solo se cronometran en tiempo de pared: su CPU se estima
+        # con la proporción CPU/pared del análisis completo.
+        action_wall = sum(seconds for _, seconds in self.actions.values())
+        action_cpu = action_wall * cpu / wall if wall else 0.0
+        self.add_phase('semantic', action_wall, action_cpu)
+        self.add_phase('parsing', max(wall - lex_wall - action_wall, 0.0),
+                       max(cpu - lex_cpu - action_cpu, 0.0))
+
+        compiled = analyzer.compiled
+        nonterminal_of = {num: nt for (nt, _), num in compiled.grammar['production_numbers'].items()}
+        self.expansions.update(nonterminal_of[num] for num in result.production_sequence)
+        self.counters.update({
+            'lines': len(source.splitlines()),
+            'tokens': tokens,
+            'expansions': len(result.production_sequence),
+            'symbol_lookups': sum(self.symbol_lookups.values()),
+        })
+        if analyzer.engine == 'tabla':
+            self.counters.update({
+                'semantic_actions': sum(calls for calls, _ in self.actions.values()),
+                'max_parser_stack': max_stack_depth(compiled, result.production_sequence),
+                'max_sem_stack': self.max_sem_stack,
+            })
+        return result
+
+    # Informe
+
+    def report(self):
+        """Informe como diccionario (lo que se exporta en JSON)."""
+        return {
+            'phases': {name: {'wall': wall, 'cpu': cpu} for name, (wall, cpu) in self.phases.items()},
+            'counters': dict(self.counters),
+            'expansions': dict(self.expansions.most_common()),
+            'actions': {name: {'calls': calls, 'seconds': seconds}
+                        for name, (calls, seconds) in sorted(self.actions.items(),
+                                                             key=lambda item: -item[1][1])
+                        if calls},
+            'symbol_lookups': dict(self.symbol_lookups),
+        }
+
+    def render(self, top=15):
+        """Informe legible (las `top` acciones y no terminales más costosos)."""
+        report = self.report()
+        lines = ["", "Perfil del análisis", f"{'fase':<10} {'pared (s)':>10} {'CPU (s)':>10}"]
+        for name in PHASES:
+            if name in report['phases']:
+                phase = report['phases'][name]
+                lines.append(f"{name:<10} {phase['wall']:>10.4f} {phase['cpu']:>10.4f}")
+        lines.append("")
+        for name, value in report['counters'].items():
+            lines.append(f"{name:<18} {value:>12}")
+        if report['actions']:
+            lines += ["", f"{'acción semántica':<28} {'llamadas':>10} {'tiempo (s)':>11}"]
+            for name, stats in list(report['actions'].items())[:top]:
+                lines.append(f"{name:<28} {stats['calls']:>10} {stats['seconds']:>11.4f}")
+        if report['expansions']:
+            lines += ["", f"{'no terminal':<28} {'expansiones':>11}"]
+            for name, count in list(report['expansions'].items())[:top]:
+                lines.append(f"{name:<28} {count:>11}")
+        if report['symbol_lookups']:
+            lines += ["", f"{'tabla de símbolos':<28} {'llamadas':>10}"]
+            for name, count in report['symbol_lookups'].items():
+                lines.append(f"{name:<28} {count:>10}")
+        return "\n".join(lines)
+
+    def collapsed(self):
+        """Líneas `pila;de;llamadas microsegundos` (formato de flamegraph.pl)."""
+        lines = []
+        action_total = 0
+        for name, (calls, seconds) in self.actions.items():
+            if calls:
+                micros = round(seconds * 1e6)
+                action_total += micros
+                lines.append(f"{PHASES['semantic']};{name} {micros}")
+        for name, path in PHASES.items():
+            if name not in self.phases:
+                continue
+            micros = round(self.phases[name][0] * 1e6)
+            if name == 'grammar':
+                micros -= round(self.phases.get('tables', (0,))[0] * 1e6)
+            elif name == 'semantic':
+                micros -= action_total
+            if micros > 0:
+                lines.append(f"{path} {micros}")
+        return lines
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+
+
+class MemoryProfiler:
+    """Memoria del análisis (`--profile-memory`), con tracemalloc.
+
+    Misma interfaz que `Profiler`. Por fase da el pico y los bytes retenidos al
+    terminar: gramática, lexing (los tokens en un `TokenBuffer`, como con
+    `--lex-jobs`), parsing (el parser con sus acciones semánticas, leyendo esos
+    tokens), el total del análisis y la salida. Las sesiones incrementales no
+    admiten tokens precalculados: con ellas el análisis es una sola fase. Por
+    estructura de la sesión da su tamaño profundo tras el análisis (los objetos
+    compartidos, como los tipos internados, se cuentan una sola vez); y los
+    bytes por línea y por token, para dimensionar los workers. Las reservas del
+    propio tracemalloc y del sistema de importación no se cuentan en las
+    líneas de código. tracemalloc ralentiza mucho el análisis: los tiempos de
+    este modo no son representativos.
+    """
+
+    def __init__(self, top=10):
+        self.top = top
+        self.phases = {}       # fase -> {'peak': bytes, 'retained': bytes}
+        self.structures = {}   # estructura -> bytes
+        self.sites = []        # (fichero:línea, bytes) de lo retenido por el análisis
+        self.counters = {}
+        tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        """Pico y retenido del bloque, relativos a la memoria al empezarlo."""
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.phases[name] = {'peak': peak - before, 'retained': current - before}
+
+    def load_grammar(self, grammar_path, use_cache=True):
+        with self.phase('grammar'):
+            compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+        self.structures['compiled_grammar'] = deep_size(compiled, set())
+        return compiled
+
+    def instrument(self, analyzer):
+        pass
+
+    def analyze(self, analyzer, source):
+        buffer = None
+        if analyzer.on_unit_boundary is None:
+            before = snapshot()
+            with self.phase('lexing'):
+                lexer = lex.lex_parallel(source, 1, analyzer.lexer_engine)
+            buffer = lexer.buffer
+            tokens = len(buffer) + 1
+            with self.phase('parsing'):
+                result = analyzer.analyze_prelexed(source, lexer)
+            lexing, parsing = self.phases['lexing'], self.phases['parsing']
+            self.phases['analysis'] = {
+                'peak': max(lexing['peak'], lexing['retained'] + parsing['peak']),
+                'retained': lexing['retained'] + parsing['retained'],
+            }
+        else:
+            # Los tokens se cuentan antes (sin `keep_tokens` no quedan en el resultado).
+            tokens = count_tokens(analyzer, source)
+            before = snapshot()
+            with self.phase('analysis'):
+                result = analyzer.analyze(source)
+        after = snapshot()
+        self.sites = [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                       stat.size_diff)
+                      for stat in after.compare_to(before, 'lineno')[:self.top] if stat.size_diff > 0]
+
+        # Los tipos internados y los nombres de token son de todos los análisis.
+        seen = {id(obj) for obj in lex.tokens}
+        seen.update(id(t) for t in lex._TYPES.values())
+        symtab = analyzer.symtab
+        structures = {
+            'source': source,
+            'tokens': result.tokens,
+            'token_buffer': buffer,
+            'production_sequence': result.production_sequence,
+            'global_scope': symtab.scopes[0],
+            'symbol_index': symtab.index,
+            'function_tables': result.function_tables,
+            'sem_stack': analyzer.sem_stack,
+            'diagnostics': (result.lex_errors, result.sem_errors, result.syntax_errors),
+        }
+        for name, obj in structures.items():
+            self.structures[name] = deep_size(obj, seen)
+
+        lines = len(source.splitlines())
+        peak = self.phases['analysis']['peak']
+        self.counters.update({
+            'lines': lines,
+            'tokens': tokens,
+            'peak_bytes_per_line': peak / max(lines, 1),
+            'peak_bytes_per_token': peak / tokens,
+            'retained_bytes_per_token': self.phases['analysis']['retained'] / tokens,
+        })
+        return result
+
+    def report(self):
+        return {
+            'phases': self.phases,
+            'structures': dict(sorted(self.structures.items(), key=lambda item: -item[1])),
+            'counters': dict(self.counters),
+            'allocation_sites': dict(self.sites),
+            'peak_total': tracemalloc.get_traced_memory()[1],
+        }
+
+    def render(self):
+        report = self.report()
+        lines = ["", "Memoria del análisis",
+                 f"{'fase':<10} {'pico':>12} {'retenido':>12}"]
+        for name, phase in report['phases'].items():
+            lines.append(f"{name:<10} {format_bytes(phase['peak']):>12} "
+                         f"{format_bytes(phase['retained']):>12}")
+        lines += ["", f"{'estructura':<22} {'tamaño':>12}"]
+        for name, size in report['structures'].items():
+            lines.append(f"{name:<22} {format_bytes(size):>12}")
+        lines.append("")
+        for name, value in report['counters'].items():
+            value = f"{value:.1f}" if isinstance(value, float) else value
+            lines.append(f"{name:<26} {value:>12}")
+        if report['allocation_sites']:
+            lines += ["", f"{'retenido por línea de código':<34} {'tamaño':>12}"]
+            for site, size in report['allocation_sites'].items():
+                lines.append(f"{site:<34} {format_bytes(size):>12}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+
+def snapshot():
+    """Instantánea de tracemalloc sin las reservas del propio tracemalloc ni de las importaciones."""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+
+
+def count_tokens(analyzer, source):
+    """Nº de tokens de `source` (incluido el EOF), con una pasada solo del lexer.
+
+    Deja la sesión a medio usar: hay que llamarla antes de `analyzer.analyze()`,
+    que la reinicia.
+    """
+    analyzer.reset()
+    lexer = analyzer.lexer
+    lexer.lineno = 1
+    lexer.input(source)
+    tokens = 1
+    while lexer.token() is not None:
+        tokens += 1
+    return tokens
+
+
+def format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def deep_size(obj, seen):
+    """Bytes de `obj` y de todo lo que alcanza (`sys.getsizeof` recursivo).
+
+    Los objetos cuyo id está en `seen` no se cuentan (y se añaden los
+    visitados): con un `seen` compartido cada objeto cuenta una sola vez.
+    """
+    total = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float, array)):
+            continue
+        else:
+            if hasattr(obj, '__dict__'):
+                pending.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, '__slots__', ()):
+                    if hasattr(obj, slot):
+                        pending.append(getattr(obj, slot))
+    return total
+
+
+def max_stack_depth(compiled, production_sequence):
+    """Profundidad máxima de la pila de `parse()` para esa secuencia de producciones.
+
+    Repite el análisis sobre la pila codificada (sin tokens): las expansiones
+    salen de `production_sequence` y terminales y acciones se desapilan. Si la
+    secuencia acaba antes (error sintáctico) se devuelve lo alcanzado hasta ahí.
+    """
+    items_of = {}
+    for row in compiled.dense_table:
+        for entry in row:
+            if entry is not None and entry[0] is not None:
+                items_of[entry[0]] = entry[1]
+    n_terminals = compiled.num_terminals
+    unknown_code = compiled.first_unknown_code
+    symbol_codes = compiled.symbol_codes
+    stack = [symbol_codes['eof'], symbol_codes[compiled.grammar['axiom']]]
+    depth = len(stack)
+    productions = iter(production_sequence)
+    while stack:
+        top = stack.pop()
+        if n_terminals <= top < unknown_code:
+            num = next(productions, None)
+            if num is None:
+                break
+            stack.extend(items_of[num])
+            depth = max(depth, len(stack))
+    return depth
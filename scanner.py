@@ -0,0 +1,142 @@
+"""Lexer de MyJS con una expresión regular maestra (motor léxico 'regex').
+
+`Scanner` sustituye en ejecución al lexer de PLY: las mismas reglas `t_*` de
+lex.py, compiladas en una sola expresión, dan los mismos tokens, errores
+léxicos y números de línea. Es el motor por defecto de `lex.Analyzer`.
+
+Uso:
+    import scanner
+    lexer = scanner.Scanner()
+    lexer.input(source)
+    tok = lexer.token()
+"""
+import re
+
+import lex
+from lex import Token, reserved, t_FLOATCONST, t_INTCONST, t_STR, t_ID, t_error
+
+
+# Texto ignorado entre tokens: t_ignore, saltos de línea (t_newline) y comentarios
+# (t_COMMENT). Un carácter por iteración y el comentario siempre hasta el final de
+# la línea, para que al retroceder no se pueda casar un token dentro de ellos.
+IGNORED = r'(?:[ \t\n]|//[^\n]*(?![^\n]))*'
+
+
+def master_regex():
+    """Expresión maestra: texto ignorado + un grupo por regla, en el orden de PLY.
+
+    Primero las reglas-función por orden de definición y después las reglas
+    cadena de mayor a menor longitud de su regex (la alternativa de `re` se
+    queda con la primera que casa, no con la más larga). Los comentarios y
+    saltos de línea no llevan a ningún token y van en el prefijo `IGNORED`.
+    """
+    functions = [t_FLOATCONST, t_INTCONST, t_STR, t_ID]
+    strings = [(name[2:], regex) for name, regex in vars(lex).items()
+               if name.startswith('t_') and name != 't_ignore' and isinstance(regex, str)]
+    strings.sort(key=lambda rule: len(rule[1]), reverse=True)
+    groups = [(f.__name__[2:], f.__doc__) for f in functions] + strings
+    alternatives = '|'.join(f'(?P<{name}>{regex})' for name, regex in groups)
+    return re.compile(f'{IGNORED}(?:{alternatives})', re.VERBOSE)
+
+
+class Scanner:
+    """Lexer de MyJS con una única expresión regular maestra (sin PLY en ejecución).
+
+    Produce exactamente los mismos tokens, errores y números de línea que el
+    lexer de PLY construido con las reglas `t_*`, con la misma interfaz
+    (`input`, `token`, `lineno`, `lexpos`, `skip`, `clone`). Cada token es un
+    solo `match` de la expresión maestra (espacios, saltos de línea y
+    comentarios incluidos) y se despacha por el número de grupo; los
+    identificadores, símbolos y enteros cortos se resuelven en línea y el resto
+    de constantes (y los caracteres ilegales) pasan por su regla `t_*`, así que
+    sus errores léxicos no se duplican aquí.
+    """
+
+    # Se compilan una vez, al crear el primer Scanner (ver `_compile`).
+    master = None
+    ignored = None
+    kinds = None      # nº de grupo -> tipo de token
+    rules = None      # nº de grupo -> regla t_* que procesa el token
+    id_group = None
+    int_group = None
+
+    @classmethod
+    def _compile(cls):
+        master = master_regex()
+        cls.kinds = [None] * (master.groups + 1)
+        for name, group in master.groupindex.items():
+            cls.kinds[group] = name
+        cls.rules = {master.groupindex[rule.__name__[2:]]: rule
+                     for rule in (t_FLOATCONST, t_INTCONST, t_STR)}
+        cls.id_group = master.groupindex['ID']
+        cls.int_group = master.groupindex['INTCONST']
+        cls.ignored = re.compile(IGNORED)
+        cls.master = master
+
+    def __init__(self):
+        if Scanner.master is None:
+            Scanner._compile()
+        self.analyzer = None
+        self.lineno = 1
+        self.input('')
+
+    def clone(self):
+        return Scanner()
+
+    def input(self, data):
+        self.lexdata = data
+        self.lexpos = 0
+        self.lexlen = len(data)
+        self._next = -1  # lexpos tras el último match (si no cambia, se sigue con `_match`)
+        self._match = None
+
+    def skip(self, n):
+        self.lexpos += n
+
+    def token(self):
+        while True:
+            pos = self.lexpos
+            if pos != self._next:
+                # Primer token o lexpos movido desde fuera (skip(), reanálisis
+                # incremental): el objeto scanner de `re` continúa desde `pos`.
+                if pos > self.lexlen:
+                    return None  # como PLY, lexpos se queda más allá del final
+                self._match = self.master.scanner(self.lexdata, pos).match
+            m = self._match()
+            if m is None:
+                # Tras lo ignorado no empieza ningún token: fin del texto o carácter ilegal.
+                data = self.lexdata
+                start = self.ignored.match(data, pos).end()
+                self.lineno += data.count('\n', pos, start)
+                self.lexpos = start
+                self._next = -1
+                if start >= self.lexlen:
+                    return None
+                # Igual que PLY: t_error con el carácter ilegal (hace skip(1)).
+                tok = Token('error', data[start], self.lineno, start)
+                tok.lexer = self
+                t_error(tok)
+                continue
+
+            group = m.lastindex
+            start = m.start(group)
+            if start != pos:
+                self.lineno += self.lexdata.count('\n', pos, start)
+            self.lexpos = self._next = m.end()
+            if group == self.id_group:
+                # Igual que t_ID
+                name = m.group(group)
+                if name in reserved:
+                    return Token(reserved[name], '', self.lineno, start)
+                return Token('ID', name, self.lineno, start)
+            if group == self.int_group:
+                text = m.group(group)
+                if len(text) < 5:  # hasta 4 cifras siempre es válido para t_INTCONST
+                    return Token('INTCONST', int(text), self.lineno, start)
+            tok = Token(self.kinds[group], m.group(group), self.lineno, start)
+            rule = self.rules.get(group)
+            if rule is None:
+                return tok
+            tok.lexer = self
+            if rule(tok):
+                return tok
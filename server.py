@@ -0,0 +1,339 @@
+"""Servidor de análisis MyJS de larga duración (asyncio) y su cliente.
+
+El servidor compila la gramática una vez, mantiene un pool de procesos con
+sesiones `Analyzer` calientes y atiende peticiones por un socket Unix o TCP
+local. El protocolo es JSON por líneas: una petición por línea y una
+respuesta por línea con el mismo `id`.
+
+Peticiones:
+    {"id": 1, "method": "analyze", "source": "...", "parser": "tabla",
+     "key": "ruta/del/fichero", "artifacts": true}
+    {"id": 2, "method": "cancel", "target": 1}
+    {"id": 3, "method": "ping"}
+    {"id": 4, "method": "shutdown"}
+
+Respuestas:
+    {"id": 1, "result": {"success": ..., "diagnostics": [...], "lexed": ..., ...}}
+    {"id": 1, "error": {"code": "cancelled", "message": "..."}}
+
+Cancelación: `cancel` aborta una petición pendiente de la misma conexión, y
+una petición `analyze` con `key` deja obsoleta cualquier otra pendiente de esa
+conexión con la misma `key` (p. ej. guardados sucesivos del mismo fichero). Si
+el análisis obsoleto ya se está ejecutando en un proceso, se descarta su
+resultado. Un `analyze` con el `id` de otra petición aún pendiente de la misma
+conexión se rechaza con `bad_request`.
+
+Uso:
+    python server.py serve [--unix /tmp/myjs.sock | --host 127.0.0.1 --port 7357] [-j 4]
+    python server.py client programa.txt [--unix ... | --port ...] [--parser generado]
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import lex
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7357
+# Tamaño máximo de una línea del protocolo (fuentes de decenas de miles de líneas).
+MAX_LINE = 64 * 1024 * 1024
+
+# Estado de cada proceso del pool: gramática compartida y una sesión por
+# (motor, artefactos).
+_compiled = None
+_sessions = {}
+
+
+def _init_worker(grammar_path, use_cache):
+    """Inicializador del pool (con `fork` la gramática del servidor se hereda)."""
+    global _compiled
+    if _compiled is None:
+        _compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def analyze_source(source, engine='tabla', artifacts=True):
+    """Analiza `source` en el proceso actual; devuelve el resultado serializable."""
+    # Sin artefactos la sesión no guarda los tokens: una por motor y modo.
+    session = _sessions.get((engine, artifacts))
+    if session is None:
+        session = _sessions[engine, artifacts] = lex.Analyzer(_compiled, parser=engine,
+                                                              keep_tokens=artifacts)
+    start = time.perf_counter()
+    result = session.analyze(source)
+    elapsed = time.perf_counter() - start
+    response = {
+        'success': result.success,
+        'syntax_ok': result.ok,
+        'diagnostics': [{'kind': d.kind, 'line': d.line, 'message': d.message}
+                        for d in result.diagnostics],
+        'production_sequence': result.production_sequence,
+        'timings': {'analyze': round(elapsed, 6)},
+    }
+    if artifacts:
+        response['lexed'] = result.lexed_text()
+        response['symbols'] = result.symbols_text()
+        response['parse'] = result.parse_text() if result.success else None
+    return response
+
+
+class AnalysisServer:
+    """Servidor asyncio: reparte los análisis entre un pool de procesos."""
+
+    def __init__(self, workers=None, use_cache=True, grammar_path=None):
+        global _compiled
+        grammar_path = grammar_path or lex.get_resource_path('Gramatica.txt')
+        # La gramática se compila aquí una vez (y queda en la caché de disco).
+        _compiled = lex.load_compiled_grammar(grammar_path, use_cache=use_cache)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(grammar_path, use_cache))
+        self.server = None
+        self.stopped = None
+        self.connections = {}  # tarea de cada cliente -> su writer
+
+    async def start(self, unix_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        self.stopped = loop.create_future()
+        # Arrancar los procesos antes de aceptar clientes (sin latencia en la 1ª petición).
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up)
+                               for _ in range(self.workers)))
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self.server = await asyncio.start_unix_server(self.handle_client, unix_path,
+                                                          limit=MAX_LINE)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port,
+                                                     limit=MAX_LINE)
+        return self.server
+
+    async def serve_forever(self, **address):
+        await self.start(**address)
+        async with self.server:
+            await self.stopped
+            # Cerrar las conexiones abiertas: sus manejadores ven EOF y terminan.
+            for writer in list(self.connections.values()):
+                writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+
+    def stop(self):
+        if self.stopped is not None and not self.stopped.done():
+            self.stopped.set_result(None)
+
+    async def handle_client(self, reader, writer):
+        self.connections[asyncio.current_task()] = writer
+        pending = {}   # id -> tarea de análisis en curso
+        by_key = {}    # key -> id de la última petición con esa key
+
+        def send(message):
+            if not writer.is_closing():
+                writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        async def flush():
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+        def forget(request_id, request):
+            pending.pop(request_id, None)
+            key = request.get('key')
+            if key is not None and by_key.get(key) == request_id:
+                del by_key[key]
+
+        def send_cancelled(request_id):
+            send({'id': request_id,
+                  'error': {'code': 'cancelled', 'message': 'Petición cancelada'}})
+
+        async def run_analysis(request_id, request):
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, analyze_source, request.get('source', ''),
+                    request.get('parser', 'tabla'), bool(request.get('artifacts', True)))
+                send({'id': request_id, 'result': result})
+            except asyncio.CancelledError:
+                send_cancelled(request_id)
+            except Exception as e:
+                send({'id': request_id, 'error': {'code': 'internal', 'message': str(e)}})
+            finally:
+                forget(request_id, request)
+            await flush()
+
+        def analysis_done(request_id, request, task):
+            # Cancelada antes de empezar: `run_analysis` no llegó a ejecutarse.
+            if task.cancelled():
+                send_cancelled(request_id)
+                forget(request_id, request)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    send({'id': None, 'error': {'code': 'too_large',
+                                                'message': 'Petición demasiado grande'}})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    method = request['method']
+                except (ValueError, KeyError, TypeError):
+                    send({'id': None, 'error': {'code': 'bad_request',
+                                                'message': 'JSON inválido o sin "method"'}})
+                    continue
+                request_id = request.get('id')
+
+                if method == 'analyze':
+                    if request.get('parser', 'tabla') not in ('tabla', 'generado'):
+                        send({'id': request_id, 'error': {'code': 'bad_request',
+                                                          'message': 'Motor sintáctico desconocido'}})
+                        continue
+                    if request_id in pending:
+                        # Dos respuestas con el mismo id serían ambiguas y la
+                        # primera petición ya no se podría cancelar.
+                        send({'id': request_id, 'error': {'code': 'bad_request',
+                                                          'message': 'Ya hay una petición en curso con ese id'}})
+                        continue
+                    key = request.get('key')
+                    if key is not None and key in by_key:
+                        # Petición obsoleta: la reemplaza esta.
+                        outdated = pending.get(by_key[key])
+                        if outdated is not None:
+                            outdated.cancel()
+                    task = asyncio.create_task(run_analysis(request_id, request))
+                    task.add_done_callback(functools.partial(analysis_done, request_id, request))
+                    pending[request_id] = task
+                    if key is not None:
+                        by_key[key] = request_id
+                elif method == 'cancel':
+                    task = pending.get(request.get('target'))
+                    if task is not None:
+                        task.cancel()
+                    send({'id': request_id, 'result': {'cancelled': task is not None}})
+                elif method == 'ping':
+                    send({'id': request_id, 'result': {'version': lex.ANALYZER_VERSION,
+                                                       'workers': self.workers}})
+                elif method == 'shutdown':
+                    send({'id': request_id, 'result': {}})
+                    self.stop()
+                else:
+                    send({'id': request_id, 'error': {'code': 'unknown_method',
+                                                      'message': f'Método desconocido: {method}'}})
+                await flush()
+            # Fin de la entrada: responder a lo que queda pendiente antes de cerrar.
+            await asyncio.gather(*pending.values(), return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in list(pending.values()):
+                task.cancel()
+            writer.close()
+            self.connections.pop(asyncio.current_task(), None)
+
+
+async def request(message, unix_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Envía una petición al servidor y devuelve su respuesta."""
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path, limit=MAX_LINE)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    try:
+        writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+        line = await reader.readline()
+    finally:
+        writer.close()
+    if not line:
+        raise ConnectionError('El servidor cerró la conexión')
+    return json.loads(line)
+
+
+def _add_address_arguments(parser):
+    parser.add_argument('--unix', help='Ruta del socket Unix (por defecto, TCP)')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+
+def _address(args):
+    return {'unix_path': args.unix, 'host': args.host, 'port': args.port}
+
+
+def run_client(args):
+    """Cliente ligero: misma salida y ficheros que `python lex.py <file>`."""
+    try:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except FileNotFoundError:
+        print(f"Error: No se encontró el archivo '{args.file}'")
+        sys.exit(1)
+    except IOError as e:
+        print(f"Error al leer el archivo: {e}")
+        sys.exit(1)
+
+    message = {'id': 1, 'method': 'analyze', 'source': content, 'parser': args.parser,
+               'key': os.path.abspath(args.file)}
+    try:
+        response = asyncio.run(request(message, **_address(args)))
+    except OSError as e:
+        print(f"Error: No se pudo conectar con el servidor: {e}")
+        sys.exit(1)
+    if 'error' in response:
+        print(f"Error: {response['error']['message']}")
+        sys.exit(1)
+
+    result = response['result']
+    diagnostics = [lex.Diagnostic(**d) for d in result['diagnostics']]
+    code = lex.report_analysis(diagnostics, result['lexed'], result['symbols'], result['parse'])
+    if code:
+        sys.exit(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de análisis MyJS (JSON por líneas)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Arrancar el servidor')
+    _add_address_arguments(serve)
+    serve.add_argument('-j', '--workers', type=int, default=None,
+                       help='Nº de procesos de análisis (por defecto, uno por núcleo)')
+    serve.add_argument('--no-cache', action='store_true',
+                       help='No usar la caché en disco de la tabla LL(1)')
+
+    client = commands.add_parser('client', help='Analizar un fichero con el servidor')
+    _add_address_arguments(client)
+    client.add_argument('file', help='Archivo fuente MyJS a analizar')
+    client.add_argument('--parser', choices=['tabla', 'generado'], default='tabla',
+                        help='Motor sintáctico (ver lex.py --parser)')
+    args = parser.parse_args()
+
+    if args.command == 'client':
+        run_client(args)
+        return
+
+    server = AnalysisServer(args.workers, use_cache=not args.no_cache)
+    where = args.unix or f'{args.host}:{args.port}'
+    print(f"Servidor MyJS {lex.ANALYZER_VERSION} escuchando en {where} "
+          f"({server.workers} procesos)", flush=True)
+    try:
+        asyncio.run(server.serve_forever(**_address(args)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    # Los procesos del pool en un ejecutable congelado (PyInstaller, spawn).
+    multiprocessing.freeze_support()
+    main()
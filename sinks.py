@@ -0,0 +1,162 @@
+"""Destinos (*sinks*) de los artefactos de la CLI: `lexed.txt`, `symbols.txt` y `parse.txt`.
+
+Cada artefacto se escribe a través de un sink que agrupa las escrituras en
+bloques: un fichero de texto (`FileSink`), comprimido (`GzipSink`), en memoria
+(`MemorySink`) o ninguno (`NullSink`). `make_sink` elige el de cada opción de
+la CLI (`--lexed/--symbols/--parse RUTA|none`).
+
+Uso:
+    sink = sinks.make_sink('lexed', 'tokens.txt.gz')
+    sinks.write_artifact(sink, result.lexed_lines())
+"""
+
+
+class OutputSink:
+    """Destino de un artefacto (`lexed.txt`, `symbols.txt` o `parse.txt`).
+
+    Se usa como contexto (`with sink:` lo abre y lo cierra). `write` acumula
+    los trozos y los vuelca en bloques de `BUFFER_SIZE` caracteres, así que se
+    puede escribir token a token o símbolo a símbolo sin una escritura real por
+    trozo. Con `enabled = False` (`NullSink`) el artefacto no se genera y
+    quien escribe puede ahorrarse también formatearlo.
+    """
+    enabled = True
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, name):
+        self.name = name  # Nombre que se muestra en "Archivos generados"
+        self._parts = []
+        self._size = 0
+
+    def open(self):
+        pass
+
+    def _emit(self, text):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.BUFFER_SIZE:
+            self.flush()
+
+    def writelines(self, pieces):
+        for text in pieces:
+            self.write(text)
+
+    def flush(self):
+        if self._parts:
+            self._emit(''.join(self._parts))
+            self._parts = []
+            self._size = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FileSink(OutputSink):
+    """Fichero de texto (el destino por defecto de los tres artefactos)."""
+
+    def __init__(self, path, encoding='utf-8'):
+        super().__init__(path)
+        self.path = path
+        self.encoding = encoding
+        self.file = None
+
+    def open(self):
+        self.file = open(self.path, 'w', encoding=self.encoding)
+
+    def _emit(self, text):
+        self.file.write(text)
+
+    def _close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class GzipSink(FileSink):
+    """Fichero de texto comprimido con gzip."""
+
+    def open(self):
+        import gzip
+        self.file = gzip.open(self.path, 'wt', encoding=self.encoding or 'utf-8')
+
+
+class MemorySink(OutputSink):
+    """Guarda el artefacto en memoria (`getvalue()`)."""
+
+    def __init__(self, name='<memoria>'):
+        super().__init__(name)
+        self.chunks = []
+
+    def _emit(self, text):
+        self.chunks.append(text)
+
+    def getvalue(self):
+        self.flush()
+        return ''.join(self.chunks)
+
+
+class NullSink(OutputSink):
+    """Descarta el artefacto (no se genera)."""
+    enabled = False
+
+    def __init__(self, name='<ninguno>'):
+        super().__init__(name)
+
+    def write(self, text):
+        pass
+
+    def _emit(self, text):
+        pass
+
+
+# Artefactos de la CLI: nombre -> (fichero por defecto, codificación). `parse.txt`
+# se escribe con la codificación por defecto, como siempre.
+ARTIFACTS = {'lexed': ('lexed.txt', 'utf-8'),
+             'symbols': ('symbols.txt', 'utf-8'),
+             'parse': ('parse.txt', None)}
+
+
+def make_sink(artifact, spec=None):
+    """Sink de un artefacto según la opción de la CLI.
+
+    `spec` es None (fichero por defecto en el directorio actual), 'none' (no se
+    genera) o una ruta; si acaba en '.gz' se escribe comprimido.
+    """
+    path, encoding = ARTIFACTS[artifact]
+    if spec is None:
+        return FileSink(path, encoding)
+    if spec == 'none':
+        return NullSink()
+    if spec.endswith('.gz'):
+        return GzipSink(spec, encoding)
+    return FileSink(spec, encoding)
+
+
+def default_sinks():
+    """Los tres artefactos en sus ficheros de siempre."""
+    return {artifact: make_sink(artifact) for artifact in ARTIFACTS}
+
+
+def write_artifact(sink, text):
+    """Escribe `text` (str o iterable de trozos) en `sink` y lo cierra."""
+    with sink:
+        if isinstance(text, str):
+            sink.write(text)
+        else:
+            sink.writelines(text)
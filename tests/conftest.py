@@ -0,0 +1,70 @@
+"""Configuración común de las pruebas del analizador MyJS.
+
+Los programas de `programas/correctos` y `programas/incorrectos` se analizan con
+cada modo del analizador y se comparan con `lex.Analyzer.analyze`, que es la
+referencia. Las cachés en disco van a un directorio temporal (MYJS_CACHE_DIR).
+
+Uso:
+    python -m pytest -q
+"""
+import glob
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PROGRAMS = sorted(glob.glob(os.path.join(ROOT, 'programas', '*', '*.txt')))
+
+
+def snapshot(result):
+    """Lo que tiene que coincidir entre modos: veredicto, tokens, derivación,
+    diagnósticos y tablas de símbolos."""
+    return (result.ok, list(result.tokens), list(result.production_sequence),
+            [d.render() for d in result.diagnostics], result.symbols_text())
+
+
+@pytest.fixture(scope='session', autouse=True)
+def cache_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('cache'))
+    saved = os.environ.get('MYJS_CACHE_DIR')
+    os.environ['MYJS_CACHE_DIR'] = path
+    yield path
+    if saved is None:
+        del os.environ['MYJS_CACHE_DIR']
+    else:
+        os.environ['MYJS_CACHE_DIR'] = saved
+
+
+@pytest.fixture(scope='session')
+def outcome():
+    """`snapshot` como fixture: `outcome(result)`."""
+    return snapshot
+
+
+@pytest.fixture(scope='session')
+def compiled():
+    import lex
+    return lex.load_compiled_grammar(lex.get_resource_path('Gramatica.txt'), use_cache=False)
+
+
+@pytest.fixture(scope='session')
+def reference(compiled):
+    """`reference(source)`: resultado de `lex.Analyzer.analyze` (con memoria por fuente)."""
+    import lex
+    analyzer = lex.Analyzer(compiled)
+    results = {}
+
+    def analyze(source):
+        if source not in results:
+            results[source] = snapshot(analyzer.analyze(source))
+        return results[source]
+    return analyze
+
+
+@pytest.fixture(params=PROGRAMS, ids=lambda path: os.path.relpath(path, os.path.join(ROOT, 'programas')))
+def source(request):
+    with open(request.param, encoding='utf-8') as f:
+        return f.read()
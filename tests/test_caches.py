@@ -0,0 +1,245 @@
+"""Cachés en disco: ida y vuelta y ficheros corruptos o manipulados.
+
+Un fichero de caché ilegible o que no encaja nunca es un error: cuenta como
+fallo y el valor se vuelve a calcular.
+"""
+import glob
+import json
+import os
+
+import pytest
+
+import caches
+import lex
+
+GRAMMAR_PATH = lex.get_resource_path('Gramatica.txt')
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    """Directorio de cachés vacío para una prueba."""
+    monkeypatch.setenv('MYJS_CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def grammar_tables(compiled):
+    return (compiled.grammar, compiled.first_sets, compiled.follow_sets, compiled.parsing_table,
+            compiled.symbol_names, compiled.dense_table, compiled.sync_codes)
+
+
+# Caché de la gramática compilada
+
+def rewrite_grammar_cache(change):
+    """Aplica `change` al JSON de la caché de la gramática y lo vuelve a escribir."""
+    path, = glob.glob(os.path.join(lex.get_cache_dir(), 'll1-*.json'))
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    change(data)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_grammar_cache_round_trip(isolated_cache, compiled):
+    built = lex.load_compiled_grammar(GRAMMAR_PATH)
+    cached = lex.load_compiled_grammar(GRAMMAR_PATH)
+    assert (built.from_cache, cached.from_cache) == (False, True)
+    assert grammar_tables(cached) == grammar_tables(built) == grammar_tables(compiled)
+
+
+def test_grammar_cache_same_analysis(isolated_cache, reference, outcome, source):
+    lex.load_compiled_grammar(GRAMMAR_PATH)
+    cached = lex.load_compiled_grammar(GRAMMAR_PATH)
+    assert cached.from_cache
+    assert outcome(lex.Analyzer(cached).analyze(source)) == reference(source)
+
+
+def set_table_nonterminal(data):
+    data['parsing_table'][0][0] = 'NoExiste'
+
+
+def add_follow_symbol(data):
+    data['follow'][0][1].append('no_existe')
+
+
+def set_axiom(data):
+    data['axiom'] = 'no_existe'
+
+
+def drop_axiom_first(data):
+    # Bien formado y con símbolos válidos, pero `CompiledGrammar` no se puede construir.
+    data['first'] = [entry for entry in data['first'] if entry[0] != data['axiom']]
+
+
+def wrong_types(data):
+    data['terminals'] = [1, 2, 3]
+
+
+def wrong_key(data):
+    data['key'] = '0' * 64
+
+
+@pytest.mark.parametrize('change', [set_table_nonterminal, add_follow_symbol, set_axiom,
+                                    drop_axiom_first, wrong_types, wrong_key])
+def test_grammar_cache_tampered(isolated_cache, compiled, change):
+    lex.load_compiled_grammar(GRAMMAR_PATH)
+    rewrite_grammar_cache(change)
+    rebuilt = lex.load_compiled_grammar(GRAMMAR_PATH)
+    assert not rebuilt.from_cache
+    assert grammar_tables(rebuilt) == grammar_tables(compiled)
+    # Se ha reescrito: la siguiente carga ya sale de la caché.
+    assert lex.load_compiled_grammar(GRAMMAR_PATH).from_cache
+
+
+@pytest.mark.parametrize('content', [b'', b'{', b'[]', b'\x80\x81', b'{"key": null}'])
+def test_grammar_cache_unreadable(isolated_cache, compiled, content):
+    lex.load_compiled_grammar(GRAMMAR_PATH)
+    path, = glob.glob(os.path.join(lex.get_cache_dir(), 'll1-*.json'))
+    with open(path, 'wb') as f:
+        f.write(content)
+    rebuilt = lex.load_compiled_grammar(GRAMMAR_PATH)
+    assert not rebuilt.from_cache
+    assert grammar_tables(rebuilt) == grammar_tables(compiled)
+
+
+# Caché de tokens
+
+def lexed(lexer):
+    return list(lexer.buffer), lexer.errors, lexer.end_lineno, lexer.end_lexpos
+
+
+@pytest.mark.parametrize('engine', ['regex', 'ply'])
+def test_token_cache_round_trip(tmp_path, source, engine):
+    cache = caches.TokenCache(str(tmp_path))
+    key = cache.key(source, engine)
+    lexer = lex.lex_parallel(source, 1, engine)
+    cache.put(key, lexer)
+    assert lexed(cache.get(key)) == lexed(lexer)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_token_cache_key_depends_on_engine(tmp_path):
+    cache = caches.TokenCache(str(tmp_path))
+    assert cache.key('let int x;', 'regex') != cache.key('let int x;', 'ply')
+    assert cache.key('let int x;', 'regex') != cache.key('let int y;', 'regex')
+
+
+def test_token_cache_same_analysis(tmp_path, compiled, reference, outcome, source):
+    cache = caches.TokenCache(str(tmp_path))
+    analyzer = lex.Analyzer(compiled, token_cache=cache)
+    assert outcome(analyzer.analyze(source)) == reference(source)
+    assert outcome(analyzer.analyze(source)) == reference(source)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def truncate(data):
+    return data[:len(data) // 2]
+
+
+def flip_payload(data):
+    return data[:-8] + bytes(b ^ 0xFF for b in data[-8:])
+
+
+def bad_magic(data):
+    return b'XXXX' + data[4:]
+
+
+def empty(data):
+    return b''
+
+
+@pytest.mark.parametrize('corrupt', [truncate, flip_payload, bad_magic, empty])
+def test_token_cache_corrupt(tmp_path, compiled, reference, outcome, corrupt):
+    source = 'let int x = 1;\nwrite x;\n'
+    cache = caches.TokenCache(str(tmp_path))
+    key = cache.key(source)
+    cache.put(key, lex.lex_parallel(source, 1))
+    path = cache._path(key)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(corrupt(data))
+    assert cache.get(key) is None
+    assert cache.misses == 1
+    # Con la entrada corrupta el análisis vuelve a tokenizar y la reemplaza.
+    analyzer = lex.Analyzer(compiled, token_cache=cache)
+    assert outcome(analyzer.analyze(source)) == reference(source)
+    assert cache.get(key) is not None
+
+
+def test_token_cache_entry_of_other_key(tmp_path):
+    cache = caches.TokenCache(str(tmp_path))
+    key, other = cache.key('let int x;'), cache.key('let int y;')
+    cache.put(key, lex.lex_parallel('let int x;', 1))
+    os.replace(cache._path(key), cache._path(other))
+    assert cache.get(other) is None
+
+
+# Caché de resultados
+
+def result_outcome(result):
+    return (result.ok, list(result.tokens), list(result.production_sequence),
+            [d.render() for d in result.diagnostics], result.symbols_text(), result.lexed_text(),
+            result.parse_text())
+
+
+def test_result_cache_round_trip(tmp_path, compiled, source):
+    import artifacts
+    cache = artifacts.ResultCache(str(tmp_path))
+    result = lex.Analyzer(compiled).analyze(source)
+    key = cache.key(source, GRAMMAR_PATH, parser='tabla', lexer='regex')
+    assert cache.get(key) is None
+    cache.put(key, result)
+    assert result_outcome(cache.get(key)) == result_outcome(result)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_cache_key_depends_on_options(tmp_path):
+    import artifacts
+    cache = artifacts.ResultCache(str(tmp_path))
+    options = dict(parser='tabla', lexer='regex', recover=False)
+    keys = {cache.key('let int x;', GRAMMAR_PATH, **options),
+            cache.key('let int y;', GRAMMAR_PATH, **options),
+            cache.key('let int x;', GRAMMAR_PATH, **dict(options, parser='generado')),
+            cache.key('let int x;', GRAMMAR_PATH, **dict(options, lexer='ply')),
+            cache.key('let int x;', GRAMMAR_PATH, **dict(options, recover=True))}
+    assert len(keys) == 5
+
+
+@pytest.mark.parametrize('corrupt', [truncate, flip_payload, bad_magic, empty])
+def test_result_cache_corrupt(tmp_path, compiled, corrupt):
+    import artifacts
+    source = 'let int x = 1;\nwrite x;\n'
+    cache = artifacts.ResultCache(str(tmp_path))
+    key = cache.key(source, GRAMMAR_PATH)
+    cache.put(key, lex.Analyzer(compiled).analyze(source))
+    path = cache._path(key)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(corrupt(data))
+    assert cache.get(key) is None
+    assert cache.misses == 1
+
+
+def run_cli(cwd, *args):
+    import subprocess
+    import sys
+    completed = subprocess.run([sys.executable, os.path.join(os.path.dirname(GRAMMAR_PATH), 'lex.py'),
+                                *args], cwd=cwd, capture_output=True, text=True, encoding='utf-8')
+    outputs = {name: (cwd / name).read_text(encoding='utf-8')
+               for name in ('lexed.txt', 'symbols.txt', 'parse.txt') if (cwd / name).exists()}
+    return completed.returncode, completed.stdout, outputs
+
+
+def test_cli_replays_cached_result(isolated_cache, tmp_path):
+    import artifacts
+    program = sorted(glob.glob(os.path.join(os.path.dirname(GRAMMAR_PATH), 'programas', '*', '*.txt')))[0]
+    work = tmp_path / 'salida'
+    work.mkdir()
+    first = run_cli(work, program)
+    cache = artifacts.ResultCache()
+    assert cache.info()['entries'] == 1
+    assert run_cli(work, program) == first
+    # Otro motor léxico es otra entrada: no reutiliza el resultado del primero.
+    assert run_cli(work, program, '--lexer', 'ply') == first
+    assert cache.info()['entries'] == 2
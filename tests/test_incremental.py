@@ -0,0 +1,52 @@
+"""Reanálisis incremental (`incremental.IncrementalAnalyzer`) frente al análisis completo."""
+import random
+
+import incremental
+
+SNIPPETS = [
+    "let int nuevo;\n", "nuevo = 3;\n", "function int f(int a) { return a; }\n",
+    "let string s = 'hola';\n", "write s;\n", "if (a) b = 1;\n", "}", "{", ";", "x", "\n",
+    "function void g() { let int t; t = f(2); }\n", "f(3);\n", "// comentario\n", "'", "@",
+]
+
+
+def edits(source):
+    """Ediciones deterministas de `source`, cada una sobre la anterior."""
+    lines = source.split('\n')
+    middle = len(lines) // 2
+    yield "let int nuevo;\n" + source
+    yield source + "\nnuevo = 7;\nwrite nuevo;\n"
+    yield '\n'.join(lines[1:])
+    yield '\n'.join(lines[:middle] + ["function int doble(int v) { return v + v; }"] + lines[middle:])
+    yield source.replace('int', 'string', 1)
+    yield source.replace(';', '', 1)
+    yield source
+
+
+def test_reanalysis_without_changes(compiled, reference, outcome, source):
+    analyzer = incremental.IncrementalAnalyzer(compiled)
+    analyzer.analyze(source)
+    result = analyzer.analyze(source)
+    assert outcome(result) == reference(source)
+    # Se reaprovecha todo salvo la unidad final (S -> eof), que no se guarda.
+    assert analyzer.stats['reused'] == analyzer.stats['units'] - (result.syntax_error is None)
+
+
+def test_edits_same_as_full_analysis(compiled, reference, outcome, source):
+    analyzer = incremental.IncrementalAnalyzer(compiled)
+    analyzer.analyze(source)
+    for edited in edits(source):
+        assert outcome(analyzer.analyze(edited)) == reference(edited)
+
+
+def test_random_edits_same_as_full_analysis(compiled, reference, outcome, source):
+    rng = random.Random(len(source))
+    analyzer = incremental.IncrementalAnalyzer(compiled)
+    text = source
+    for _ in range(15):
+        position = rng.randrange(len(text) + 1)
+        if rng.random() < 0.4:
+            text = text[:position] + text[position + rng.randrange(1, 30):]
+        else:
+            text = text[:position] + rng.choice(SNIPPETS) + text[position:]
+        assert outcome(analyzer.analyze(text)) == reference(text)
@@ -0,0 +1,38 @@
+"""Lexer de expresión regular maestra (`Scanner`) frente al lexer de PLY."""
+import pytest
+
+import lex
+
+# Fuentes con errores léxicos, comentarios y constantes fuera de rango.
+EDGE_CASES = [
+    '',
+    'let int x; // comentario\nx = 1;',
+    "let string s = 'sin cerrar;\nx = 3;",
+    'let int n = 99999999;\nlet float f = 1.5e3;',
+    'x = @ # $ 5;\n/* no es comentario */',
+    "write 'a\\'b';\n\t\r\nlet boolean b;",
+]
+
+
+def tokens_and_errors(engine, source):
+    lexer = lex.lex_parallel(source, 1, engine)
+    return list(lexer.buffer), lexer.errors
+
+
+@pytest.mark.parametrize('parser', ['tabla', 'generado'])
+def test_same_result_as_ply(compiled, outcome, source, parser):
+    ply = lex.Analyzer(compiled, parser=parser, lexer='ply')
+    regex = lex.Analyzer(compiled, parser=parser, lexer='regex')
+    assert outcome(regex.analyze(source)) == outcome(ply.analyze(source))
+
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_same_tokens_and_errors(text):
+    assert tokens_and_errors('regex', text) == tokens_and_errors('ply', text)
+
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_edge_cases_same_analysis(compiled, outcome, text):
+    ply = lex.Analyzer(compiled, lexer='ply')
+    regex = lex.Analyzer(compiled, lexer='regex')
+    assert outcome(regex.analyze(text)) == outcome(ply.analyze(text))
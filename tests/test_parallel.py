@@ -0,0 +1,53 @@
+"""Análisis en varios procesos frente al secuencial: tokenizado en paralelo
+(`lex.lex_parallel`) y comprobación de funciones en paralelo
+(`incremental.ParallelAnalyzer`)."""
+import pytest
+
+import incremental
+import lex
+
+# `g` lee un global que `f` declara implícitamente en su cuerpo: el proceso que
+# comprueba `g` no lo ve y el proceso principal tiene que volver a analizarla.
+IMPLICIT_GLOBAL = """function int f(int a) {
+    implicita = a;
+    return a;
+}
+function int g(int b) {
+    return implicita + b;
+}
+let int x = f(1);
+write g(x);
+"""
+
+
+@pytest.mark.parametrize('engine', ['regex', 'ply'])
+def test_parallel_lexing_same_tokens(source, engine):
+    sequential = lex.lex_parallel(source, 1, engine)
+    parallel = lex.lex_parallel(source, 3, engine, min_chunk=16)
+    assert list(parallel.buffer) == list(sequential.buffer)
+    assert parallel.errors == sequential.errors
+    assert (parallel.end_lineno, parallel.end_lexpos) == \
+        (sequential.end_lineno, sequential.end_lexpos)
+
+
+def test_prelexed_analysis_same_result(compiled, reference, outcome, source):
+    analyzer = lex.Analyzer(compiled)
+    lexer = lex.lex_parallel(source, 3, min_chunk=16)
+    assert outcome(analyzer.analyze_prelexed(source, lexer)) == reference(source)
+
+
+def test_analyze_parallel_same_result(compiled, reference, outcome, source):
+    assert outcome(lex.Analyzer(compiled).analyze_parallel(source, 2)) == reference(source)
+
+
+@pytest.mark.parametrize('jobs', [2, 3])
+def test_parallel_semantics_same_result(compiled, reference, outcome, source, jobs):
+    analyzer = incremental.ParallelAnalyzer(compiled, jobs=jobs)
+    assert outcome(analyzer.analyze(source)) == reference(source)
+
+
+def test_parallel_semantics_rechecks_stale_units(compiled, reference, outcome):
+    analyzer = incremental.ParallelAnalyzer(compiled, jobs=2)
+    assert outcome(analyzer.analyze(IMPLICIT_GLOBAL)) == reference(IMPLICIT_GLOBAL)
+    assert analyzer.stats['rechecked'] >= 1
+    assert analyzer.stats['reused'] >= 1
@@ -0,0 +1,42 @@
+"""Parser generado por parsergen.py frente al intérprete de la tabla (`Analyzer.parse`)."""
+import sys
+
+import lex
+import parsergen
+
+
+def test_same_result_as_table(compiled, reference, outcome, source):
+    analyzer = lex.Analyzer(compiled, parser='generado')
+    assert outcome(analyzer.analyze(source)) == reference(source)
+
+
+def test_session_reused(compiled, reference, outcome, source):
+    analyzer = lex.Analyzer(compiled, parser='generado')
+    analyzer.analyze('let int x;\nx = (1;\n')
+    assert outcome(analyzer.analyze(source)) == reference(source)
+
+
+def test_too_deep_falls_back_to_table(compiled, reference, outcome):
+    source = 'let int x;\nx = ' + '(' * 300 + '1' + ')' * 300 + ';\n'
+    analyzer = lex.Analyzer(compiled, parser='generado')
+    analyzer.analyze('')
+    fallbacks = []
+    parse_too_deep = analyzer.parse_too_deep
+    analyzer.parse_too_deep = lambda text: fallbacks.append(text) or parse_too_deep(text)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(400)
+    try:
+        result = analyzer.analyze(source)
+    finally:
+        sys.setrecursionlimit(limit)
+    assert fallbacks == [source]
+    assert outcome(result) == reference(source)
+    assert result.ok
+
+
+def test_generated_source_compiles(compiled):
+    source = parsergen.generate_parser_source(compiled.grammar, compiled.expansion_table,
+                                              lex.TOKEN_TO_GRAMMAR)
+    namespace = {}
+    exec(compile(source, parsergen.GENERATED_MODULE_NAME, 'exec'), namespace)
+    assert callable(namespace['make_parser'])
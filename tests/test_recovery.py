@@ -0,0 +1,37 @@
+"""Recuperación de errores sintácticos en modo pánico (`Analyzer(recover=True)`)."""
+import lex
+
+# Tres errores sintácticos independientes, uno por sentencia.
+SEVERAL_ERRORS = """let int a = ;
+let int b;
+b = (3;
+write b;
+if (b) { a = 1 }
+write a;
+"""
+
+
+def test_same_result_as_plain_analysis(compiled, reference, outcome, source):
+    """Sin errores sintácticos el resultado es el mismo; con ellos, el primero coincide."""
+    plain = lex.Analyzer(compiled).analyze(source)
+    result = lex.Analyzer(compiled, recover=True).analyze(source)
+    if plain.syntax_error is None:
+        assert outcome(result) == reference(source)
+    else:
+        assert not result.ok
+        assert result.syntax_errors[0] == plain.syntax_error
+        assert result.tokens[-1][0] == 'EOF' or len(result.syntax_errors) == lex.MAX_SYNTAX_ERRORS
+
+
+def test_reports_every_error(compiled):
+    plain = lex.Analyzer(compiled).analyze(SEVERAL_ERRORS)
+    result = lex.Analyzer(compiled, recover=True).analyze(SEVERAL_ERRORS)
+    assert [e.line for e in result.syntax_errors] == [1, 3, 5]
+    assert result.syntax_errors[0] == plain.syntax_error
+    assert result.tokens[-1][0] == 'EOF'
+
+
+def test_max_errors(compiled):
+    result = lex.Analyzer(compiled, recover=True, max_errors=2).analyze(SEVERAL_ERRORS)
+    assert len(result.syntax_errors) == 2
+    assert not result.ok
@@ -0,0 +1,41 @@
+"""Análisis por trozos (`Analyzer.analyze_stream`, `read_source_chunks`) frente al fuente entero."""
+import pytest
+
+import lex
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize('parser', ['tabla', 'generado'])
+@pytest.mark.parametrize('size', [1, 7, 4096])
+def test_stream_same_as_whole_file(compiled, reference, outcome, source, parser, size):
+    analyzer = lex.Analyzer(compiled, parser=parser)
+    assert outcome(analyzer.analyze_stream(chunked(source, size))) == reference(source)
+
+
+@pytest.mark.parametrize('size', [1, 64])
+def test_flushed_stream_same_as_whole_file(compiled, reference, source, size):
+    tokens, productions = [], []
+
+    def flush(buffer, sequence):
+        tokens.extend(buffer)
+        productions.extend(sequence)
+    result = lex.Analyzer(compiled).analyze_stream(iter(chunked(source, size)), flush)
+    ok, expected_tokens, expected_productions, diagnostics, symbols = reference(source)
+    assert (tokens, productions) == (expected_tokens, expected_productions)
+    assert (result.ok, [d.render() for d in result.diagnostics], result.symbols_text()) == \
+        (ok, diagnostics, symbols)
+    assert not result.production_sequence
+
+
+@pytest.mark.parametrize('raw', [b'a\r\nb\rc\n', 'é'.encode('utf-8') * 10 + b'\r\n' * 5, b'', b'x'])
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_read_source_chunks(tmp_path, raw, use_mmap):
+    path = tmp_path / 'fuente.txt'
+    path.write_bytes(raw)
+    with open(path, encoding='utf-8') as f:
+        expected = f.read()
+    for size in (1, 2, 3, 100):
+        assert ''.join(lex.read_source_chunks(str(path), size, use_mmap)) == expected